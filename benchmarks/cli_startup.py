@@ -0,0 +1,137 @@
+import argparse
+import datetime
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from nhl_api_stub import StubConfig, StubServer
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+CLI_PATH = os.path.join(SRC_DIR, "nhl_data_parser.py")
+
+SUBCOMMANDS = [
+    "create_csv_backup",
+    "build_from_scratch",
+    "build_from_csv_backup",
+    "create_tables",
+    "update_database",
+    "retry_failed",
+    "reconcile_plays",
+    "update_aggregates",
+    "update_wide_events",
+    "build_shot_grids",
+    "export",
+    "profile",
+    "build_game_store",
+    "build_player_index",
+    "live",
+    "enqueue_jobs",
+    "requeue_failed_jobs",
+    "daemon",
+    "worker",
+]
+
+# what the cli used to import before dispatching any subcommand
+EAGER_IMPORTS = (
+    "import polars, requests, bs4, mysql.connector;"
+    "import db_connector;"
+    "import sub_parsers.html_pbp_parser, sub_parsers.json_pbp_parser,"
+    " sub_parsers.json_shift_parser"
+)
+
+# stores one game played yesterday, so update_database only rescans yesterday's
+# schedule, which the stub serves empty
+SEED_GAME = (
+    "import sys, datetime; from db_connector import DBConnector;"
+    "db = DBConnector(sys.argv[1]);"
+    "db.execute('INSERT INTO nhl_api_data.json_pbp_game_info (game_id, season, date)"
+    " VALUES (%s, %s, %s)', (2025020001, 2025, datetime.date.fromisoformat(sys.argv[2])));"
+    "db.commit()"
+)
+
+
+# subcommands run to the end on a local duckdb database and the api stub, after
+# the tables are created and seeded
+def dispatch_commands(tmp: str) -> dict[str, list[str]]:
+    db_cred_path = os.path.join(tmp, "database_creds.json")
+    with open(db_cred_path, "w") as f:
+        json.dump({"backend": "duckdb", "path": os.path.join(tmp, "nhl.duckdb")}, f)
+    cli = [
+        sys.executable,
+        CLI_PATH,
+        "--logfile",
+        os.path.join(tmp, "nhl_data_parser.log"),
+        "--db_cred_path",
+        db_cred_path,
+        "--validator_path",
+        os.path.join(tmp, "http_validators.json"),
+    ]
+
+    subprocess.run(cli + ["create_tables"], cwd=SRC_DIR, check=True)
+    yesterday = datetime.date.today() - datetime.timedelta(days=1)
+    subprocess.run(
+        [sys.executable, "-c", SEED_GAME, db_cred_path, yesterday.isoformat()],
+        cwd=SRC_DIR,
+        check=True,
+    )
+
+    return {
+        "create_tables --print_only": cli + ["create_tables", "--print_only"],
+        "create_tables": cli + ["create_tables"],
+        "update_database": cli + ["update_database"],
+    }
+
+
+def time_command(
+    cmd: list[str], runs: int, env: dict[str, str] | None = None
+) -> list[float]:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            cmd,
+            cwd=SRC_DIR,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            env=env,
+            check=True,
+        )
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(name: str, timings: list[float]):
+    print(
+        f"{name:<28} median {statistics.median(timings):8.1f} ms"
+        f"   min {min(timings):8.1f} ms   max {max(timings):8.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark NHL Data Parser startup")
+    parser.add_argument("--runs", type=int, default=20, help="Runs per command")
+    args = parser.parse_args()
+
+    report(
+        "python (no imports)", time_command([sys.executable, "-c", "pass"], args.runs)
+    )
+    report(
+        "eager imports",
+        time_command([sys.executable, "-c", EAGER_IMPORTS], args.runs),
+    )
+    for command in SUBCOMMANDS:
+        report(
+            command + " --help",
+            time_command([sys.executable, CLI_PATH, command, "--help"], args.runs),
+        )
+
+    server = StubServer(0, StubConfig(games_per_season=0))
+    server.start()
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, cmd in dispatch_commands(tmp).items():
+            report(name, time_command(cmd, args.runs, os.environ | server.env))
+    server.shutdown()
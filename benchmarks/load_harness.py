@@ -0,0 +1,236 @@
+import argparse
+import datetime
+import json
+import logging
+import multiprocessing
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+
+from nhl_api_stub import StubConfig, StubServer, season_start
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+# runs the scraper end to end against nhl_api_stub.py through the same entry
+# points as the cli: build_from_scratch over the simulated seasons, or
+# update_database from the first day of the first season up to yesterday on a
+# database seeded with that day. each scale runs in its own process so peak
+# memory is measured per scale
+
+
+# times every game the entry point starts and counts the errors it logs
+class GameLog(logging.Handler):
+    starts: list[float]
+    errors: int
+
+    def __init__(self):
+        super().__init__(logging.INFO)
+        self.starts = []
+        self.errors = 0
+
+    def emit(self, record: logging.LogRecord):
+        if record.levelno >= logging.ERROR:
+            self.errors += 1
+        elif record.getMessage().startswith("Processing game"):
+            self.starts.append(time.perf_counter())
+
+
+def season_dates(season: int, config: StubConfig) -> list[str]:
+    days = -(-config.games_per_season // config.games_per_day)
+    return [
+        (season_start(season) + datetime.timedelta(days=i)).isoformat()
+        for i in range(days)
+    ]
+
+
+def run_scale(
+    seasons: list[int],
+    entry_point: str,
+    db_cred_path: str | None,
+    config: StubConfig,
+    results,
+):
+    sys.path.insert(0, SRC_DIR)
+    from nhl_data_parser import NHLDataParser
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # the csv backup is staged in the working directory
+        os.chdir(tmp)
+        if db_cred_path is None:
+            db_cred_path = os.path.join(tmp, "creds.json")
+            with open(db_cred_path, "w") as f:
+                json.dump(
+                    {"backend": "duckdb", "path": os.path.join(tmp, "load.duckdb")}, f
+                )
+
+        nhl_parser = NHLDataParser(
+            os.path.join(tmp, "load.log"),
+            db_cred_path,
+            os.path.join(tmp, "http_validators.json"),
+        )
+        sql_file_path = os.path.join(
+            SRC_DIR,
+            (
+                "create_databases_duckdb.sql"
+                if nhl_parser.db.dialect == "duckdb"
+                else "create_databases.sql"
+            ),
+        )
+        first_date = season_dates(seasons[0], config)[0]
+        if entry_point == "update_database":
+            # update_database continues from the latest stored game
+            nhl_parser.build_db_from_scratch(
+                first_date, first_date, True, os.path.join(tmp, "seed"), sql_file_path
+            )
+
+        count_games = "SELECT COUNT(*) FROM nhl_api_data.json_pbp_game_info"
+        seeded = (
+            nhl_parser.db.get_query_result(count_games).item()
+            if entry_point == "update_database"
+            else 0
+        )
+        game_log = GameLog()
+        logging.getLogger().addHandler(game_log)
+        start = time.perf_counter()
+        if entry_point == "update_database":
+            nhl_parser.update_database(True)
+        else:
+            nhl_parser.build_db_from_scratch(
+                first_date,
+                season_dates(seasons[-1], config)[-1],
+                True,
+                os.path.join(tmp, "backup"),
+                sql_file_path,
+            )
+        elapsed = time.perf_counter() - start
+        logging.getLogger().removeHandler(game_log)
+
+        games = nhl_parser.db.get_query_result(count_games).item() - seeded
+        os.chdir(SRC_DIR)
+
+    results.put(
+        {
+            "games": games,
+            "errors": game_log.errors,
+            "elapsed": elapsed,
+            # time between consecutive games, the last one ends with the run
+            "latencies": [
+                (b - a) * 1000
+                for a, b in zip(
+                    game_log.starts, game_log.starts[1:] + [start + elapsed]
+                )
+            ],
+            # kilobytes on linux
+            "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        }
+    )
+
+
+def report(n_seasons: int, result: dict, requests: Counter):
+    latencies = sorted(result["latencies"])
+    if not latencies:
+        print(f"{n_seasons:>2} seasons   no games ingested")
+        return
+    p50 = statistics.median(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(
+        f"{n_seasons:>2} seasons   {result['games']:6d} games"
+        f"   {result['errors']:4d} errors"
+        f"   {result['games'] / result['elapsed']:7.2f} games/s"
+        f"   p50 {p50:8.1f} ms   p99 {p99:8.1f} ms"
+        f"   peak rss {result['peak_rss_mb']:8.1f} MB"
+        f"   {sum(requests.values()):7d} requests"
+        f" ({requests['/stats/rest/en/shiftcharts']} shift charts)"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Load test NHL Data Parser against a local NHL API stand-in"
+    )
+    parser.add_argument(
+        "--seasons",
+        type=int,
+        nargs="+",
+        default=[1, 5, 10],
+        help="Numbers of seasons to run, one run per value",
+    )
+    parser.add_argument(
+        "--entry_point",
+        choices=["update_database", "build_from_scratch"],
+        default="update_database",
+    )
+    parser.add_argument(
+        "--first_season",
+        type=int,
+        default=None,
+        help="First simulated season, by default the runs end with the last "
+        "season before the current one",
+    )
+    parser.add_argument("--games_per_season", type=int, default=1312)
+    parser.add_argument("--games_per_day", type=int, default=8)
+    parser.add_argument("--plays_per_period", type=int, default=100)
+    parser.add_argument(
+        "--latency_ms", type=float, default=0, help="Added to every stub response"
+    )
+    parser.add_argument(
+        "--error_rate", type=float, default=0, help="Share of responses that are 500s"
+    )
+    parser.add_argument(
+        "--throttle_rate",
+        type=float,
+        default=0,
+        help="Share of responses that are 429s",
+    )
+    parser.add_argument(
+        "--db_cred_path",
+        type=str,
+        default=None,
+        help="Database to load into, a temporary duckdb file by default",
+    )
+    args = parser.parse_args()
+
+    config = StubConfig(
+        games_per_season=args.games_per_season,
+        games_per_day=args.games_per_day,
+        plays_per_period=args.plays_per_period,
+        latency_ms=args.latency_ms,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        retry_after=0,
+    )
+    server = StubServer(0, config)
+    server.start()
+    # read by sub_parsers.fetcher when the scale process imports it
+    os.environ.update(server.env)
+
+    # update_database runs up to yesterday, so it also ingests the games of the
+    # current season played so far
+    yesterday = datetime.date.today() - datetime.timedelta(days=1)
+    current_season = yesterday.year if yesterday.month >= 7 else yesterday.year - 1
+
+    ctx = multiprocessing.get_context("spawn")
+    for n_seasons in args.seasons:
+        first_season = args.first_season or current_season - n_seasons
+        results = ctx.Queue()
+        server.requests.clear()
+        process = ctx.Process(
+            target=run_scale,
+            args=(
+                list(range(first_season, first_season + n_seasons)),
+                args.entry_point,
+                args.db_cred_path,
+                config,
+                results,
+            ),
+        )
+        process.start()
+        result = results.get()
+        process.join()
+        report(n_seasons, result, server.requests)
+
+    server.shutdown()
@@ -0,0 +1,467 @@
+import argparse
+import datetime
+import html
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# stand in for the nhl endpoints the scraper reads. responses are synthetic but
+# follow the real payloads' structure and are deterministic per game id, so the
+# same game always yields the same plays, shifts and report. point the scraper
+# at it with NHL_API_WEB_URL, NHL_STATS_API_URL and NHL_HTML_REPORTS_URL
+
+N_TEAMS = 32
+ROSTER_SIZE = 20
+# roster slot -> position, the last two slots are goalies
+POSITIONS = ["C"] * 4 + ["L"] * 4 + ["R"] * 4 + ["D"] * 6 + ["G"] * 2
+SHOT_TYPES = ["wrist", "slap", "snap", "backhand", "tip-in", "deflected"]
+PENALTY_REASONS = ["tripping", "hooking", "slashing", "holding", "interference"]
+PERIOD_SECONDS = 20 * 60
+
+# json event -> html event code
+HTML_EVENTS = {
+    "period-start": "PSTR",
+    "faceoff": "FAC",
+    "shot-on-goal": "SHOT",
+    "missed-shot": "MISS",
+    "blocked-shot": "BLOCK",
+    "hit": "HIT",
+    "giveaway": "GIVE",
+    "takeaway": "TAKE",
+    "goal": "GOAL",
+    "penalty": "PENL",
+    "stoppage": "STOP",
+    "period-end": "PEND",
+    "game-end": "GEND",
+}
+# weights of the events between faceoffs
+EVENT_WEIGHTS = {
+    "shot-on-goal": 30,
+    "missed-shot": 15,
+    "blocked-shot": 15,
+    "hit": 25,
+    "giveaway": 8,
+    "takeaway": 6,
+    "goal": 3,
+    "penalty": 4,
+}
+
+
+@dataclass
+class StubConfig:
+    games_per_season: int = 1312
+    games_per_day: int = 8
+    plays_per_period: int = 100
+    latency_ms: float = 0
+    # share of requests answered with a 500
+    error_rate: float = 0
+    # share of requests answered with a 429
+    throttle_rate: float = 0
+    retry_after: int = 1
+
+
+def season_start(season: int) -> datetime.date:
+    return datetime.date(season, 10, 10)
+
+
+# game ids scheduled on date, numbered like real regular season ids
+# (<season>02<nnnn>)
+def scheduled_game_ids(date: datetime.date, config: StubConfig) -> list[int]:
+    season = date.year if date.month >= 7 else date.year - 1
+    day = (date - season_start(season)).days
+    first = day * config.games_per_day
+    if day < 0 or first >= config.games_per_season:
+        return []
+    last = min(first + config.games_per_day, config.games_per_season)
+    return [season * 1000000 + 20000 + k + 1 for k in range(first, last)]
+
+
+def game_date(game_id: int, config: StubConfig) -> datetime.date:
+    k = game_id % 10000 - 1
+    return season_start(game_id // 1000000) + datetime.timedelta(
+        days=k // config.games_per_day
+    )
+
+
+def game_teams(game_id: int) -> tuple[int, int]:
+    k = game_id % 10000 - 1
+    away = k % N_TEAMS + 1
+    home = (k + 1 + (k // N_TEAMS) % (N_TEAMS - 1)) % N_TEAMS + 1
+    return away, home
+
+
+def team_abbrev(team_id: int) -> str:
+    return f"T{team_id:02d}"
+
+
+def roster(team_id: int) -> list[dict]:
+    return [
+        {
+            "teamId": team_id,
+            "playerId": 8000000 + team_id * 100 + slot,
+            "firstName": {"default": f"First{slot}"},
+            "lastName": {"default": f"Team{team_id}Player{slot}"},
+            "sweaterNumber": slot + 1,
+            "positionCode": position,
+        }
+        for slot, position in enumerate(POSITIONS)
+    ]
+
+
+def clock(seconds: int) -> str:
+    return f"{seconds // 60:02d}:{seconds % 60:02d}"
+
+
+def clock_seconds(clock: str) -> int:
+    minutes, seconds = clock.split(":")
+    return int(minutes) * 60 + int(seconds)
+
+
+# plays of a game as (json play, on-ice sweater numbers of away and home)
+def game_plays(game_id: int, config: StubConfig) -> list[tuple[dict, list, list]]:
+    rng = random.Random(game_id)
+    away, home = game_teams(game_id)
+    rosters = {away: roster(away), home: roster(home)}
+    ids = {t: [p["playerId"] for p in r] for t, r in rosters.items()}
+
+    plays = []
+
+    def add(period: int, elapsed: int, type_desc_key: str, details: dict | None):
+        skaters = {t: rng.sample(range(ROSTER_SIZE - 2), 5) for t in rosters}
+        play = {
+            "eventId": len(plays) + 1,
+            "periodDescriptor": {"number": period, "periodType": "REG"},
+            "timeInPeriod": clock(elapsed),
+            "timeRemaining": clock(PERIOD_SECONDS - elapsed),
+            "typeDescKey": type_desc_key,
+        }
+        if details is not None:
+            play["details"] = details
+        # the starting goalie of each team is on the ice throughout
+        plays.append(
+            (
+                play,
+                [s + 1 for s in skaters[away]] + [ROSTER_SIZE - 1],
+                [s + 1 for s in skaters[home]] + [ROSTER_SIZE - 1],
+            )
+        )
+
+    for period in range(1, 4):
+        elapsed = 0
+        add(period, 0, "period-start", None)
+        add(period, 0, "faceoff", faceoff(rng, ids, away, home))
+        for _ in range(config.plays_per_period):
+            elapsed = min(elapsed + rng.randint(1, 20), PERIOD_SECONDS - 1)
+            event = rng.choices(list(EVENT_WEIGHTS), list(EVENT_WEIGHTS.values()))[0]
+            owner = rng.choice([away, home])
+            add(period, elapsed, event, details(rng, event, owner, ids, away, home))
+            if event in ["goal", "penalty"] or rng.random() < 0.1:
+                add(period, elapsed, "stoppage", {"reason": "puck-frozen"})
+                add(period, elapsed, "faceoff", faceoff(rng, ids, away, home))
+        add(period, PERIOD_SECONDS, "period-end", None)
+    add(3, PERIOD_SECONDS, "game-end", None)
+    return plays
+
+
+def faceoff(rng: random.Random, ids: dict, away: int, home: int) -> dict:
+    return {
+        "eventOwnerTeamId": away,
+        "winningPlayerId": ids[away][rng.randrange(4)],
+        "losingPlayerId": ids[home][rng.randrange(4)],
+        "xCoord": 0,
+        "yCoord": 0,
+    }
+
+
+def details(
+    rng: random.Random, event: str, owner: int, ids: dict, away: int, home: int
+) -> dict:
+    other = home if owner == away else away
+    skater = lambda team: ids[team][rng.randrange(ROSTER_SIZE - 2)]
+    d = {
+        "eventOwnerTeamId": owner,
+        # each team attacks a different end
+        "xCoord": rng.randint(25, 99) * (1 if owner == home else -1),
+        "yCoord": rng.randint(-42, 42),
+    }
+    match event:
+        case "shot-on-goal" | "missed-shot":
+            d["shootingPlayerId"] = skater(owner)
+            d["goalieInNetId"] = ids[other][ROSTER_SIZE - 2]
+            d["shotType"] = rng.choice(SHOT_TYPES)
+        case "blocked-shot":
+            d["shootingPlayerId"] = skater(owner)
+            d["blockingPlayerId"] = skater(other)
+        case "hit":
+            d["hittingPlayerId"] = skater(owner)
+            d["hitteePlayerId"] = skater(other)
+        case "giveaway" | "takeaway":
+            d["playerId"] = skater(owner)
+        case "goal":
+            scorer, a1, a2 = rng.sample(ids[owner][: ROSTER_SIZE - 2], 3)
+            d["scoringPlayerId"] = scorer
+            d["assist1PlayerId"] = a1
+            d["assist2PlayerId"] = a2
+            d["goalieInNetId"] = ids[other][ROSTER_SIZE - 2]
+            d["shotType"] = rng.choice(SHOT_TYPES)
+        case "penalty":
+            d["committedByPlayerId"] = skater(owner)
+            d["drawnByPlayerId"] = skater(other)
+            d["duration"] = 2
+            d["reason"] = rng.choice(PENALTY_REASONS)
+    return d
+
+
+def schedule_payload(date: datetime.date, config: StubConfig) -> dict:
+    return {
+        "gameWeek": [
+            {
+                "date": date.isoformat(),
+                "games": [
+                    {
+                        "id": g,
+                        "gameType": 2,
+                        "gameState": "OFF",
+                        "gameScheduleState": "OK",
+                        "awayTeam": {"abbrev": team_abbrev(game_teams(g)[0])},
+                        "homeTeam": {"abbrev": team_abbrev(game_teams(g)[1])},
+                    }
+                    for g in scheduled_game_ids(date, config)
+                ],
+            }
+        ]
+    }
+
+
+def pbp_payload(game_id: int, config: StubConfig) -> dict:
+    away, home = game_teams(game_id)
+    plays = [p for p, _, _ in game_plays(game_id, config)]
+    score = {
+        t: sum(
+            p["typeDescKey"] == "goal" and p["details"]["eventOwnerTeamId"] == t
+            for p in plays
+        )
+        for t in [away, home]
+    }
+    team = lambda t: {
+        "id": t,
+        "abbrev": team_abbrev(t),
+        "commonName": {"default": f"Team {t}"},
+        "score": score[t],
+    }
+    return {
+        "id": game_id,
+        "season": (game_id // 1000000) * 10001 + 1,
+        "gameDate": game_date(game_id, config).isoformat(),
+        "gameType": 2,
+        "awayTeam": team(away),
+        "homeTeam": team(home),
+        "venue": {"default": f"Arena {home}"},
+        "venueLocation": {"default": f"City {home}"},
+        "summary": {
+            "gameInfo": {
+                "referees": [{"default": "Referee One"}, {"default": "Referee Two"}],
+                "linesmen": [{"default": "Linesman One"}, {"default": "Linesman Two"}],
+                "awayTeam": {"headCoach": {"default": f"Coach {away}"}},
+                "homeTeam": {"headCoach": {"default": f"Coach {home}"}},
+            }
+        },
+        "rosterSpots": roster(away) + roster(home),
+        "plays": plays,
+    }
+
+
+def shift_rows(game_id: int) -> list[dict]:
+    rng = random.Random(-game_id)
+    rows = []
+    for team in game_teams(game_id):
+        for player in roster(team):
+            goalie = player["positionCode"] == "G"
+            for period in range(1, 4):
+                start = 0
+                while start < PERIOD_SECONDS:
+                    if goalie:
+                        end = PERIOD_SECONDS
+                    else:
+                        start += rng.randint(60, 120)
+                        end = min(start + rng.randint(30, 60), PERIOD_SECONDS)
+                    if start >= PERIOD_SECONDS:
+                        break
+                    rows.append(
+                        {
+                            "id": len(rows) + 1,
+                            "gameId": game_id,
+                            "startTime": clock(start),
+                            "endTime": clock(end),
+                            "period": period,
+                            "duration": clock(end - start),
+                            "firstName": player["firstName"]["default"],
+                            "lastName": player["lastName"]["default"],
+                            "playerId": player["playerId"],
+                            "teamId": team,
+                            "teamAbbrev": team_abbrev(team),
+                        }
+                    )
+                    start = end
+    return rows
+
+
+# shift charts of every gameId=<id> term of the cayenne expression, one page of
+# limit rows from start
+def shift_chart_payload(cayenne_exp: str, start: int, limit: int | None) -> dict:
+    rows = [
+        row
+        for game_id in sorted(int(g) for g in re.findall(r"gameId=(\d+)", cayenne_exp))
+        for row in shift_rows(game_id)
+    ]
+    end = len(rows) if limit is None else start + limit
+    return {"data": rows[start:end], "total": len(rows)}
+
+
+def html_report(game_id: int, config: StubConfig) -> str:
+    rows = []
+    for n, (play, away_on_ice, home_on_ice) in enumerate(
+        game_plays(game_id, config), start=1
+    ):
+        elapsed = PERIOD_SECONDS - clock_seconds(play["timeRemaining"])
+        # number over position, as in the real reports
+        on_ice = lambda nums: "".join(
+            f"<table><tr><td>{num}</td></tr><tr><td>{POSITIONS[num - 1]}</td></tr>"
+            "</table>"
+            for num in nums
+        )
+        rows.append(
+            f'<tr class="{"even" if n % 2 == 0 else "odd"}Color">'
+            f"<td>{n}</td>"
+            f"<td>{play['periodDescriptor']['number']}</td>"
+            "<td>EV</td>"
+            f"<td>{elapsed // 60}:{elapsed % 60:02d}<br/>{play['timeRemaining']}</td>"
+            f"<td>{HTML_EVENTS[play['typeDescKey']]}</td>"
+            f"<td>{html.escape(play['typeDescKey'])}</td>"
+            f"<td>{on_ice(away_on_ice)}</td>"
+            f"<td>{on_ice(home_on_ice)}</td>"
+            "</tr>"
+        )
+    return (
+        '<html><body><table class="tablewidth">'
+        + "".join(rows)
+        + "</table></body></html>"
+    )
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        config = self.server.config
+        self.server.count(urlsplit(self.path).path)
+        if config.latency_ms:
+            time.sleep(config.latency_ms / 1000)
+
+        r = random.random()
+        if r < config.throttle_rate:
+            self.send_response(429)
+            self.send_header("Retry-After", str(config.retry_after))
+            self.end_headers()
+            return
+        if r < config.throttle_rate + config.error_rate:
+            self.send_error(500)
+            return
+
+        body, content_type = self.route(config)
+        if body is None:
+            self.send_error(404)
+            return
+
+        data = body.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def route(self, config: StubConfig) -> tuple[str | None, str]:
+        if m := re.fullmatch(r"/v1/schedule/(\d{4}-\d{2}-\d{2})", self.path):
+            date = datetime.date.fromisoformat(m.group(1))
+            return json.dumps(schedule_payload(date, config)), "application/json"
+        if m := re.fullmatch(r"/v1/gamecenter/(\d+)/play-by-play", self.path):
+            return json.dumps(pbp_payload(int(m.group(1)), config)), "application/json"
+        url = urlsplit(self.path)
+        if url.path == "/stats/rest/en/shiftcharts":
+            query = parse_qs(url.query)
+            limit = query.get("limit")
+            payload = shift_chart_payload(
+                query.get("cayenneExp", [""])[0],
+                int(query.get("start", ["0"])[0]),
+                None if limit is None else int(limit[0]),
+            )
+            return json.dumps(payload), "application/json"
+        if m := re.fullmatch(
+            r"/scores/htmlreports/(\d{4})\d{4}/PL(\d{6})\.HTM", self.path
+        ):
+            return html_report(int(m.group(1) + m.group(2)), config), "text/html"
+        return None, ""
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port: int, config: StubConfig):
+        super().__init__(("127.0.0.1", port), StubHandler)
+        self.config = config
+        # requests received per endpoint
+        self.requests = Counter()
+        self.requests_lock = threading.Lock()
+
+    def count(self, path: str):
+        endpoint = re.sub(r"\d+", "<n>", path)
+        with self.requests_lock:
+            self.requests[endpoint] += 1
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    # env vars pointing the scraper at this server
+    @property
+    def env(self) -> dict[str, str]:
+        return {
+            "NHL_API_WEB_URL": self.url,
+            "NHL_STATS_API_URL": self.url,
+            "NHL_HTML_REPORTS_URL": self.url,
+        }
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve synthetic NHL API responses")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--games_per_season", type=int, default=1312)
+    parser.add_argument("--games_per_day", type=int, default=8)
+    parser.add_argument("--latency_ms", type=float, default=0)
+    parser.add_argument("--error_rate", type=float, default=0)
+    parser.add_argument("--throttle_rate", type=float, default=0)
+    args = parser.parse_args()
+
+    server = StubServer(
+        args.port,
+        StubConfig(
+            games_per_season=args.games_per_season,
+            games_per_day=args.games_per_day,
+            latency_ms=args.latency_ms,
+            error_rate=args.error_rate,
+            throttle_rate=args.throttle_rate,
+        ),
+    )
+    for k, v in server.env.items():
+        print(f"export {k}={v}")
+    server.serve_forever()
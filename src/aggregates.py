@@ -0,0 +1,231 @@
+import logging
+
+import polars as pl
+
+from db_connector import DBConnector
+from reconcile import align_plays, clock_to_seconds
+from table_schemas import load_games
+
+logger = logging.getLogger(__name__)
+
+PLAYER_GAME_TABLE = "nhl_api_data.player_game_stats"
+TEAM_GAME_TABLE = "nhl_api_data.team_game_stats"
+
+# game ids per query when loading the source tables
+CHUNK_SIZE = 500
+
+PLAYER_STAT_COLUMNS = [
+    "goals",
+    "assists",
+    "shots",
+    "hits",
+    "blocks",
+    "pim",
+    "toi_seconds",
+]
+# html strength of the event owner, null for games without html plays
+STRENGTH_STAT_COLUMNS = ["pp_goals", "pp_assists", "sh_goals", "sh_assists"]
+
+
+# html strength ("EV", "PP", "SH") of every json play that has an html match
+def play_strength(html_plays: pl.DataFrame, json_plays: pl.DataFrame) -> pl.LazyFrame:
+    if html_plays.is_empty() or json_plays.is_empty():
+        return pl.LazyFrame(
+            schema={"game_id": pl.Int32, "n": pl.Int16, "strength": pl.String}
+        )
+
+    mapping = align_plays(html_plays, json_plays)
+    return (
+        mapping.lazy()
+        .join(
+            html_plays.lazy().select(
+                pl.col("game_id").cast(pl.Int32),
+                pl.col("n").cast(pl.Int16).alias("html_n"),
+                "strength",
+            ),
+            on=["game_id", "html_n"],
+        )
+        .select("game_id", pl.col("json_n").alias("n"), "strength")
+    )
+
+
+# one row per player dressed in each game of players (json_pbp_player_info).
+# shootout attempts are not counted as goals or shots
+def player_game_stats(
+    plays: pl.LazyFrame,
+    shifts: pl.LazyFrame,
+    players: pl.LazyFrame,
+    strength: pl.LazyFrame,
+) -> pl.LazyFrame:
+    plays = (
+        plays.filter(pl.col("period_type").cast(pl.String) != "SO")
+        .with_columns(
+            pl.col("game_id").cast(pl.Int32),
+            pl.col("n").cast(pl.Int16),
+            pl.col("event_type").cast(pl.String),
+        )
+        .join(strength, on=["game_id", "n"], how="left")
+    )
+    # games with any aligned play report strength, the others get nulls
+    aligned_games = (
+        strength.select("game_id").unique().with_columns(pl.lit(True).alias("aligned"))
+    )
+
+    def credit(event_types: list[str], player_col: str, **stats: pl.Expr):
+        return (
+            plays.filter(
+                pl.col("event_type").is_in(event_types)
+                & pl.col(player_col).is_not_null()
+            )
+            .group_by("game_id", pl.col(player_col).cast(pl.Int32).alias("player_id"))
+            .agg(**stats)
+        )
+
+    def is_strength(s: str) -> pl.Expr:
+        return (pl.col("strength") == s).sum()
+
+    goals = credit(
+        ["goal"],
+        "p1",
+        goals=pl.len(),
+        pp_goals=is_strength("PP"),
+        sh_goals=is_strength("SH"),
+    )
+    assists = (
+        pl.concat(
+            [
+                credit(
+                    ["goal"],
+                    col,
+                    assists=pl.len(),
+                    pp_assists=is_strength("PP"),
+                    sh_assists=is_strength("SH"),
+                )
+                for col in ["p2", "p3"]
+            ]
+        )
+        .group_by("game_id", "player_id")
+        .agg(pl.all().sum())
+    )
+    shots = credit(["shot-on-goal", "goal"], "p1", shots=pl.len())
+    hits = credit(["hit"], "p1", hits=pl.len())
+    # the blocking player is p2 of a blocked shot
+    blocks = credit(["blocked-shot"], "p2", blocks=pl.len())
+    pim = credit(["penalty"], "p1", pim=pl.col("penalty_duration").sum())
+
+    toi = shifts.group_by(
+        pl.col("game_id").cast(pl.Int32), pl.col("player_id").cast(pl.Int32)
+    ).agg(
+        toi_seconds=(clock_to_seconds("end_time") - clock_to_seconds("start_time"))
+        .clip(lower_bound=0)
+        .sum()
+    )
+
+    stats = players.select(
+        pl.col("game_id").cast(pl.Int32),
+        pl.col("id").cast(pl.Int32).alias("player_id"),
+        pl.col("team_id").cast(pl.Int16),
+    )
+    for df in [goals, assists, shots, hits, blocks, pim, toi]:
+        stats = stats.join(df, on=["game_id", "player_id"], how="left")
+
+    return (
+        stats.join(aligned_games, on="game_id", how="left")
+        .with_columns(
+            pl.col(PLAYER_STAT_COLUMNS).fill_null(0).cast(pl.Int16),
+            *[
+                pl.when(pl.col("aligned"))
+                .then(pl.col(c).fill_null(0))
+                .cast(pl.Int16)
+                .alias(c)
+                for c in STRENGTH_STAT_COLUMNS
+            ],
+        )
+        .select(
+            "game_id",
+            "player_id",
+            "team_id",
+            *PLAYER_STAT_COLUMNS,
+            *STRENGTH_STAT_COLUMNS,
+        )
+    )
+
+
+# player_game_stats summed per team, with the opponent's goals and shots
+def team_game_stats(player_stats: pl.LazyFrame) -> pl.LazyFrame:
+    teams = player_stats.group_by("game_id", "team_id").agg(
+        pl.col("goals", "shots", "hits", "blocks", "pim").sum(),
+        # null when the game has no strength information
+        *[
+            pl.when(pl.col(c).is_not_null().any()).then(pl.col(c).sum()).alias(c)
+            for c in ["pp_goals", "sh_goals"]
+        ],
+    )
+    return (
+        teams.with_columns(
+            goals_against=pl.col("goals").sum().over("game_id") - pl.col("goals"),
+            shots_against=pl.col("shots").sum().over("game_id") - pl.col("shots"),
+        )
+        .with_columns(pl.exclude("game_id", "team_id").cast(pl.Int16))
+        .sort("game_id", "team_id")
+    )
+
+
+# recomputes the aggregates of game_ids, or of every stored game that has none
+# yet when game_ids is None. returns the number of games updated
+def update_aggregates(db: DBConnector, game_ids: list[int] | None = None) -> int:
+    if game_ids is None:
+        game_ids = (
+            db.get_query_result(
+                "SELECT game_id FROM nhl_api_data.json_pbp_game_info "
+                f"WHERE game_id NOT IN (SELECT game_id FROM {PLAYER_GAME_TABLE})"
+            )
+            .to_series()
+            .to_list()
+        )
+    game_ids = sorted(game_ids)
+
+    for i in range(0, len(game_ids), CHUNK_SIZE):
+        chunk = game_ids[i : i + CHUNK_SIZE]
+        json_plays = load_games(
+            db,
+            "game_id, n, event_type, period, period_type, time_in_period, p1, p2, p3, "
+            "penalty_duration",
+            "nhl_api_data.json_pbp_plays",
+            chunk,
+        )
+        html_plays = load_games(
+            db,
+            "game_id, n, period, time_elapsed, event, strength",
+            "nhl_api_data.html_pbp_plays",
+            chunk,
+        )
+        player_stats = player_game_stats(
+            json_plays.lazy(),
+            load_games(
+                db,
+                "game_id, player_id, start_time, end_time",
+                "nhl_api_data.json_shift_info",
+                chunk,
+            ).lazy(),
+            load_games(
+                db,
+                "game_id, id, team_id",
+                "nhl_api_data.json_pbp_player_info",
+                chunk,
+            ).lazy(),
+            play_strength(html_plays, json_plays),
+        ).collect()
+        team_stats = team_game_stats(player_stats.lazy()).collect()
+
+        ids = ",".join(str(g) for g in chunk)
+        with db.transaction():
+            for table_name, df in [
+                (PLAYER_GAME_TABLE, player_stats),
+                (TEAM_GAME_TABLE, team_stats),
+            ]:
+                db.execute(f"DELETE FROM {table_name} WHERE game_id IN ({ids})")
+                db.push_dataframe_to_db(df, table_name)
+        logger.info(f"Updated aggregates of {len(chunk)} games")
+
+    return len(game_ids)
@@ -0,0 +1,6 @@
+create database if not exists nhl_api_data;
+create database if not exists xg;
+create database if not exists win_model;
+
+-- the tables are created from src/table_schemas.py and bulk loaded from the
+-- csv backup by build_from_csv_backup
@@ -0,0 +1,6 @@
+create schema if not exists nhl_api_data;
+create schema if not exists xg;
+create schema if not exists win_model;
+
+-- the tables are created from src/table_schemas.py and bulk loaded from the
+-- csv backup by build_from_csv_backup
@@ -0,0 +1,64 @@
+import datetime
+import json
+import threading
+from dataclasses import asdict, dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def now() -> str:
+    return datetime.datetime.now().isoformat(timespec="seconds")
+
+
+# state of the ingest daemon, reported by the health endpoint
+@dataclass
+class DaemonStatus:
+    started_at: str
+    runs: int = 0
+    failed_runs: int = 0
+    running: bool = False
+    last_run_started_at: str | None = None
+    last_run_finished_at: str | None = None
+    last_run_seconds: float | None = None
+    # repr of the exception of the last run, None when it succeeded
+    last_error: str | None = None
+    next_run_at: str | None = None
+
+    @property
+    def healthy(self) -> bool:
+        return self.last_error is None
+
+    def to_json(self) -> bytes:
+        return json.dumps({"healthy": self.healthy, **asdict(self)}).encode()
+
+
+class HealthHandler(BaseHTTPRequestHandler):
+    # 200 with the status while the last run succeeded, 503 after a failed one
+    def do_GET(self):
+        if self.path not in ["/health", "/status"]:
+            self.send_error(404)
+            return
+
+        status = self.server.status
+        body = status.to_json()
+        self.send_response(200 if status.healthy else 503)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# serves the daemon status on http://127.0.0.1:<port>/health from a background
+# thread
+class HealthServer(ThreadingHTTPServer):
+    daemon_threads = True
+    status: DaemonStatus
+
+    def __init__(self, port: int, status: DaemonStatus):
+        super().__init__(("127.0.0.1", port), HealthHandler)
+        self.status = status
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
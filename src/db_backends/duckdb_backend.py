@@ -0,0 +1,105 @@
+import logging
+from typing import Iterator
+
+import duckdb
+import polars as pl
+
+logger = logging.getLogger(__name__)
+
+
+# embedded columnar backend, frames are exchanged with duckdb through arrow
+# without copying. statements may use mysql style %s placeholders and
+# nhl_api_data.<table> names so queries work unchanged on both backends
+class DuckDBBackend:
+    dialect = "duckdb"
+
+    def __init__(self, database_creds: dict):
+        self.con = duckdb.connect(database_creds.get("path", "./nhl_api_data.duckdb"))
+        self.con.execute("CREATE SCHEMA IF NOT EXISTS nhl_api_data")
+        # mirrors mysql's autocommit being off, changes land on commit()
+        self.con.begin()
+
+    def execute_sql_file(self, sql_file_path: str):
+        with open(sql_file_path, "r") as sql_file:
+            sql_script = sql_file.read()
+
+        for statement in sql_script.split(";"):
+            if statement.strip():
+                # committed per statement so a failing one doesn't undo the rest
+                try:
+                    self.con.execute(statement)
+                    self.commit()
+                except duckdb.Error as err:
+                    logger.error(
+                        f"Error executing SQL statement: {statement.strip()[:100]}... - DuckDB Error: {err}"
+                    )
+                    self.rollback()
+
+    def execute(self, statement: str, params: tuple | None = None) -> int:
+        res = self.con.execute(statement.replace("%s", "?"), params)
+        # inserts, updates and deletes answer with a single Count row
+        if res.description is None or res.description[0][0] != "Count":
+            return 0
+        row = res.fetchone()
+        return 0 if row is None else row[0]
+
+    def get_query_result(self, query: str, params: tuple | None = None) -> pl.DataFrame:
+        res = self.con.execute(query.replace("%s", "?"), params)
+        if res.description is None:
+            return pl.DataFrame()
+        return res.pl()
+
+    # record batches are pulled from the streaming result as they're needed
+    def iter_query_batches(
+        self, query: str, params: tuple | None, batch_size: int
+    ) -> Iterator[pl.DataFrame]:
+        reader = self.con.execute(query.replace("%s", "?"), params).fetch_record_batch(
+            batch_size
+        )
+        for batch in reader:
+            yield pl.from_arrow(batch)
+
+    def push_dataframe_to_db(self, df: pl.DataFrame, table_name: str):
+        columns = ",".join(df.columns)
+        self.con.register("_push_df", df)
+        try:
+            self.con.execute(
+                f"INSERT INTO {table_name} ({columns}) SELECT {columns} FROM _push_df"
+            )
+        finally:
+            self.con.unregister("_push_df")
+
+    # loads a csv written by polars straight into the table. quoted empty
+    # fields stay empty strings and unquoted ones become NULL, as polars writes
+    # and reads them. columns of the table missing from the csv are left NULL
+    def load_csv(self, csv_path: str, table_name: str, columns: list) -> int:
+        from table_schemas import sql_type
+
+        types = ", ".join(
+            f"'{c.name}': '"
+            + (
+                "VARCHAR"
+                if c.dtype == pl.String or isinstance(c.dtype, pl.Enum)
+                else sql_type(c, self.dialect)
+            )
+            + "'"
+            for c in columns
+        )
+        names = ", ".join(c.name for c in columns)
+        return self.execute(
+            f"INSERT INTO {table_name} BY NAME SELECT {names} FROM read_csv(%s, "
+            f"header = true, allow_quoted_nulls = false, types = {{{types}}})",
+            (csv_path,),
+        )
+
+    # embedded, so there is no server connection that could have gone stale
+    def ping(self):
+        self.con.execute("SELECT 1")
+
+    def commit(self):
+        self.con.commit()
+        self.con.begin()
+
+    def rollback(self):
+        self.con.rollback()
+        self.con.begin()
@@ -0,0 +1,143 @@
+import logging
+import os
+import tempfile
+from typing import Iterator
+
+import mysql.connector
+import polars as pl
+
+logger = logging.getLogger(__name__)
+
+# rows per multi-row insert, keeps statements below max_allowed_packet
+INSERT_BATCH_SIZE = 5000
+
+
+class MySQLBackend:
+    dialect = "mysql"
+
+    def __init__(self, database_creds: dict):
+        try:
+            self.mydb = mysql.connector.connect(
+                host=database_creds["host"],
+                user=database_creds["user"],
+                password=database_creds["password"],
+                port=database_creds["port"],
+                allow_local_infile=True,
+            )
+        except mysql.connector.Error as err:
+            logger.error("Database connection error")
+            raise err
+
+    def execute_sql_file(self, sql_file_path: str):
+        mycursor = self.mydb.cursor()
+
+        # Execute the SQL file to set up the database and loading tables
+        with open(sql_file_path, "r") as sql_file:
+            sql_script = sql_file.read()
+
+        for statement in sql_script.split(";"):
+            if statement.strip():
+                try:
+                    mycursor.execute(statement)
+                except mysql.connector.Error as err:
+                    logger.error(
+                        f"Error executing SQL statement: {statement.strip()[:100]}... - MySQL Error: {err}"
+                    )
+
+        self.mydb.commit()
+        mycursor.close()
+
+    def execute(self, statement: str, params: tuple | None = None) -> int:
+        cursor = self.mydb.cursor()
+        cursor.execute(statement, params)
+        rowcount = cursor.rowcount
+        cursor.close()
+        return rowcount
+
+    def get_query_result(self, query: str, params: tuple | None = None) -> pl.DataFrame:
+        db_cursor = self.mydb.cursor()
+        db_cursor.execute(query, params)
+
+        rows = db_cursor.fetchall()
+        if db_cursor.description is not None:
+            columns = [desc[0] for desc in db_cursor.description]
+            df = pl.DataFrame(rows, schema=columns, orient="row")
+        else:
+            df = pl.DataFrame()
+        db_cursor.close()
+        return df
+
+    # the default cursor is unbuffered, fetchmany reads rows off the socket as
+    # they're needed
+    def iter_query_batches(
+        self, query: str, params: tuple | None, batch_size: int
+    ) -> Iterator[pl.DataFrame]:
+        db_cursor = self.mydb.cursor()
+        try:
+            db_cursor.execute(query, params)
+            columns = [desc[0] for desc in db_cursor.description]
+            while rows := db_cursor.fetchmany(batch_size):
+                yield pl.DataFrame(rows, schema=columns, orient="row")
+        finally:
+            # rows left unread by an early stop would block the connection
+            if self.mydb.unread_result:
+                self.mydb.consume_results()
+            db_cursor.close()
+
+    def push_dataframe_to_db(self, df: pl.DataFrame, table_name: str):
+        cursor = self.mydb.cursor()
+        columns = df.columns
+        placeholders = ",".join(["%s"] * len(columns))
+        insert_sql = (
+            f"INSERT INTO {table_name} ({','.join(columns)}) VALUES ({placeholders})"
+        )
+        # executemany sends the rows as multi-row inserts instead of one
+        # statement per row
+        for batch in df.iter_slices(INSERT_BATCH_SIZE):
+            cursor.executemany(insert_sql, batch.rows())
+        cursor.close()
+
+    # loads a csv written by polars with LOAD DATA LOCAL INFILE. mysql reads both
+    # an empty field and a quoted empty string as '', so the csv is rewritten
+    # with nulls spelled as an unquoted NULL and every string quoted, which
+    # keeps NULL and '' apart the way polars read_csv does. columns of the
+    # table missing from the csv are left NULL
+    def load_csv(self, csv_path: str, table_name: str, columns: list) -> int:
+        df = pl.read_csv(
+            csv_path,
+            columns=[c.name for c in columns],
+            schema_overrides={c.name: c.dtype for c in columns},
+        ).with_columns(pl.col(pl.Boolean).cast(pl.Int8))
+
+        fd, tmp_path = tempfile.mkstemp(suffix=".csv")
+        os.close(fd)
+        cursor = self.mydb.cursor()
+        try:
+            df.write_csv(
+                tmp_path,
+                quote_style="non_numeric",
+                null_value="NULL",
+                datetime_format="%Y-%m-%d %H:%M:%S",
+            )
+            cursor.execute(
+                f"LOAD DATA LOCAL INFILE %s INTO TABLE {table_name} "
+                "CHARACTER SET utf8mb4 "
+                "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' ESCAPED BY '' "
+                "LINES TERMINATED BY '\\n' IGNORE 1 LINES "
+                f"({','.join(df.columns)})",
+                (tmp_path,),
+            )
+            return cursor.rowcount
+        finally:
+            cursor.close()
+            os.remove(tmp_path)
+
+    # reconnects when the server dropped the connection (e.g. wait_timeout)
+    def ping(self):
+        self.mydb.ping(reconnect=True, attempts=3, delay=2)
+
+    def commit(self):
+        self.mydb.commit()
+
+    def rollback(self):
+        self.mydb.rollback()
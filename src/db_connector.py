@@ -1,60 +1,74 @@
 import json
 import logging
+from contextlib import contextmanager
+from typing import Iterator
 
-import mysql.connector
 import polars as pl
 
 logger = logging.getLogger(__name__)
 
+# rows per frame yielded by iter_query_batches
+QUERY_BATCH_SIZE = 65536
 
+
+# the "backend" key of the credential file picks the storage engine:
+#   mysql (default): {"host": ..., "user": ..., "password": ..., "port": ...}
+#   duckdb: {"backend": "duckdb", "path": "./nhl_api_data.duckdb"}
 class DBConnector:
+    # set inside transaction(), pushes then leave committing to the transaction
+    in_transaction: bool
+
     def __init__(self, db_config_path: str):
+        self.in_transaction = False
+
         with open(db_config_path, "r") as f:
             database_creds = json.load(f)
 
-        try:
-            self.mydb = mysql.connector.connect(
-                host=database_creds["host"],
-                user=database_creds["user"],
-                password=database_creds["password"],
-                port=database_creds["port"],
-                allow_local_infile=True,
-            )
-        except mysql.connector.Error as err:
-            logger.error("Database connection error")
-            raise err
+        # backends are imported on demand so only the chosen driver is needed
+        match database_creds.get("backend", "mysql"):
+            case "mysql":
+                from db_backends.mysql_backend import MySQLBackend
+
+                self.backend = MySQLBackend(database_creds)
+            case "duckdb":
+                from db_backends.duckdb_backend import DuckDBBackend
+
+                self.backend = DuckDBBackend(database_creds)
+            case backend:
+                raise ValueError(backend + " is not a valid database backend")
+
+    @property
+    def dialect(self) -> str:
+        return self.backend.dialect
+
+    # raw mysql connection, only available on the mysql backend
+    @property
+    def mydb(self):
+        if self.dialect != "mysql":
+            raise RuntimeError(f"{self.dialect} backend has no mysql connection")
+        return self.backend.mydb
 
     def execute_sql_file(self, sql_file_path: str):
-        mycursor = self.mydb.cursor()
-
-        # Execute the SQL file to set up the database and loading tables
-        with open(sql_file_path, "r") as sql_file:
-            sql_script = sql_file.read()
-
-        for statement in sql_script.split(";"):
-            if statement.strip():
-                try:
-                    mycursor.execute(statement)
-                except mysql.connector.Error as err:
-                    logger.error(
-                        f"Error executing SQL statement: {statement.strip()[:100]}... - MySQL Error: {err}"
-                    )
-
-        self.mydb.commit()
-        mycursor.close()
-
-    def get_query_result(self, query: str) -> pl.DataFrame:
-        db_cursor = self.mydb.cursor()
-        db_cursor.execute(query)
-
-        rows = db_cursor.fetchall()
-        if db_cursor.description is not None:
-            columns = [desc[0] for desc in db_cursor.description]
-            df = pl.DataFrame(rows, schema=columns)
-        else:
-            df = pl.DataFrame()
-        db_cursor.close()
-        return df
+        self.backend.execute_sql_file(sql_file_path)
+
+    # executes a statement without committing, placeholders are written as %s.
+    # returns the number of rows inserted, updated or deleted
+    def execute(self, statement: str, params: tuple | None = None) -> int:
+        return self.backend.execute(statement, params)
+
+    def get_query_result(self, query: str, params: tuple | None = None) -> pl.DataFrame:
+        return self.backend.get_query_result(query, params)
+
+    # result of a query as frames of up to batch_size rows, read from the
+    # database as they're consumed instead of all at once. the connection can't
+    # run other statements until the iterator is exhausted or closed
+    def iter_query_batches(
+        self,
+        query: str,
+        params: tuple | None = None,
+        batch_size: int = QUERY_BATCH_SIZE,
+    ) -> Iterator[pl.DataFrame]:
+        return self.backend.iter_query_batches(query, params, batch_size)
 
     def load_parquet_to_mysql(self, parquet_path: str, table_name: str):
         # Read Parquet file
@@ -66,18 +80,52 @@ class DBConnector:
 
         self.push_dataframe_to_db(df, table_name)
 
+    # removes a game's rows from a table, the delete isn't committed so it lands
+    # in the same transaction as the following push_dataframe_to_db
+    def delete_game(self, table_name: str, game_id: int):
+        self.execute(f"DELETE FROM {table_name} WHERE game_id = %s", (game_id,))
+
+    # checks the connection is alive and reconnects if needed. uncommitted work is
+    # lost on a reconnect, so only ping between transactions
+    def ping(self):
+        self.backend.ping()
+
+    def commit(self):
+        self.backend.commit()
+
+    # everything pushed or executed inside the block is committed together or
+    # rolled back if the block raises
+    @contextmanager
+    def transaction(self):
+        self.in_transaction = True
+        try:
+            yield
+        except Exception:
+            self.in_transaction = False
+            self.rollback()
+            raise
+        self.in_transaction = False
+        self.commit()
+
+    def rollback(self):
+        self.backend.rollback()
+
+    # bulk loads a csv written by polars (e.g. a table of the csv backup) into a
+    # registry table with the backend's native loader. csv columns the table
+    # doesn't have are skipped. returns the number of rows loaded
+    def load_csv(self, csv_path: str, table) -> int:
+        header = pl.read_csv(csv_path, n_rows=0).columns
+        columns = [c for c in table.columns if c.name in header]
+        rows = self.backend.load_csv(csv_path, table.qualified_name, columns)
+        if not self.in_transaction:
+            self.commit()
+        return rows
+
     def push_dataframe_to_db(self, df: pl.DataFrame, table_name: str):
         if df.is_empty():
             logger.warning(f"DataFrame is empty. Nothing to insert into {table_name}")
-            return
+        else:
+            self.backend.push_dataframe_to_db(df, table_name)
 
-        cursor = self.mydb.cursor()
-        columns = df.columns
-        placeholders = ",".join(["%s"] * len(columns))
-        insert_sql = (
-            f"INSERT INTO {table_name} ({','.join(columns)}) VALUES ({placeholders})"
-        )
-        for row in df.iter_rows():
-            cursor.execute(insert_sql, row)
-        self.mydb.commit()
-        cursor.close()
+        if not self.in_transaction:
+            self.commit()
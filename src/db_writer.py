@@ -0,0 +1,119 @@
+import logging
+import queue
+import threading
+from dataclasses import dataclass
+
+import polars as pl
+
+from db_connector import DBConnector
+
+logger = logging.getLogger(__name__)
+
+# games written per group commit
+BATCH_SIZE = 16
+# parsed games waiting to be written before submit blocks
+QUEUE_SIZE = 32
+
+
+@dataclass
+class WriteResult:
+    game_id: int
+    frames: dict[str, pl.DataFrame]
+    # fetcher validators of the game's payloads, to commit once it's stored
+    validators: dict
+    # None when the game was written
+    error: Exception | None
+
+
+# writes parsed games on a background thread with its own connection so fetching
+# and parsing the next games overlaps with database writes. games waiting in the
+# queue are written together, replacing their rows table by table in a single
+# transaction. a failing group is retried one game per transaction so a single
+# bad game doesn't fail the others. results are picked up with completed() on
+# the submitting thread
+class DBWriter:
+    db: DBConnector
+    batch_size: int
+
+    # db must be a connection of its own, not used by other threads
+    def __init__(
+        self,
+        db: DBConnector,
+        batch_size: int = BATCH_SIZE,
+        queue_size: int = QUEUE_SIZE,
+    ):
+        self.db = db
+        self.batch_size = batch_size
+        self.pending = queue.Queue(maxsize=queue_size)
+        self.results = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self.thread.start()
+
+    # queues frames keyed by table for writing, blocks while the queue is full
+    def submit(self, game_id: int, frames: dict[str, pl.DataFrame], validators: dict):
+        self.pending.put((game_id, frames, validators))
+
+    # results of the writes finished since the last call
+    def completed(self) -> list[WriteResult]:
+        results = []
+        while True:
+            try:
+                results.append(self.results.get_nowait())
+            except queue.Empty:
+                return results
+
+    # writes everything still queued and stops the thread, returns the remaining
+    # results
+    def close(self) -> list[WriteResult]:
+        self.pending.put(None)
+        self.thread.join()
+        return self.completed()
+
+    def _run(self):
+        while True:
+            batch = [self.pending.get()]
+            while batch[-1] is not None and len(batch) < self.batch_size:
+                try:
+                    batch.append(self.pending.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = batch[-1] is None
+            if stop:
+                batch.pop()
+            if batch:
+                self._write(batch)
+            if stop:
+                return
+
+    def _write(self, batch: list[tuple]):
+        errors = {}
+        try:
+            self._write_group(batch)
+            logger.info(f"Wrote {len(batch)} games in one commit")
+        except Exception as err:
+            logger.warning(
+                f"Group commit of {len(batch)} games failed, writing them one by "
+                f"one: {err!r}"
+            )
+            for item in batch:
+                try:
+                    self._write_group([item])
+                except Exception as game_err:
+                    errors[item[0]] = game_err
+
+        for game_id, frames, validators in batch:
+            self.results.put(
+                WriteResult(game_id, frames, validators, errors.get(game_id))
+            )
+
+    def _write_group(self, batch: list[tuple]):
+        tables = {}
+        with self.db.transaction():
+            for game_id, frames, _ in batch:
+                for table_name, df in frames.items():
+                    self.db.delete_game(table_name, game_id)
+                    tables.setdefault(table_name, []).append(df)
+
+            for table_name, dfs in tables.items():
+                self.db.push_dataframe_to_db(pl.concat(dfs, how="vertical"), table_name)
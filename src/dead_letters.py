@@ -0,0 +1,89 @@
+import datetime
+import logging
+import traceback
+
+import polars as pl
+
+from db_connector import DBConnector
+
+logger = logging.getLogger(__name__)
+
+FAILURES_TABLE = "nhl_api_data.ingest_failures"
+
+
+# records games that failed to parse or write so they can be retried without
+# re-running whole date ranges. a game has at most one row per source, retries
+# bump its attempt count and a successful ingest clears all of the game's rows
+class DeadLetterQueue:
+    db: DBConnector
+    failed_game_ids: set[int] | None
+
+    def __init__(self, db: DBConnector):
+        self.db = db
+        self.failed_game_ids = None
+
+    def _load(self) -> set[int]:
+        if self.failed_game_ids is None:
+            self.failed_game_ids = set(
+                self.db.get_query_result(
+                    f"SELECT DISTINCT game_id FROM {FAILURES_TABLE}"
+                )
+                .to_series()
+                .to_list()
+            )
+        return self.failed_game_ids
+
+    def record(
+        self,
+        game_id: int,
+        source: str,
+        stage: str,
+        err: Exception,
+        payload_url: str | None,
+    ):
+        attempts = self.db.get_query_result(
+            f"SELECT attempts FROM {FAILURES_TABLE} WHERE game_id = %s AND source = %s",
+            (game_id, source),
+        )
+        with self.db.transaction():
+            self.db.execute(
+                f"DELETE FROM {FAILURES_TABLE} WHERE game_id = %s AND source = %s",
+                (game_id, source),
+            )
+            self.db.push_dataframe_to_db(
+                pl.DataFrame(
+                    {
+                        "game_id": [game_id],
+                        "source": [source],
+                        "stage": [stage],
+                        "exception": ["".join(traceback.format_exception(err)).strip()],
+                        "payload_url": [payload_url],
+                        "attempts": [
+                            attempts[0, 0] + 1 if not attempts.is_empty() else 1
+                        ],
+                        "failed_at": [datetime.datetime.now()],
+                    }
+                ),
+                FAILURES_TABLE,
+            )
+        self._load().add(game_id)
+
+    def resolve(self, game_id: int):
+        if game_id not in self._load():
+            return
+        with self.db.transaction():
+            self.db.delete_game(FAILURES_TABLE, game_id)
+        self.failed_game_ids.discard(game_id)
+
+    # game ids with failures, skipping those that already used up max_attempts
+    def pending(self, max_attempts: int | None = None) -> list[int]:
+        query = f"SELECT DISTINCT game_id FROM {FAILURES_TABLE}"
+        params = None
+        if max_attempts is not None:
+            query += " WHERE attempts < %s"
+            params = (max_attempts,)
+        return (
+            self.db.get_query_result(query + " ORDER BY game_id", params)
+            .to_series()
+            .to_list()
+        )
@@ -0,0 +1,66 @@
+import datetime
+import logging
+
+import polars as pl
+
+from db_connector import DBConnector
+
+logger = logging.getLogger(__name__)
+
+DEFERRED_TABLE = "nhl_api_data.deferred_games"
+
+
+# games that were scheduled but not final yet when their date was scraped (in
+# progress around midnight, delayed, ...). update_database rescans from the
+# earliest deferred date so these get ingested once they are over
+class DeferredGames:
+    db: DBConnector
+    games: dict[int, datetime.date] | None
+
+    def __init__(self, db: DBConnector):
+        self.db = db
+        self.games = None
+
+    def _load(self) -> dict[int, datetime.date]:
+        if self.games is None:
+            self.games = dict(
+                self.db.get_query_result(
+                    f"SELECT game_id, date FROM {DEFERRED_TABLE}"
+                ).iter_rows()
+            )
+        return self.games
+
+    def earliest_date(self) -> datetime.date | None:
+        return min(self._load().values(), default=None)
+
+    def on_date(self, date: datetime.date) -> set[int]:
+        return {g for g, d in self._load().items() if d == date}
+
+    def defer(self, game_id: int, date: datetime.date, game_state: str):
+        if self._load().get(game_id) == date:
+            return
+        with self.db.transaction():
+            self.db.execute(
+                f"DELETE FROM {DEFERRED_TABLE} WHERE game_id = %s", (game_id,)
+            )
+            self.db.push_dataframe_to_db(
+                pl.DataFrame(
+                    {
+                        "game_id": [game_id],
+                        "date": [date],
+                        "game_state": [game_state],
+                        "deferred_at": [datetime.datetime.now()],
+                    }
+                ),
+                DEFERRED_TABLE,
+            )
+        self.games[game_id] = date
+
+    def resolve(self, game_id: int):
+        if game_id not in self._load():
+            return
+        with self.db.transaction():
+            self.db.execute(
+                f"DELETE FROM {DEFERRED_TABLE} WHERE game_id = %s", (game_id,)
+            )
+        del self.games[game_id]
@@ -0,0 +1,188 @@
+import logging
+from dataclasses import dataclass
+
+import polars as pl
+
+from db_connector import DBConnector
+from table_schemas import DATABASE, GAME_INFO_TABLE, NORMALIZED_DROP_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+PLAYER_INFO_TABLE = "nhl_api_data.json_pbp_player_info"
+PLAYERS_TABLE = "nhl_api_data.players"
+TEAMS_TABLE = "nhl_api_data.teams"
+PLAYER_HISTORY_TABLE = "nhl_api_data.player_history"
+
+
+# frames keyed by qualified table name without the columns that live in the
+# dimension tables, see NORMALIZED_DROP_COLUMNS
+def normalize_frames(frames: dict[str, pl.DataFrame]) -> dict[str, pl.DataFrame]:
+    return {
+        table_name: df.drop(
+            NORMALIZED_DROP_COLUMNS.get(table_name.removeprefix(DATABASE + "."), []),
+            strict=False,
+        )
+        for table_name, df in frames.items()
+    }
+
+
+@dataclass
+class PlayerRecord:
+    first_name: str | None
+    last_name: str | None
+    position: str | None
+    sweater_number: int | None
+    team_id: int | None
+    updated_game_id: int
+
+    # attributes whose changes are recorded in player_history
+    @property
+    def tracked(self) -> tuple:
+        return (self.team_id, self.position, self.sweater_number)
+
+
+# keeps players and teams up to date from the frames of each ingested game. the
+# current rows are cached in memory so only new or changed players and teams are
+# written. every change of team, position or sweater number adds a row to
+# player_history keyed by the game it was first seen in
+class DimensionTables:
+    db: DBConnector
+    players: dict[int, PlayerRecord] | None
+    teams: dict[int, tuple[str | None, str | None]] | None
+
+    def __init__(self, db: DBConnector):
+        self.db = db
+        self.players = None
+        self.teams = None
+
+    def _load(self):
+        self.players = {
+            row[0]: PlayerRecord(*row[1:])
+            for row in self.db.get_query_result(
+                "SELECT player_id, first_name, last_name, position, sweater_number, "
+                f"team_id, updated_game_id FROM {PLAYERS_TABLE}"
+            ).iter_rows()
+        }
+        self.teams = {
+            row[0]: (row[1], row[2])
+            for row in self.db.get_query_result(
+                f"SELECT team_id, name, abrv FROM {TEAMS_TABLE}"
+            ).iter_rows()
+        }
+
+    # drops the cache, e.g. after the transaction holding an update rolled back
+    def invalidate(self):
+        self.players = None
+        self.teams = None
+
+    def update(self, frames: dict[str, pl.DataFrame]):
+        if self.players is None or self.teams is None:
+            self._load()
+
+        if GAME_INFO_TABLE in frames:
+            self._update_teams(frames[GAME_INFO_TABLE])
+        if PLAYER_INFO_TABLE in frames:
+            self._update_players(frames[PLAYER_INFO_TABLE])
+
+    def _update_teams(self, game_info: pl.DataFrame):
+        changed = {}
+        for row in game_info.iter_rows(named=True):
+            for side in ["away", "home"]:
+                team_id = row[side + "_team_id"]
+                team = (row[side + "_team_name"], row[side + "_team_abrv"])
+                if self.teams.get(team_id) != team:
+                    changed[team_id] = team
+
+        if not changed:
+            return
+
+        self._delete_keys(TEAMS_TABLE, "team_id", list(changed))
+        self.db.push_dataframe_to_db(
+            pl.DataFrame(
+                {
+                    "team_id": list(changed),
+                    "name": [t[0] for t in changed.values()],
+                    "abrv": [t[1] for t in changed.values()],
+                }
+            ),
+            TEAMS_TABLE,
+        )
+        self.teams.update(changed)
+        logger.info(f"Upserted {len(changed)} teams")
+
+    def _update_players(self, player_info: pl.DataFrame):
+        changed: dict[int, PlayerRecord] = {}
+        history = []
+        for row in player_info.iter_rows(named=True):
+            game_id = int(row["game_id"])
+            record = PlayerRecord(
+                first_name=row["first_name"],
+                last_name=row["last_name"],
+                position=row["position"],
+                sweater_number=row["sweater_number"],
+                team_id=row["team_id"],
+                updated_game_id=game_id,
+            )
+            current = self.players.get(row["id"])
+
+            # games ingested out of order never overwrite newer information
+            if current is not None and game_id < current.updated_game_id:
+                continue
+            tracked_changed = current is None or current.tracked != record.tracked
+            if tracked_changed:
+                history.append((row["id"], game_id, *record.tracked))
+            if tracked_changed or (current.first_name, current.last_name) != (
+                record.first_name,
+                record.last_name,
+            ):
+                changed[row["id"]] = record
+
+        if history:
+            for game_id in {h[1] for h in history}:
+                self._delete_keys(
+                    PLAYER_HISTORY_TABLE,
+                    "player_id",
+                    [h[0] for h in history if h[1] == game_id],
+                    f"game_id = {game_id} AND ",
+                )
+            self.db.push_dataframe_to_db(
+                pl.DataFrame(
+                    history,
+                    schema=[
+                        "player_id",
+                        "game_id",
+                        "team_id",
+                        "position",
+                        "sweater_number",
+                    ],
+                    orient="row",
+                ),
+                PLAYER_HISTORY_TABLE,
+            )
+
+        if changed:
+            self._delete_keys(PLAYERS_TABLE, "player_id", list(changed))
+            self.db.push_dataframe_to_db(
+                pl.DataFrame(
+                    {
+                        "player_id": list(changed),
+                        "first_name": [p.first_name for p in changed.values()],
+                        "last_name": [p.last_name for p in changed.values()],
+                        "position": [p.position for p in changed.values()],
+                        "sweater_number": [p.sweater_number for p in changed.values()],
+                        "team_id": [p.team_id for p in changed.values()],
+                        "updated_game_id": [
+                            p.updated_game_id for p in changed.values()
+                        ],
+                    }
+                ),
+                PLAYERS_TABLE,
+            )
+            self.players.update(changed)
+            logger.info(f"Upserted {len(changed)} players, {len(history)} history rows")
+
+    def _delete_keys(
+        self, table_name: str, key: str, values: list[int], condition: str = ""
+    ):
+        ids = ",".join(str(int(v)) for v in values)
+        self.db.execute(f"DELETE FROM {table_name} WHERE {condition}{key} IN ({ids})")
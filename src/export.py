@@ -0,0 +1,125 @@
+import logging
+import os
+import sys
+
+import polars as pl
+import pyarrow as pa
+
+from db_connector import QUERY_BATCH_SIZE, DBConnector
+from table_schemas import GAME_INFO_TABLE, seasons_condition, stored_schema
+
+logger = logging.getLogger(__name__)
+
+# large_string instead of string_view columns, readable by older arrow consumers
+COMPAT_LEVEL = pl.CompatLevel.oldest()
+
+
+# ids a team abbreviation was stored under, in normalized mode abbreviations only
+# live in the teams dimension table
+def team_ids(db: DBConnector, team: str, normalized: bool) -> list[int]:
+    if normalized:
+        query = "SELECT team_id FROM nhl_api_data.teams WHERE abrv = %s"
+    else:
+        query = (
+            f"SELECT DISTINCT home_team_id AS team_id FROM {GAME_INFO_TABLE} "
+            "WHERE home_team_abrv = %s"
+        )
+    return db.get_query_result(query, (team,)).to_series().to_list()
+
+
+# select of a table's registry columns, restricted to the games of seasons played
+# between start_date and end_date by one of team_ids. seasons are matched on the
+# game_id range, dates and teams through json_pbp_game_info
+def export_query(
+    table: str,
+    start_date: str | None = None,
+    end_date: str | None = None,
+    seasons: list[int] | None = None,
+    team_ids: list[int] | None = None,
+    normalized: bool = False,
+) -> tuple[str, tuple]:
+    conditions = []
+    params = []
+    if seasons:
+        condition, season_params = seasons_condition(seasons)
+        conditions.append(condition)
+        params += season_params
+
+    game_conditions = []
+    if start_date is not None:
+        game_conditions.append("date >= %s")
+        params.append(start_date)
+    if end_date is not None:
+        game_conditions.append("date <= %s")
+        params.append(end_date)
+    if team_ids is not None:
+        placeholders = ",".join(["%s"] * len(team_ids)) or "NULL"
+        game_conditions.append(
+            f"(away_team_id IN ({placeholders}) OR home_team_id IN ({placeholders}))"
+        )
+        params += team_ids + team_ids
+    if game_conditions:
+        if table == "json_pbp_game_info":
+            conditions += game_conditions
+        else:
+            conditions.append(
+                f"game_id IN (SELECT game_id FROM {GAME_INFO_TABLE} WHERE "
+                + " AND ".join(game_conditions)
+                + ")"
+            )
+
+    query = (
+        f"SELECT {', '.join(stored_schema(table, normalized).polars_schema)} "
+        f"FROM nhl_api_data.{table}"
+    )
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    return query, tuple(params)
+
+
+# streams the rows of a table as an arrow ipc stream to out_path ("-" for
+# stdout). batches are written as they're read from the database, so memory use
+# doesn't grow with the result and readers can start on the first batch right
+# away. columns keep the registry dtypes, returns the number of rows written
+def export_table(
+    db: DBConnector,
+    table: str,
+    out_path: str = "-",
+    start_date: str | None = None,
+    end_date: str | None = None,
+    seasons: list[int] | None = None,
+    team_ids: list[int] | None = None,
+    batch_size: int = QUERY_BATCH_SIZE,
+    normalized: bool = False,
+) -> int:
+    schema = stored_schema(table, normalized).polars_schema
+    arrow_schema = (
+        pl.DataFrame(schema=schema).to_arrow(compat_level=COMPAT_LEVEL).schema
+    )
+    query, params = export_query(
+        table, start_date, end_date, seasons, team_ids, normalized
+    )
+
+    sink = sys.stdout.buffer if out_path == "-" else open(out_path, "wb")
+    rows = 0
+    try:
+        writer = pa.ipc.new_stream(sink, arrow_schema)
+        for df in db.iter_query_batches(query, params, batch_size):
+            writer.write_table(df.cast(schema).to_arrow(compat_level=COMPAT_LEVEL))
+            rows += df.height
+        writer.close()
+    except BrokenPipeError:
+        # the reader stopped early (e.g. piped into head), not an error
+        logger.warning(f"Reader closed the stream after {rows} rows of {table}")
+        if sink is sys.stdout.buffer:
+            # keeps the interpreter from failing to flush stdout on exit
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return rows
+    finally:
+        if sink is sys.stdout.buffer:
+            sink.flush()
+        else:
+            sink.close()
+
+    logger.info(f"Exported {rows} rows of {table} to {out_path}")
+    return rows
@@ -0,0 +1,159 @@
+import logging
+import os
+import shutil
+from collections import OrderedDict
+
+import polars as pl
+
+from player_index import PlayerIndex
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "index.arrow"
+PLAYER_INDEX_DIR = "player_index"
+
+
+# local store of parsed games for fast random access. every table of a game is
+# an uncompressed arrow ipc file under <root>/<game_id>/<table>.arrow, which
+# polars memory maps on read instead of copying. index.arrow lists the stored
+# (game_id, table, rows) so lookups never touch the directory tree, and the
+# last cache_size games read are kept in an lru. player_index maps players to
+# the rows naming them, see player_index.py
+class GameStore:
+    root: str
+    cache_size: int
+    index: dict[int, dict[str, int]] | None
+    cache: OrderedDict[int, dict[str, pl.DataFrame]]
+    dirty: bool
+    player_index: PlayerIndex
+
+    def __init__(self, root: str, cache_size: int = 128):
+        self.root = root
+        self.cache_size = cache_size
+        self.index = None
+        self.cache = OrderedDict()
+        self.dirty = False
+        self.player_index = PlayerIndex(os.path.join(root, PLAYER_INDEX_DIR))
+
+    def _load(self) -> dict[int, dict[str, int]]:
+        if self.index is None:
+            self.index = {}
+            path = os.path.join(self.root, INDEX_FILE)
+            if os.path.exists(path):
+                for game_id, table, rows in pl.read_ipc(path).iter_rows():
+                    self.index.setdefault(game_id, {})[table] = rows
+        return self.index
+
+    def game_path(self, game_id: int) -> str:
+        return os.path.join(self.root, str(game_id))
+
+    def table_path(self, game_id: int, table: str) -> str:
+        return os.path.join(self.game_path(game_id), table + ".arrow")
+
+    def game_ids(self) -> list[int]:
+        return sorted(self._load())
+
+    def __contains__(self, game_id: int) -> bool:
+        return game_id in self._load()
+
+    # frames are keyed by table name as pushed to the database, tables of the game
+    # that are not in frames are kept
+    def write_game(self, game_id: int, frames: dict[str, pl.DataFrame]):
+        os.makedirs(self.game_path(game_id), exist_ok=True)
+        tables = self._load().setdefault(game_id, {})
+        for table_name, df in frames.items():
+            table = table_name.split(".")[-1]
+            path = self.table_path(game_id, table)
+            # a reader never sees a half written file
+            df.write_ipc(path + ".tmp", compression="uncompressed")
+            os.replace(path + ".tmp", path)
+            tables[table] = df.height
+
+        self.player_index.update_game(game_id, frames)
+        self.cache.pop(game_id, None)
+        self.dirty = True
+
+    def delete_game(self, game_id: int):
+        shutil.rmtree(self.game_path(game_id), ignore_errors=True)
+        if self._load().pop(game_id, None) is not None:
+            self.dirty = True
+            self.player_index.delete_game(game_id)
+        self.cache.pop(game_id, None)
+
+    # tables of a stored game keyed by table name (without the database prefix),
+    # None if the game isn't stored
+    def get_game(self, game_id: int) -> dict[str, pl.DataFrame] | None:
+        if game_id in self.cache:
+            self.cache.move_to_end(game_id)
+            return self.cache[game_id]
+
+        tables = self._load().get(game_id)
+        if tables is None:
+            return None
+
+        game = {table: pl.read_ipc(self.table_path(game_id, table)) for table in tables}
+        self.cache[game_id] = game
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return game
+
+    # one table of a stored game, read on its own unless the game is cached
+    def get_table(self, game_id: int, table: str) -> pl.DataFrame | None:
+        if game_id in self.cache:
+            return self.cache[game_id].get(table)
+        if table not in self._load().get(game_id, {}):
+            return None
+        return pl.read_ipc(self.table_path(game_id, table))
+
+    # rows of a player's games naming the player, keyed by indexed table (see
+    # player_index.PLAYER_COLUMNS) and ordered by game
+    def player_rows(
+        self, player_id: int, tables: list[str] | None = None
+    ) -> dict[str, pl.DataFrame]:
+        entries = self.player_index.lookup(player_id)
+        if tables is not None:
+            entries = entries.filter(pl.col("table").cast(pl.String).is_in(tables))
+
+        parts = {}
+        for (game_id, table), rows in entries.group_by(
+            "game_id", "table", maintain_order=True
+        ):
+            df = self.get_table(game_id, table)
+            if df is not None:
+                parts.setdefault(table, []).append(df[rows["row"]])
+        return {
+            table: pl.concat(dfs, how="vertical_relaxed")
+            for table, dfs in parts.items()
+        }
+
+    # indexes the players of every stored game from scratch, for stores written
+    # before the player index existed
+    def rebuild_player_index(self):
+        shutil.rmtree(self.player_index.root, ignore_errors=True)
+        self.player_index = PlayerIndex(self.player_index.root)
+        for i, game_id in enumerate(self.game_ids()):
+            self.player_index.update_game(game_id, self.get_game(game_id))
+            if i % 1000 == 999:
+                self.player_index.save()
+        self.player_index.save()
+
+    # writes the index if games were added since the last save
+    def save(self):
+        self.player_index.save()
+        if not self.dirty:
+            return
+
+        os.makedirs(self.root, exist_ok=True)
+        path = os.path.join(self.root, INDEX_FILE)
+        pl.DataFrame(
+            [
+                (game_id, table, rows)
+                for game_id, tables in sorted(self.index.items())
+                for table, rows in tables.items()
+            ],
+            schema={"game_id": pl.Int32, "table": pl.String, "rows": pl.Int32},
+            orient="row",
+        ).write_ipc(path + ".tmp", compression="uncompressed")
+        os.replace(path + ".tmp", path)
+        self.dirty = False
+        logger.info(f"Saved game store index of {len(self.index)} games")
@@ -0,0 +1,190 @@
+import logging
+import threading
+from dataclasses import dataclass
+
+from db_connector import DBConnector
+from table_schemas import table_frame
+
+logger = logging.getLogger(__name__)
+
+JOBS_TABLE = "nhl_api_data.ingest_game_jobs"
+
+
+@dataclass
+class Job:
+    game_id: int
+    attempts: int
+
+
+# work queue of games stored in the database, one job per game so all of a
+# game's tables are still replaced in one transaction (see ingest_game). on mysql
+# workers on any node pick jobs with SELECT ... FOR UPDATE SKIP LOCKED so
+# concurrent claims don't block on the same row. on both backends a claim only
+# succeeds if the job's row is unchanged since it was read, so two workers never
+# get the same job. a claimed job holds a lease that the worker extends with
+# heartbeats; jobs whose lease runs out are handed to the next worker until
+# max_attempts is reached
+class JobQueue:
+    db: DBConnector
+    max_attempts: int
+
+    def __init__(self, db: DBConnector, max_attempts: int = 3):
+        self.db = db
+        self.max_attempts = max_attempts
+
+    # already queued games are left untouched
+    def enqueue(self, game_ids: list[int]) -> int:
+        if not game_ids:
+            return 0
+
+        queued = set(
+            self.db.get_query_result(f"SELECT game_id FROM {JOBS_TABLE}")[
+                "game_id"
+            ].to_list()
+        )
+        new_ids = sorted(set(game_ids) - queued)
+        if not new_ids:
+            return 0
+
+        jobs = table_frame(
+            "ingest_game_jobs",
+            {
+                "game_id": new_ids,
+                "state": ["pending"] * len(new_ids),
+                "attempts": [0] * len(new_ids),
+                "worker_id": [None] * len(new_ids),
+                "lease_expires_at": [None] * len(new_ids),
+                "heartbeat_at": [None] * len(new_ids),
+                "last_error": [None] * len(new_ids),
+            },
+        )
+        self.db.push_dataframe_to_db(jobs, JOBS_TABLE)
+        return len(new_ids)
+
+    def claim(self, worker_id: str, lease_seconds: int) -> Job | None:
+        # jobs that ran out of attempts while leased are given up on
+        self.db.execute(
+            f"""
+            UPDATE {JOBS_TABLE}
+            SET state = 'failed', last_error = 'lease expired'
+            WHERE state = 'running' AND lease_expires_at < NOW()
+                AND attempts >= %s
+            """,
+            (self.max_attempts,),
+        )
+        self.db.commit()
+
+        # each select walks an index in its ORDER BY (idx_claim for expired
+        # leases, idx_pending for pending jobs) and stops at the first claimable
+        # row. a claim lost to another worker moves on to the next candidate
+        lock = " FOR UPDATE SKIP LOCKED" if self.db.dialect == "mysql" else ""
+        for condition, order in [
+            ("state = 'running' AND lease_expires_at < NOW()", "lease_expires_at"),
+            ("state = 'pending'", "game_id"),
+        ]:
+            while True:
+                try:
+                    candidate = self.db.get_query_result(
+                        f"""
+                        SELECT game_id, attempts FROM {JOBS_TABLE}
+                        WHERE {condition} AND attempts < %s
+                        ORDER BY state, {order}
+                        LIMIT 1{lock}
+                        """,
+                        (self.max_attempts,),
+                    )
+                    if candidate.is_empty():
+                        self.db.commit()
+                        break
+
+                    game_id, attempts = candidate.row(0)
+                    claimed = self.db.execute(
+                        f"""
+                        UPDATE {JOBS_TABLE}
+                        SET state = 'running', worker_id = %s,
+                            attempts = attempts + 1,
+                            lease_expires_at = NOW() + INTERVAL (%s) SECOND,
+                            heartbeat_at = NOW()
+                        WHERE game_id = %s AND attempts = %s AND {condition}
+                        """,
+                        (worker_id, lease_seconds, game_id, attempts),
+                    )
+                    self.db.commit()
+                except Exception:
+                    self.db.rollback()
+                    raise
+
+                if claimed == 1:
+                    return Job(game_id=game_id, attempts=attempts + 1)
+        return None
+
+    # returns False if the lease was lost to another worker
+    def heartbeat(self, job: Job, worker_id: str, lease_seconds: int) -> bool:
+        return self._update_leased(
+            job,
+            worker_id,
+            "lease_expires_at = NOW() + INTERVAL (%s) SECOND, heartbeat_at = NOW()",
+            (lease_seconds,),
+        )
+
+    def complete(self, job: Job, worker_id: str) -> bool:
+        return self._update_leased(
+            job, worker_id, "state = 'done', lease_expires_at = NULL", ()
+        )
+
+    def fail(self, job: Job, worker_id: str, error: str) -> bool:
+        return self._update_leased(
+            job,
+            worker_id,
+            "state = CASE WHEN attempts >= %s THEN 'failed' ELSE 'pending' END, "
+            "lease_expires_at = NULL, last_error = %s",
+            (self.max_attempts, error),
+        )
+
+    # jobs that are running or can still be claimed. a claim can come back empty
+    # while other workers hold every pending row locked, so only this reaching 0
+    # means the queue is drained
+    def remaining(self) -> int:
+        remaining = self.db.get_query_result(
+            f"SELECT COUNT(*) FROM {JOBS_TABLE} "
+            "WHERE state = 'running' OR state = 'pending'"
+        ).item()
+        self.db.commit()
+        return remaining
+
+    # failed jobs get a fresh set of attempts
+    def requeue_failed(self) -> int:
+        requeued = self.db.execute(
+            f"UPDATE {JOBS_TABLE} SET state = 'pending', attempts = 0 "
+            "WHERE state = 'failed'"
+        )
+        self.db.commit()
+        return requeued
+
+    # heartbeats every third of the lease until stop is set, meant to run in its
+    # own thread with its own connection
+    def keep_alive(
+        self, job: Job, worker_id: str, lease_seconds: int, stop: threading.Event
+    ):
+        while not stop.wait(lease_seconds / 3):
+            try:
+                if not self.heartbeat(job, worker_id, lease_seconds):
+                    logger.warning(
+                        f"Lost lease on game {job.game_id} to another worker"
+                    )
+                    return
+            except Exception:
+                logger.error(f"Heartbeat failed for game {job.game_id}")
+
+    def _update_leased(
+        self, job: Job, worker_id: str, assignments: str, params: tuple
+    ) -> bool:
+        updated = self.db.execute(
+            f"""
+            UPDATE {JOBS_TABLE} SET {assignments}
+            WHERE game_id = %s AND worker_id = %s AND state = 'running'
+            """,
+            params + (job.game_id, worker_id),
+        )
+        self.db.commit()
+        return updated == 1
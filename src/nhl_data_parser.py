@@ -1,3 +1,5 @@
+from __future__ import annotations
+
 import argparse
 import datetime
 import logging
@@ -5,63 +7,307 @@ import logging
 logger = logging.getLogger(__name__)
 import os
 import shutil
+import socket
+import threading
+import time
+from functools import cached_property
+from typing import TYPE_CHECKING
 
-import polars as pl
-import requests
+# polars, requests, bs4 and mysql are only imported once a subcommand needs them,
+# keeping cli startup cheap
+if TYPE_CHECKING:
+    import polars as pl
 
-from db_connector import DBConnector
-from sub_parsers.html_pbp_parser import NHLHtmlPbpParser
-from sub_parsers.json_pbp_parser import NHLJsonPbpParser
-from sub_parsers.json_shift_parser import NHLJsonShiftParser
+    from db_connector import DBConnector
+    from db_writer import DBWriter, WriteResult
+    from dead_letters import DeadLetterQueue
+    from deferred_games import DeferredGames
+    from dimensions import DimensionTables
+    from game_store import GameStore
+    from sub_parsers.fetcher import Fetcher
+    from sub_parsers.html_pbp_parser import NHLHtmlPbpParser
+    from sub_parsers.json_pbp_parser import NHLJsonPbpParser
+    from sub_parsers.json_shift_parser import NHLJsonShiftParser, ShiftInfo
 
+# gameState values reported by the schedule endpoint
+LIVE_GAME_STATES = ["LIVE", "CRIT"]
+FINAL_GAME_STATES = ["FINAL", "OFF"]
+# gameScheduleState of games played on their scheduled date, others (e.g. "PPD")
+# show up again on the date they are rescheduled to
+PLAYED_SCHEDULE_STATE = "OK"
+
+# sources scraped for every game
+SOURCES = ["json_pbp", "json_shift", "html_pbp"]
+
+# tables holding rows of a single game
+GAME_TABLES = [
+    "nhl_api_data.json_pbp_game_info",
+    "nhl_api_data.json_pbp_player_info",
+    "nhl_api_data.json_pbp_plays",
+    "nhl_api_data.json_shift_info",
+    "nhl_api_data.html_pbp_plays",
+    "nhl_api_data.html_pbp_on_ice",
+]
+
+
+# inclusive list of "yyyy-mm-dd" dates
+def dates_between(start_date: datetime.date, end_date: datetime.date) -> list[str]:
+    return [
+        (start_date + datetime.timedelta(days=i)).isoformat()
+        for i in range((end_date - start_date).days + 1)
+    ]
 
-class NHLDataParser:
-    json_pbp_parser: NHLJsonPbpParser
-    html_pbp_parser: NHLHtmlPbpParser
-    json_shift_parser: NHLJsonShiftParser
-    db: DBConnector
 
-    def __init__(self, logout_file: str, db_cred_path: str):
-        self.json_pbp_parser = NHLJsonPbpParser()
-        self.html_pbp_parser = NHLHtmlPbpParser()
-        self.json_shift_parser = NHLJsonShiftParser()
+# game ids of a get_game_ids result that are over and can be scraped in full
+def final_game_ids(game_ids: dict) -> list[int]:
+    return [
+        g
+        for g, state in zip(game_ids["game_id"], game_ids["game_state"])
+        if state in FINAL_GAME_STATES
+    ]
 
-        self.db = DBConnector(db_cred_path)
+
+class NHLDataParser:
+    db_cred_path: str
+    validator_path: str | None
+    # in normalized mode names live in the players and teams dimension tables and
+    # fact tables only store ids
+    normalized: bool
+    # parsed games are also written to the arrow game store here when set
+    game_store_path: str | None
+    # updated games are materialized as wide events into the wide_events table
+    # and/or per season parquet files in wide_events_path
+    wide_events_table: bool
+    wide_events_path: str | None
+    # shift charts fetched in bulk by prefetch_shifts, used up by ingest_game
+    prefetched_shifts: dict[int, ShiftInfo]
+
+    def __init__(
+        self,
+        logout_file: str,
+        db_cred_path: str,
+        validator_path: str | None = None,
+        normalized: bool = False,
+        game_store_path: str | None = None,
+        wide_events_table: bool = False,
+        wide_events_path: str | None = None,
+    ):
+        self.db_cred_path = db_cred_path
+        self.validator_path = validator_path
+        self.normalized = normalized
+        self.game_store_path = game_store_path
+        self.wide_events_table = wide_events_table
+        self.wide_events_path = wide_events_path
+        self.prefetched_shifts = {}
 
         logging.basicConfig(
             filename=logout_file,
             encoding="utf-8",
             filemode="a",
+            level=logging.INFO,
             format="{asctime} - {levelname} - {message}",
             style="{",
             datefmt="%Y-%m-%d %H:%M",
         )
 
+    # parsers and the database connection are created on first use
+    @cached_property
+    def fetcher(self) -> Fetcher:
+        from sub_parsers.fetcher import Fetcher
+
+        return Fetcher(self.validator_path)
+
+    @cached_property
+    def json_pbp_parser(self) -> NHLJsonPbpParser:
+        from sub_parsers.json_pbp_parser import NHLJsonPbpParser
+
+        return NHLJsonPbpParser(self.fetcher)
+
+    @cached_property
+    def html_pbp_parser(self) -> NHLHtmlPbpParser:
+        from sub_parsers.html_pbp_parser import NHLHtmlPbpParser
+
+        return NHLHtmlPbpParser(self.fetcher)
+
+    @cached_property
+    def json_shift_parser(self) -> NHLJsonShiftParser:
+        from sub_parsers.json_shift_parser import NHLJsonShiftParser
+
+        return NHLJsonShiftParser(self.fetcher)
+
+    @cached_property
+    def db(self) -> DBConnector:
+        from db_connector import DBConnector
+
+        return DBConnector(self.db_cred_path)
+
+    # second connection, used by the background db writer
+    @cached_property
+    def writer_db(self) -> DBConnector:
+        from db_connector import DBConnector
+
+        return DBConnector(self.db_cred_path)
+
+    @cached_property
+    def dimensions(self) -> DimensionTables:
+        from dimensions import DimensionTables
+
+        return DimensionTables(self.db)
+
+    @cached_property
+    def dead_letters(self) -> DeadLetterQueue:
+        from dead_letters import DeadLetterQueue
+
+        return DeadLetterQueue(self.db)
+
+    @cached_property
+    def deferred_games(self) -> DeferredGames:
+        from deferred_games import DeferredGames
+
+        return DeferredGames(self.db)
+
+    # ids of games with stored game info, kept up to date by update_database
+    @cached_property
+    def ingested_game_ids(self) -> set[int]:
+        return set(
+            self.db.get_query_result(
+                "SELECT game_id FROM nhl_api_data.json_pbp_game_info"
+            )
+            .to_series()
+            .to_list()
+        )
+
+    @cached_property
+    def game_store(self) -> GameStore | None:
+        if self.game_store_path is None:
+            return None
+
+        from game_store import GameStore
+
+        return GameStore(self.game_store_path)
+
+    # tables of a game from the game store, keyed by table name
+    def get_game(self, game_id: int) -> dict[str, pl.DataFrame] | None:
+        if self.game_store is None:
+            raise ValueError("No game store path was given")
+        return self.game_store.get_game(game_id)
+
+    # rows naming a player across the stored games, keyed by table, see
+    # GameStore.player_rows
+    def get_player_rows(
+        self, player_id: int, tables: list[str] | None = None
+    ) -> dict[str, pl.DataFrame]:
+        if self.game_store is None:
+            raise ValueError("No game store path was given")
+        return self.game_store.player_rows(player_id, tables)
+
+    # indexes the players of every game in the game store from scratch
+    def build_player_index(self):
+        if self.game_store is None:
+            raise ValueError("No game store path was given")
+
+        self.game_store.rebuild_player_index()
+        logger.info(
+            f"Indexed the players of {len(self.game_store.game_ids())} stored games"
+        )
+
+    # copies games already in the database into the game store
+    def build_game_store(self, seasons: list[int] | None):
+        from dimensions import normalize_frames
+        from table_schemas import seasons_condition
+
+        if self.game_store is None:
+            raise ValueError("No game store path was given")
+
+        query = "SELECT game_id FROM nhl_api_data.json_pbp_game_info"
+        params = None
+        if seasons:
+            condition, params = seasons_condition(seasons)
+            query += " WHERE " + condition
+        game_ids = self.db.get_query_result(query + " ORDER BY game_id", params)
+
+        for i, g in enumerate(game_ids.to_series().to_list()):
+            frames = {
+                table_name: self.db.get_query_result(
+                    f"SELECT * FROM {table_name} WHERE game_id = %s", (g,)
+                )
+                for table_name in GAME_TABLES
+            }
+            # tables created before normalized mode keep their name columns
+            if self.normalized:
+                frames = normalize_frames(frames)
+            self.game_store.write_game(g, frames)
+            # keeping the index current every so often for interrupted runs
+            if i % 100 == 99:
+                self.game_store.save()
+        self.game_store.save()
+        logger.info(f"Copied {game_ids.height} games to the game store")
+
     #  date should be formatted as "yyyy-mm-dd"
     def get_game_ids(self, date: str, only_reg_season: bool) -> dict | None:
-        url = "https://api-web.nhle.com/v1/schedule/" + date
+        from sub_parsers import json_schema
+        from sub_parsers.fetcher import API_WEB_URL
+
+        url = API_WEB_URL + "/v1/schedule/" + date
 
         try:
-            data = requests.get(url).json()
+            content = self.fetcher.get(url, record=False).content
+            if json_schema.HAS_MSGSPEC:
+                d = json_schema.decode_schedule(content).game_week[0]
+                day = d.date
+                games = [
+                    (
+                        g.id,
+                        g.game_type,
+                        g.away_team.abbrev,
+                        g.home_team.abbrev,
+                        g.game_state,
+                        g.game_schedule_state,
+                    )
+                    for g in d.games
+                ]
+            else:
+                d = json_schema.loads(content)["gameWeek"][0]
+                day = d["date"]
+                games = [
+                    (
+                        g["id"],
+                        g["gameType"],
+                        g["awayTeam"]["abbrev"],
+                        g["homeTeam"]["abbrev"],
+                        g["gameState"],
+                        g.get("gameScheduleState", PLAYED_SCHEDULE_STATE),
+                    )
+                    for g in d["games"]
+                ]
         except Exception:
             logger.warning(f"Failed to fetch schedule for {date}: url not found")
             return None
 
-        game_id_data = {"game_id": [], "date": [], "home_team": [], "away_team": []}
-        d = data["gameWeek"][0]
-        for g in d["games"]:
-            if only_reg_season:
-                if g["gameType"] == 2:
-                    game_id_data["game_id"].append(g["id"])
-                    game_id_data["date"].append(d["date"])
-                    game_id_data["home_team"].append(g["awayTeam"]["abbrev"])
-                    game_id_data["away_team"].append(g["homeTeam"]["abbrev"])
-            else:
-                if g["gameType"] in [2, 3]:
-                    game_id_data["game_id"].append(g["id"])
-                    game_id_data["date"].append(d["date"])
-                    game_id_data["home_team"].append(g["awayTeam"]["abbrev"])
-                    game_id_data["away_team"].append(g["homeTeam"]["abbrev"])
+        game_types = [2] if only_reg_season else [2, 3]
+        game_id_data = {
+            "game_id": [],
+            "date": [],
+            "home_team": [],
+            "away_team": [],
+            "game_state": [],
+            "schedule_state": [],
+        }
+        for (
+            game_id,
+            game_type,
+            away_abbrev,
+            home_abbrev,
+            game_state,
+            schedule_state,
+        ) in games:
+            if game_type in game_types:
+                game_id_data["game_id"].append(game_id)
+                game_id_data["date"].append(day)
+                game_id_data["home_team"].append(away_abbrev)
+                game_id_data["away_team"].append(home_abbrev)
+                game_id_data["game_state"].append(game_state)
+                game_id_data["schedule_state"].append(schedule_state)
         return game_id_data
 
     # scraping nhl api data and saving it to csvs
@@ -79,11 +325,7 @@ class NHLDataParser:
         parsed_end_date = datetime.date(
             int(end_date[0:4]), int(end_date[5:7]), int(end_date[8:10])
         )
-        date_range = (
-            pl.date_range(parsed_start_date, parsed_end_date, eager=True)
-            .cast(pl.String)
-            .alias("date")
-        ).to_list()
+        date_range = dates_between(parsed_start_date, parsed_end_date)
 
         # function to check if folder exists and if it does, empty it
         def folder_check(path: str):
@@ -99,6 +341,7 @@ class NHLDataParser:
 
         out_paths = {
             "html_pbp_plays": os.path.join("./html_pbp_plays"),
+            "html_pbp_on_ice": os.path.join("./html_pbp_on_ice"),
             "json_pbp_game_info": os.path.join("./json_pbp_game_info"),
             "json_pbp_player_info": os.path.join("./json_pbp_player_info"),
             "json_pbp_plays": os.path.join("./json_pbp_plays"),
@@ -112,18 +355,31 @@ class NHLDataParser:
         for date in date_range:
             game_ids = self.get_game_ids(date, only_reg_season)
             if game_ids:
-                for g in game_ids["game_id"]:
+                final_ids = final_game_ids(game_ids)
+                if len(final_ids) < len(game_ids["game_id"]):
+                    logger.warning(
+                        f"Skipping {len(game_ids['game_id']) - len(final_ids)} "
+                        f"games on {date} that are not final"
+                    )
+                self.prefetch_shifts(final_ids)
+                for g in final_ids:
                     logger.info(f"Processing game {g}")
+                    # roster the html on-ice players are resolved against
+                    roster = {}
                     # parsing json pbp
                     try:
                         json_pbp_game = self.json_pbp_parser.parse(g)
-                        json_pbp_game.game_info_to_df().write_csv(
+                        roster = {
+                            "nhl_api_data.json_pbp_game_info": json_pbp_game.game_info_to_df(),
+                            "nhl_api_data.json_pbp_player_info": json_pbp_game.players_to_df(),
+                        }
+                        roster["nhl_api_data.json_pbp_game_info"].write_csv(
                             os.path.join(
                                 out_paths["json_pbp_game_info"], str(g) + ".csv"
                             )
                         )
 
-                        json_pbp_game.players_to_df().write_csv(
+                        roster["nhl_api_data.json_pbp_player_info"].write_csv(
                             os.path.join(
                                 out_paths["json_pbp_player_info"], str(g) + ".csv"
                             )
@@ -137,7 +393,9 @@ class NHLDataParser:
 
                     # parsing json shift pbp
                     try:
-                        json_shift_game = self.json_shift_parser.parse(g)
+                        json_shift_game = self.prefetched_shifts.pop(g, None)
+                        if json_shift_game is None:
+                            json_shift_game = self.json_shift_parser.parse(g)
                         json_shift_game.to_df().write_csv(
                             os.path.join(out_paths["json_shift_info"], str(g) + ".csv")
                         )
@@ -150,9 +408,27 @@ class NHLDataParser:
                         html_pbp_games.to_df().write_csv(
                             os.path.join(out_paths["html_pbp_plays"], str(g) + ".csv")
                         )
+
+                        on_ice = self.resolve_on_ice(
+                            g,
+                            {
+                                **roster,
+                                "nhl_api_data.html_pbp_on_ice": html_pbp_games.on_ice_to_df(),
+                            },
+                        )["nhl_api_data.html_pbp_on_ice"]
+                        on_ice.write_csv(
+                            os.path.join(out_paths["html_pbp_on_ice"], str(g) + ".csv")
+                        )
                     except Exception:
                         logging.error(f"html pbp parser failed to parse game {g}")
 
+                    # the csv backup keeps no validators
+                    self.fetcher.discard()
+
+        import polars as pl
+
+        from table_schemas import read_table_csv
+
         if not os.path.exists(backup_out_path):
             os.makedirs(backup_out_path)
 
@@ -160,18 +436,107 @@ class NHLDataParser:
             csv_files = [
                 os.path.join(v, f) for f in os.listdir(v) if f.endswith(".csv")
             ]
-            df = pl.concat([pl.read_csv(f) for f in csv_files], how="diagonal_relaxed")
+            df = pl.concat([read_table_csv(f, k) for f in csv_files], how="vertical")
             df.write_csv(os.path.join(backup_out_path, k + ".csv"))
             shutil.rmtree(v)
 
-    # create tables and load data from csvs files
-    def build_db_from_csvs(
-        self,
-        sql_file_path: str,
-    ) -> None:
-        # create databases and tables and loads csv into db
+    # creates the databases, recreates the tables of the csv backup from the
+    # schemas in table_schemas.py and bulk loads the csv files into them. the
+    # backup keeps the names either way, in normalized mode they go to the
+    # dimension tables and are left out of the fact tables
+    def build_db_from_csvs(self, sql_file_path: str, csv_path: str) -> None:
+        from table_schemas import (
+            TABLE_SCHEMAS,
+            migrate_tables,
+            read_table_csv,
+            stored_schema,
+        )
+
         self.db.execute_sql_file(sql_file_path)
 
+        tables = [
+            table
+            for name, table in TABLE_SCHEMAS.items()
+            if os.path.exists(os.path.join(csv_path, name + ".csv"))
+        ]
+        # the backup replaces the tables, along with columns of older schemas
+        for table in tables:
+            self.db.execute(f"DROP TABLE IF EXISTS {table.qualified_name}")
+        self.db.commit()
+        migrate_tables(self.db, normalized=self.normalized)
+
+        if self.normalized:
+            self._update_dimensions(
+                {
+                    table.qualified_name: read_table_csv(
+                        os.path.join(csv_path, table.name + ".csv"), table.name
+                    )
+                    for table in tables
+                    if table.name in ["json_pbp_game_info", "json_pbp_player_info"]
+                }
+            )
+
+        for table in tables:
+            with self.db.transaction():
+                rows = self.db.load_csv(
+                    os.path.join(csv_path, table.name + ".csv"),
+                    stored_schema(table.name, self.normalized),
+                )
+            logger.info(f"Loaded {rows} rows into {table.name}")
+
+    # feeds the players and teams of many games to the dimension tables game by
+    # game, so player_history sees every change in the order it happened
+    def _update_dimensions(self, frames: dict[str, pl.DataFrame]):
+        from table_schemas import GAME_INFO_TABLE
+
+        dimension_frames = {
+            table_name: {
+                key[0]: df
+                for key, df in frames[table_name]
+                .partition_by("game_id", as_dict=True)
+                .items()
+            }
+            for table_name in [GAME_INFO_TABLE, "nhl_api_data.json_pbp_player_info"]
+            if table_name in frames
+        }
+        game_ids = sorted({k for parts in dimension_frames.values() for k in parts})
+        with self.db.transaction():
+            try:
+                for game_id in game_ids:
+                    self.dimensions.update(
+                        {
+                            table_name: parts[game_id]
+                            for table_name, parts in dimension_frames.items()
+                            if game_id in parts
+                        }
+                    )
+            except Exception:
+                self.dimensions.invalidate()
+                raise
+
+    # creates or migrates the tables from the schemas in table_schemas.py. with
+    # partition_seasons the mysql tables are range partitioned by season
+    def create_tables(
+        self, partition_seasons: range | None = None, print_only: bool = False
+    ):
+        import table_schemas
+
+        if print_only:
+            for statement in table_schemas.generate_ddl(
+                self.db.dialect, partition_seasons, self.normalized
+            ):
+                print(statement + ";\n")
+            return
+
+        table_schemas.migrate_tables(self.db, partition_seasons, self.normalized)
+
+    # builds the html <-> json play mapping for whole seasons
+    def reconcile_plays(self, seasons: list[int], tolerance_seconds: int):
+        from reconcile import reconcile_season
+
+        for season in seasons:
+            reconcile_season(self.db, season, tolerance_seconds)
+
     def build_db_from_scratch(
         self,
         start_date: str,
@@ -182,7 +547,7 @@ class NHLDataParser:
     ) -> None:
         self.parse_data_to_csvs(start_date, end_date, only_reg_season, backup_out_path)
 
-        self.build_db_from_csvs(sql_file_path)
+        self.build_db_from_csvs(sql_file_path, backup_out_path)
 
     def test(self):
         cursor = self.db.mydb.cursor()
@@ -205,80 +570,772 @@ class NHLDataParser:
         self.db.mydb.commit()
         cursor.close()
 
-    def update_database(self, only_reg_season: bool):
+    # writes frames for a game to their tables in a single transaction, replacing
+    # any rows already stored for that game. validators fetched for the game are
+    # only kept on success
+    def replace_game_rows(self, game_id: int, frames: dict[str, pl.DataFrame]):
+        try:
+            with self.db.transaction():
+                frames = self.resolve_on_ice(game_id, frames)
+                if self.normalized:
+                    from dimensions import normalize_frames
+
+                    self.dimensions.update(frames)
+                    frames = normalize_frames(frames)
+
+                for table_name, df in frames.items():
+                    self.db.delete_game(table_name, game_id)
+                    self.db.push_dataframe_to_db(df, table_name)
+        except Exception:
+            self.fetcher.discard()
+            if self.normalized:
+                self.dimensions.invalidate()
+            raise
+        self.fetcher.commit()
+
+        # the game store holds the game as it is stored in the database
+        if self.game_store is not None:
+            self.game_store.write_game(game_id, frames)
+
+    # swaps the sweater numbers of a parsed on-ice frame for player ids. the
+    # roster comes from the frames when the json pbp was parsed along with the
+    # html, otherwise from the database
+    def resolve_on_ice(
+        self, game_id: int, frames: dict[str, pl.DataFrame]
+    ) -> dict[str, pl.DataFrame]:
+        on_ice = frames.get("nhl_api_data.html_pbp_on_ice")
+        if on_ice is None or "player_id" in on_ice.columns:
+            return frames
+
+        from sub_parsers.html_pbp_parser import resolve_on_ice_player_ids
+
+        players = frames.get("nhl_api_data.json_pbp_player_info")
+        if players is None:
+            players = self.db.get_query_result(
+                "SELECT game_id, team_id, sweater_number, id "
+                "FROM nhl_api_data.json_pbp_player_info WHERE game_id = %s",
+                (game_id,),
+            )
+        game_info = frames.get("nhl_api_data.json_pbp_game_info")
+        if game_info is None:
+            game_info = self.db.get_query_result(
+                "SELECT game_id, away_team_id, home_team_id "
+                "FROM nhl_api_data.json_pbp_game_info WHERE game_id = %s",
+                (game_id,),
+            )
+        if players.is_empty() or game_info.is_empty():
+            raise RuntimeError(
+                f"Roster of game {game_id} is not loaded, can't resolve on-ice players"
+            )
+
+        resolved = resolve_on_ice_player_ids(on_ice, players, game_info)
+        if resolved.height < on_ice.height:
+            logger.warning(
+                f"{on_ice.height - resolved.height} on-ice sweater numbers of game "
+                f"{game_id} are not on its roster"
+            )
+        return {**frames, "nhl_api_data.html_pbp_on_ice": resolved}
+
+    # url a source of a game is fetched from
+    def source_url(self, game_id: int, source: str) -> str:
+        match source:
+            case "json_pbp":
+                return self.json_pbp_parser.url(str(game_id))
+            case "json_shift":
+                return self.json_shift_parser.url(str(game_id))
+            case "html_pbp":
+                return self.html_pbp_parser.url(str(game_id))
+        raise ValueError(source + " is not a valid source")
+
+    # parses one source of a game into frames keyed by table. returns None when a
+    # conditional fetch found the payload unchanged
+    def _parse_source(
+        self, game_id: int, source: str, conditional: bool = False
+    ) -> dict[str, pl.DataFrame] | None:
+        if source == "json_pbp":
+            out = self.json_pbp_parser.parse(game_id, conditional)
+        elif source == "json_shift":
+            out = self.prefetched_shifts.pop(game_id, None)
+            if out is None:
+                out = self.json_shift_parser.parse(game_id, conditional)
+            elif not self.fetcher.record(
+                self.json_shift_parser.url(game_id), out.content_hash, conditional
+            ):
+                # the batch is never fetched conditionally, the game's own url
+                # keeps the validator
+                return None
+        elif source == "html_pbp":
+            out = self.html_pbp_parser.parse(str(game_id), conditional)
+        else:
+            raise ValueError(source + " is not a valid source")
+        if out is None:
+            return None
+        return self.source_frames(source, out)
+
+    # parses an already fetched payload of a source
+    def parse_payload(self, game_id: int, source: str, content: bytes):
+        match source:
+            case "json_pbp":
+                return self.json_pbp_parser.parse_payload(content)
+            case "json_shift":
+                return self.json_shift_parser.parse_payload(str(game_id), content)
+            case "html_pbp":
+                return self.html_pbp_parser.parse_payload(str(game_id), content)
+        raise ValueError(source + " is not a valid source")
+
+    # frames keyed by table of a parsed source
+    def source_frames(self, source: str, out) -> dict[str, pl.DataFrame]:
+        match source:
+            case "json_pbp":
+                return {
+                    "nhl_api_data.json_pbp_game_info": out.game_info_to_df(),
+                    "nhl_api_data.json_pbp_player_info": out.players_to_df(),
+                    "nhl_api_data.json_pbp_plays": out.plays_to_df(),
+                }
+            case "json_shift":
+                return {"nhl_api_data.json_shift_info": out.to_df()}
+            case "html_pbp":
+                return {
+                    "nhl_api_data.html_pbp_plays": out.to_df(),
+                    "nhl_api_data.html_pbp_on_ice": out.on_ice_to_df(),
+                }
+        raise ValueError(source + " is not a valid source")
+
+    # fetches the shift charts of game_ids in a few batched requests instead of
+    # one per game. on failure the games fall back to their own requests
+    def prefetch_shifts(self, game_ids: list[int]):
+        self.prefetched_shifts = {}
+        if not game_ids:
+            return
+
+        try:
+            shifts = self.json_shift_parser.parse_batch([str(g) for g in game_ids])
+        except Exception:
+            logger.warning(f"Failed to prefetch shift charts of {len(game_ids)} games")
+            return
+        self.prefetched_shifts = {int(g): s for g, s in shifts.items()}
+
+    # unit of work for one game: every source is parsed first and all tables are
+    # then written in one transaction, so a game is either fully loaded or not at
+    # all. failures land in the dead letter table for retry_failed. returns
+    # whether the game is now stored
+    def ingest_game(self, game_id: int, conditional: bool = False) -> bool:
+        return self._ingest_game(game_id, conditional) is not None
+
+    # ingest_game returning the frames written, none when conditional fetches
+    # found nothing changed and None when the game failed
+    def _ingest_game(
+        self, game_id: int, conditional: bool = False
+    ) -> dict[str, pl.DataFrame] | None:
+        frames = self._parse_game(game_id, conditional)
+        if frames is None:
+            return None
+
+        if not frames:
+            logger.info(f"Game {game_id} unchanged")
+            return frames
+
+        try:
+            self.replace_game_rows(game_id, frames)
+        except Exception as err:
+            logging.error(f"failed to write game {game_id} to database")
+            self._record_failure(game_id, "all", "write", err, None)
+            return None
+
+        self.dead_letters.resolve(game_id)
+        return frames
+
+    # parses every source of a game into frames keyed by table. returns None when
+    # a source failed, which is recorded in the dead letter table, and no frames
+    # when conditional fetches found nothing changed
+    def _parse_game(
+        self, game_id: int, conditional: bool = False
+    ) -> dict[str, pl.DataFrame] | None:
+        frames = {}
+        for source in SOURCES:
+            try:
+                source_frames = self._parse_source(game_id, source, conditional)
+            except Exception as err:
+                self.fetcher.discard()
+                logging.error(f"{source} parser failed to parse game {game_id}")
+                self._record_failure(
+                    game_id,
+                    source,
+                    "parse",
+                    err,
+                    self.source_url(game_id, source),
+                )
+                return None
+            if source_frames is not None:
+                frames.update(source_frames)
+        return frames
+
+    # ingest_game with the write handed to a background db writer, so the next
+    # game can be fetched meanwhile. the outcome is picked up by _finish_writes
+    def _queue_game(self, writer: DBWriter, game_id: int, conditional: bool = False):
+        frames = self._parse_game(game_id, conditional)
+        if frames is None:
+            return
+
+        # unchanged games go through the writer too, keeping results in order
+        try:
+            frames = self.resolve_on_ice(game_id, frames)
+        except Exception as err:
+            self.fetcher.discard()
+            logging.error(f"failed to write game {game_id} to database")
+            self._record_failure(game_id, "all", "write", err, None)
+            return
+        writer.submit(game_id, frames, self.fetcher.take_pending())
+
+    # does what replace_game_rows and ingest_game do after a commit for games
+    # written by a db writer. returns the results of the games now stored
+    def _finish_writes(self, results: list[WriteResult]) -> list[WriteResult]:
+        stored = []
+        for result in results:
+            if result.error is not None:
+                logging.error(f"failed to write game {result.game_id} to database")
+                self._record_failure(result.game_id, "all", "write", result.error, None)
+                continue
+
+            self.fetcher.commit(result.validators)
+            if self.game_store is not None and result.frames:
+                self.game_store.write_game(result.game_id, result.frames)
+            self.dead_letters.resolve(result.game_id)
+            stored.append(result)
+        return stored
+
+    def _record_failure(
+        self,
+        game_id: int,
+        source: str,
+        stage: str,
+        err: Exception,
+        payload_url: str | None,
+    ):
+        try:
+            self.dead_letters.record(game_id, source, stage, err, payload_url)
+        except Exception:
+            logging.error(f"failed to record dead letter for game {game_id}")
+
+    # re-ingests every game in the dead letter table
+    def retry_failed(self, max_attempts: int | None = None):
+        from table_schemas import ensure_tables
+
+        ensure_tables(self.db, self.normalized)
+
+        game_ids = self.dead_letters.pending(max_attempts)
+        logger.info(f"Retrying {len(game_ids)} failed games")
+
+        retried = []
+        for g in game_ids:
+            logger.info(f"Retrying game {g}")
+            if self._ingest_game(g) is not None:
+                retried.append(g)
+        if self.game_store is not None:
+            self.game_store.save()
+        logger.info(f"{len(retried)} of {len(game_ids)} failed games ingested")
+        self.update_derived(retried)
+
+    def update_database(
+        self, only_reg_season: bool, recheck_days: int = 0, pipelined: bool = True
+    ):
         # get max date in database, get current date, iterate over all dates in between
-        # get gameid's for each date, parse them and update them into the database
+        # get gameid's for each date, parse them and update them into the database.
+        # the last recheck_days days are revisited with conditional requests so that
+        # only games whose payloads changed get rewritten. games already stored are
+        # skipped outside of that window, games that aren't final yet are deferred
+        # and their date is rescanned on the next run. when pipelined, games are
+        # written by a background db writer while the next ones are fetched
+        from table_schemas import ensure_tables
+
+        ensure_tables(self.db, self.normalized)
 
         max_date = self.db.get_query_result(
             "SELECT MAX(date) FROM nhl_api_data.json_pbp_game_info"
         )[0, 0]
+        end_date = datetime.date.today() - datetime.timedelta(days=1)
+        recheck_from = end_date - datetime.timedelta(days=recheck_days - 1)
+        # a game is first fetched the day after it is played, so validators
+        # older than the recheck window belong to games that are no longer
+        # rechecked
+        pruned = self.fetcher.prune(recheck_days * 24 * 60 * 60)
+        if pruned:
+            logger.info(f"Pruned {pruned} http validators")
+        start_date = min(
+            max_date + datetime.timedelta(days=1),
+            recheck_from,
+            self.deferred_games.earliest_date() or end_date,
+        )
 
         # Range of dates to update
-        date_range = (
-            pl.date_range(
-                max_date + datetime.timedelta(days=1),
-                datetime.date.today() - datetime.timedelta(days=1),
-                eager=True,
+        date_range = dates_between(start_date, end_date)
+        logger.info(f"Date range to update: {','.join(date_range)}")
+
+        # dimension updates of normalized mode need the main connection
+        writer = None
+        if pipelined and not self.normalized:
+            from db_writer import DBWriter
+
+            writer = DBWriter(self.writer_db)
+
+        # games whose rows were rewritten, unchanged games keep their aggregates
+        updated = []
+
+        def stored(game_id: int, written: bool):
+            self.ingested_game_ids.add(game_id)
+            self.deferred_games.resolve(game_id)
+            if written:
+                updated.append(game_id)
+
+        try:
+            for date in date_range:
+                game_ids = self.get_game_ids(date, only_reg_season)
+                if game_ids is None:
+                    continue
+
+                recheck = date >= recheck_from.isoformat()
+                day = datetime.date.fromisoformat(date)
+                # games being rechecked keep their conditional shift requests
+                self.prefetch_shifts(
+                    [
+                        g
+                        for g in final_game_ids(game_ids)
+                        if g not in self.ingested_game_ids
+                    ]
+                )
+                for g, game_state, schedule_state in zip(
+                    game_ids["game_id"],
+                    game_ids["game_state"],
+                    game_ids["schedule_state"],
+                ):
+                    if g in self.ingested_game_ids and not recheck:
+                        self.deferred_games.resolve(g)
+                        continue
+
+                    if game_state not in FINAL_GAME_STATES:
+                        if schedule_state == PLAYED_SCHEDULE_STATE:
+                            logger.info(f"Deferring game {g} ({game_state})")
+                            self.deferred_games.defer(g, day, game_state)
+                        else:
+                            logger.info(f"Skipping game {g} ({schedule_state})")
+                            self.deferred_games.resolve(g)
+                        continue
+
+                    logger.info(f"Processing game {g}")
+                    if writer is None:
+                        frames = self._ingest_game(g, conditional=True)
+                        if frames is not None:
+                            stored(g, bool(frames))
+                    else:
+                        self._queue_game(writer, g, conditional=True)
+                        for result in self._finish_writes(writer.completed()):
+                            stored(result.game_id, bool(result.frames))
+
+                # deferred games that moved off this date are picked up on their new one
+                for g in self.deferred_games.on_date(day) - set(game_ids["game_id"]):
+                    self.deferred_games.resolve(g)
+
+                if self.game_store is not None:
+                    self.game_store.save()
+        finally:
+            if writer is not None:
+                for result in self._finish_writes(writer.close()):
+                    stored(result.game_id, bool(result.frames))
+                # ends the main connection's transaction, whose snapshot predates
+                # the writer's commits
+                self.db.commit()
+                if self.game_store is not None:
+                    self.game_store.save()
+            # validators are written once per run, also when it is interrupted
+            self.fetcher.save()
+
+        self.update_derived(updated)
+
+    # recomputes the tables derived from the stored rows of game_ids, called by
+    # every path that writes games: the aggregates and, when enabled, the wide
+    # events
+    def update_derived(self, game_ids: list[int]):
+        self.update_aggregates(game_ids)
+        if self.wide_events_table or self.wide_events_path is not None:
+            self.update_wide_events(game_ids)
+
+    # recomputes the player and team game aggregates of game_ids, by default of
+    # every stored game without aggregates
+    def update_aggregates(self, game_ids: list[int] | None = None):
+        from aggregates import update_aggregates
+
+        n = update_aggregates(self.db, game_ids)
+        logger.info(f"Updated aggregates of {n} games")
+
+    # materializes the wide events of game_ids, or of every stored game of
+    # seasons, by default of every stored game not materialized yet, see
+    # wide_events.py
+    def update_wide_events(
+        self, game_ids: list[int] | None = None, seasons: list[int] | None = None
+    ):
+        from table_schemas import season_game_ids
+        from wide_events import update_wide_events
+
+        if seasons:
+            game_ids = list(game_ids or [])
+            for season in seasons:
+                game_ids += (
+                    self.db.get_query_result(
+                        "SELECT game_id FROM nhl_api_data.json_pbp_game_info "
+                        "WHERE game_id BETWEEN %s AND %s",
+                        season_game_ids(season),
+                    )
+                    .to_series()
+                    .to_list()
+                )
+        n = update_wide_events(
+            self.db,
+            game_ids,
+            self.normalized,
+            self.wide_events_table,
+            self.wide_events_path,
+        )
+        logger.info(f"Materialized wide events of {n} games")
+
+    # writes per season shot location grids of players and teams to out_path
+    def build_shot_grids(self, seasons: list[int], out_path: str):
+        from shot_grids import build_shot_grids
+
+        build_shot_grids(self.db, seasons, out_path)
+
+    # streams a table's rows as arrow ipc to out_path ("-" for stdout), filtered
+    # by game date, season and team abbreviation, see export.py
+    def export(
+        self,
+        table: str,
+        out_path: str,
+        start_date: str | None,
+        end_date: str | None,
+        seasons: list[int] | None,
+        team: str | None,
+        batch_size: int,
+    ):
+        from export import export_table, team_ids
+
+        ids = None
+        if team is not None:
+            ids = team_ids(self.db, team, self.normalized)
+            if not ids:
+                logger.warning(f"No team with abbreviation {team} is stored")
+        export_table(
+            self.db,
+            table,
+            out_path,
+            start_date,
+            end_date,
+            seasons,
+            ids,
+            batch_size,
+            self.normalized,
+        )
+
+    # profiles the pipeline stages of game_ids, or of the final games between
+    # start_date and end_date, see profiler.py
+    def profile(
+        self,
+        game_ids: list[int] | None,
+        start_date: str | None,
+        end_date: str | None,
+        only_reg_season: bool,
+        out_path: str,
+        payload_dir: str | None,
+        write: bool,
+        sample_interval_ms: float,
+        top: int,
+    ):
+        from profiler import profile_games
+
+        game_ids = list(game_ids or [])
+        if start_date is not None:
+            for date in dates_between(
+                datetime.date.fromisoformat(start_date),
+                datetime.date.fromisoformat(end_date or start_date),
+            ):
+                day_game_ids = self.get_game_ids(date, only_reg_season)
+                if day_game_ids is not None:
+                    game_ids += final_game_ids(day_game_ids)
+        if not game_ids:
+            logger.warning("No games to profile")
+            return
+
+        profile_games(
+            self,
+            game_ids,
+            out_path,
+            payload_dir,
+            write,
+            sample_interval_ms / 1000,
+            top,
+        )
+
+    # polls today's games and appends plays as they happen. only plays whose
+    # event id isn't stored yet are written, the remaining tables are written
+    # once the game is final
+    def live(self, only_reg_season: bool, poll_interval: float):
+        from table_schemas import ensure_tables
+
+        ensure_tables(self.db, self.normalized)
+
+        date = datetime.date.today().isoformat()
+
+        game_ids = self.get_game_ids(date, only_reg_season)
+        if not game_ids or not game_ids["game_id"]:
+            logger.info(f"No games to poll on {date}")
+            return
+
+        ids = ",".join(str(g) for g in game_ids["game_id"])
+        stored_events = {}
+        for g, n, event_id in self.db.get_query_result(
+            "SELECT game_id, n, event_id FROM nhl_api_data.json_pbp_plays "
+            f"WHERE game_id IN ({ids})"
+        ).iter_rows():
+            stored_events.setdefault(g, {})[event_id] = n
+        finalized = set(
+            self.db.get_query_result(
+                "SELECT game_id FROM nhl_api_data.json_pbp_game_info "
+                f"WHERE game_id IN ({ids})"
             )
-            .cast(pl.String)
-            .alias("date")
+            .to_series()
             .to_list()
         )
-        logger.info(f"Date range to update: {','.join(date_range)}")
 
+        while True:
+            for g, state in zip(game_ids["game_id"], game_ids["game_state"]):
+                if g in finalized:
+                    continue
+                if state in LIVE_GAME_STATES or state in FINAL_GAME_STATES:
+                    try:
+                        self._poll_live_game(
+                            g, state in FINAL_GAME_STATES, stored_events, finalized
+                        )
+                    except Exception:
+                        self.fetcher.discard()
+                        logging.error(f"live polling failed for game {g}")
+            self.fetcher.save()
+            if self.game_store is not None:
+                self.game_store.save()
+
+            if all(g in finalized for g in game_ids["game_id"]):
+                logger.info(f"All games on {date} are final")
+                return
+
+            time.sleep(poll_interval)
+            game_ids = self.get_game_ids(date, only_reg_season) or game_ids
+
+    # queues every game in the date range for the job queue workers
+    def enqueue_jobs(
+        self,
+        start_date: str,
+        end_date: str,
+        only_reg_season: bool,
+    ):
+        from job_queue import JobQueue
+        from table_schemas import ensure_tables
+
+        ensure_tables(self.db, self.normalized)
+        queue = JobQueue(self.db)
+
+        date_range = dates_between(
+            datetime.date.fromisoformat(start_date),
+            datetime.date.fromisoformat(end_date),
+        )
         for date in date_range:
             game_ids = self.get_game_ids(date, only_reg_season)
             if game_ids:
-                for g in game_ids["game_id"]:
-                    logger.info(f"Processing game {g}")
-                    # parsing json pbp
-                    try:
-                        out = self.json_pbp_parser.parse(g)
-                    except Exception:
-                        logging.error(f"json pbp parser failed to parse game {g}")
+                n = queue.enqueue(
+                    [
+                        g
+                        for g in final_game_ids(game_ids)
+                        if g not in self.ingested_game_ids
+                    ]
+                )
+                logger.info(f"Enqueued {n} games for {date}")
 
-                    # writing to database
-                    try:
-                        self.db.push_dataframe_to_db(
-                            out.game_info_to_df(), "nhl_api_data.json_pbp_game_info"
-                        )
-                        self.db.push_dataframe_to_db(
-                            out.players_to_df(), "nhl_api_data.json_pbp_player_info"
-                        )
-                        self.db.push_dataframe_to_db(
-                            out.plays_to_df(), "nhl_api_data.json_pbp_plays"
-                        )
-                    except Exception:
-                        logging.error(
-                            f"json pbp parser failed to write game {g} to database"
-                        )
+    def requeue_failed_jobs(self):
+        from job_queue import JobQueue
 
-                    # parsing json shift pbp
-                    try:
-                        out2 = self.json_shift_parser.parse(g)
-                    except Exception:
-                        logging.error(f"json shift parser failed to parse game {g}")
-                    try:
-                        self.db.push_dataframe_to_db(
-                            out2.to_df(), "nhl_api_data.json_shift_info"
-                        )
-                    except Exception:
-                        logging.error(
-                            f"json shift table failed to write {g} to database"
-                        )
+        n = JobQueue(self.db).requeue_failed()
+        logger.info(f"Requeued {n} failed jobs")
 
-                    # parsing html pbp
-                    try:
-                        out3 = self.html_pbp_parser.parse(str(g))
-                    except Exception:
-                        logging.error(f"html pbp parser failed to parse game {g}")
+    # runs update_database every interval_minutes in one long-lived process, so
+    # parsers, the http session and the database connections stay warm between
+    # runs. connections are pinged (and reconnected) before every run. the status
+    # is served as json on http://127.0.0.1:<health_port>/health, answering 503
+    # after a failed run. SIGTERM and SIGINT stop it once the current run is done
+    def run_daemon(
+        self,
+        only_reg_season: bool,
+        recheck_days: int,
+        interval_minutes: float,
+        health_port: int,
+        pipelined: bool = True,
+    ):
+        import signal
 
-                    try:
-                        self.db.push_dataframe_to_db(
-                            out3.to_df(), "nhl_api_data.html_pbp_plays"
-                        )
-                    except Exception:
-                        logging.error(f"html pbp parser failed write to db {g}")
+        from daemon import DaemonStatus, HealthServer, now
+
+        status = DaemonStatus(started_at=now())
+        server = HealthServer(health_port, status)
+        server.start()
+
+        stop = threading.Event()
+        for sig in [signal.SIGTERM, signal.SIGINT]:
+            signal.signal(sig, lambda *_: stop.set())
+        logger.info(f"Daemon started, health endpoint on port {health_port}")
+
+        while not stop.is_set():
+            started = time.monotonic()
+            status.running = True
+            status.last_run_started_at = now()
+            try:
+                self.db.ping()
+                if pipelined and not self.normalized:
+                    self.writer_db.ping()
+                self.update_database(only_reg_season, recheck_days, pipelined)
+                status.last_error = None
+            except Exception as err:
+                logging.error(f"Daemon update failed: {err!r}")
+                status.failed_runs += 1
+                status.last_error = repr(err)
+                try:
+                    self.db.rollback()
+                except Exception:
+                    pass
+            status.runs += 1
+            status.running = False
+            status.last_run_finished_at = now()
+            status.last_run_seconds = round(time.monotonic() - started, 3)
+
+            wait = max(0.0, started + interval_minutes * 60 - time.monotonic())
+            status.next_run_at = (
+                datetime.datetime.now() + datetime.timedelta(seconds=wait)
+            ).isoformat(timespec="seconds")
+            stop.wait(wait)
+
+        server.shutdown()
+        logger.info("Daemon stopped")
+
+    # claims jobs from the queue until it is empty (or forever unless
+    # exit_when_empty is set). leases are renewed from a separate thread and
+    # connection while a job runs
+    def run_worker(
+        self,
+        worker_id: str,
+        lease_seconds: int,
+        max_attempts: int,
+        poll_interval: float,
+        exit_when_empty: bool,
+    ):
+        from db_connector import DBConnector
+        from job_queue import JobQueue
+
+        queue = JobQueue(self.db, max_attempts)
+        heartbeat_queue = JobQueue(DBConnector(self.db_cred_path), max_attempts)
+
+        # validators are written when the worker is idle or stops
+        try:
+            while True:
+                job = queue.claim(worker_id, lease_seconds)
+                if job is None:
+                    if exit_when_empty and queue.remaining() == 0:
+                        logger.info(f"Worker {worker_id} found no more jobs")
+                        return
+                    self.fetcher.save()
+                    time.sleep(poll_interval)
+                    continue
+
+                logger.info(
+                    f"Worker {worker_id} processing game {job.game_id}, "
+                    f"attempt {job.attempts}"
+                )
+                stop = threading.Event()
+                heartbeat = threading.Thread(
+                    target=heartbeat_queue.keep_alive,
+                    args=(job, worker_id, lease_seconds, stop),
+                    daemon=True,
+                )
+                heartbeat.start()
+                try:
+                    # failures are recorded in the dead letter table by ingest_game
+                    if self.ingest_game(job.game_id):
+                        self.update_derived([job.game_id])
+                        queue.complete(job, worker_id)
+                    else:
+                        queue.fail(job, worker_id, "see ingest_failures")
+                    if self.game_store is not None:
+                        self.game_store.save()
+                except Exception as err:
+                    logging.error(
+                        f"Worker {worker_id} failed game {job.game_id}: {err!r}"
+                    )
+                    queue.fail(job, worker_id, repr(err))
+                finally:
+                    stop.set()
+                    heartbeat.join()
+        finally:
+            self.fetcher.save()
+
+    # stored_events maps the event ids of each game's stored plays to their n
+    def _poll_live_game(
+        self,
+        game_id: int,
+        is_final: bool,
+        stored_events: dict[int, dict[int, int]],
+        finalized: set[int],
+    ):
+        # a final game is always fetched in full since every table gets written
+        out = self.json_pbp_parser.parse(game_id, conditional=not is_final)
+        if out is None:
+            return
+
+        import polars as pl
+
+        plays = out.plays_to_df()
+        if not is_final:
+            stored = stored_events.get(game_id, {})
+            events = dict(zip(plays["event_id"], plays["n"]))
+            if all(events.get(e) == n for e, n in stored.items()):
+                new_plays = plays.filter(~pl.col("event_id").is_in(list(stored)))
+                if not new_plays.is_empty():
+                    self.db.push_dataframe_to_db(
+                        new_plays, "nhl_api_data.json_pbp_plays"
+                    )
+                    logger.info(f"Appended {new_plays.height} plays for game {game_id}")
+            else:
+                # a play was removed or reordered, which shifts the n of every
+                # later play, so the game's plays are replaced as a whole
+                with self.db.transaction():
+                    self.db.delete_game("nhl_api_data.json_pbp_plays", game_id)
+                    self.db.push_dataframe_to_db(plays, "nhl_api_data.json_pbp_plays")
+                logger.info(f"Replaced the {plays.height} plays of game {game_id}")
+            stored_events[game_id] = events
+            self.fetcher.commit()
+            return
+
+        shifts = self.json_shift_parser.parse(game_id)
+        html_pbp = self.html_pbp_parser.parse(str(game_id))
+
+        # the final feed replaces the appended plays along with every other
+        # table, game info goes last since its date marks the game as loaded
+        self.replace_game_rows(
+            game_id,
+            {
+                "nhl_api_data.json_pbp_plays": plays,
+                "nhl_api_data.json_shift_info": shifts.to_df(),
+                "nhl_api_data.html_pbp_plays": html_pbp.to_df(),
+                "nhl_api_data.html_pbp_on_ice": html_pbp.on_ice_to_df(),
+                "nhl_api_data.json_pbp_player_info": out.players_to_df(),
+                "nhl_api_data.json_pbp_game_info": out.game_info_to_df(),
+            },
+        )
+        finalized.add(game_id)
+        logger.info(f"Finalized game {game_id}")
+        self.update_derived([game_id])
 
 
 if __name__ == "__main__":
@@ -292,6 +1349,36 @@ if __name__ == "__main__":
         default="./database_creds.json",
         help="Path to database credential json file",
     )
+    parser.add_argument(
+        "--normalized",
+        action="store_true",
+        help="Store player and team names in dimension tables (see create_tables), "
+        "only ids in fact tables",
+    )
+    parser.add_argument(
+        "--validator_path",
+        type=str,
+        default="./http_validators.json",
+        help="Path to json file storing ETag/Last-Modified/content hashes per url",
+    )
+    parser.add_argument(
+        "--game_store_path",
+        type=str,
+        help="Directory of the arrow game store, parsed games are also written "
+        "there when given",
+    )
+    parser.add_argument(
+        "--wide_events_table",
+        action="store_true",
+        help="Materialize plays joined with game and player info into the "
+        "wide_events table after each update",
+    )
+    parser.add_argument(
+        "--wide_events_path",
+        type=str,
+        help="Directory of per season wide event parquet files, written after "
+        "each update when given",
+    )
     subparsers = parser.add_subparsers(dest="command", required=True)
 
     # Subparser for creating csv backup
@@ -328,7 +1415,11 @@ if __name__ == "__main__":
         "--backup_out_path", type=str, required=True, help="Output path for csv backup"
     )
     scratch_parser.add_argument(
-        "--sql_file_path", type=str, required=True, help="SQL file path for DB schema"
+        "--sql_file_path",
+        type=str,
+        required=True,
+        help="SQL file creating the databases, src/create_databases.sql or "
+        "src/create_databases_duckdb.sql for the duckdb backend",
     )
 
     # Subparser for building db from csv backup
@@ -339,7 +1430,31 @@ if __name__ == "__main__":
         "--csv_path", type=str, required=True, help="Path to csv backup"
     )
     csv_db_parser.add_argument(
-        "--sql_file_path", type=str, required=True, help="SQL file path for DB schema"
+        "--sql_file_path",
+        type=str,
+        required=True,
+        help="SQL file creating the databases, src/create_databases.sql or "
+        "src/create_databases_duckdb.sql for the duckdb backend",
+    )
+
+    # Subparser for creating or migrating tables
+    create_tables_parser = subparsers.add_parser(
+        "create_tables", help="Create or migrate tables from the generated schema"
+    )
+    create_tables_parser.add_argument(
+        "--partition_from_season",
+        type=int,
+        help="First season (e.g. 2010) to give its own partition (mysql only)",
+    )
+    create_tables_parser.add_argument(
+        "--partition_to_season",
+        type=int,
+        help="Last season to give its own partition (mysql only)",
+    )
+    create_tables_parser.add_argument(
+        "--print_only",
+        action="store_true",
+        help="Print the generated DDL instead of executing it",
     )
 
     # Subparser for updating the database
@@ -349,9 +1464,283 @@ if __name__ == "__main__":
     update_db_parser.add_argument(
         "--only_reg_season", action="store_true", help="Only regular season games"
     )
+    update_db_parser.add_argument(
+        "--recheck_days",
+        type=int,
+        default=0,
+        help="Re-check already loaded games from the last n days for changes",
+    )
+    update_db_parser.add_argument(
+        "--no_pipeline",
+        action="store_true",
+        help="Write each game before fetching the next instead of in the background",
+    )
+
+    # Subparser for retrying games in the dead letter table
+    retry_failed_parser = subparsers.add_parser(
+        "retry_failed", help="Re-ingest games that previously failed to load"
+    )
+    retry_failed_parser.add_argument(
+        "--max_attempts",
+        type=int,
+        help="Skip games that already failed this many times",
+    )
+
+    # Subparser for aligning html and json plays
+    reconcile_parser = subparsers.add_parser(
+        "reconcile_plays", help="Map html play-by-play rows onto json plays"
+    )
+    reconcile_parser.add_argument(
+        "--seasons",
+        type=int,
+        nargs="+",
+        required=True,
+        help="First year of each season to align (e.g. 2023 for 2023-2024)",
+    )
+    reconcile_parser.add_argument(
+        "--tolerance_seconds",
+        type=int,
+        default=2,
+        help="Max clock difference between matched events",
+    )
+
+    # Subparser for aggregating games that have no aggregates yet
+    subparsers.add_parser(
+        "update_aggregates",
+        help="Compute player and team game stats of stored games that have none",
+    )
+
+    # Subparser for materializing wide events of games that have none yet
+    wide_events_parser = subparsers.add_parser(
+        "update_wide_events",
+        help="Materialize the wide events of stored games that have none "
+        "(needs --wide_events_table or --wide_events_path)",
+    )
+    wide_events_parser.add_argument(
+        "--seasons",
+        type=int,
+        nargs="+",
+        help="First year of each season to rematerialize (e.g. 2023 for 2023-2024)",
+    )
+
+    # Subparser for building shot location grids
+    shot_grids_parser = subparsers.add_parser(
+        "build_shot_grids", help="Write per season shot location grids to parquet"
+    )
+    shot_grids_parser.add_argument(
+        "--seasons",
+        type=int,
+        nargs="+",
+        required=True,
+        help="First year of each season to grid (e.g. 2023 for 2023-2024)",
+    )
+    shot_grids_parser.add_argument(
+        "--out_path", type=str, required=True, help="Output directory for the grids"
+    )
+
+    # Subparser for exporting a table as an arrow stream
+    export_parser = subparsers.add_parser(
+        "export", help="Stream a table as Arrow IPC record batches"
+    )
+    export_parser.add_argument(
+        "--table",
+        type=str,
+        required=True,
+        choices=[t.split(".")[-1] for t in GAME_TABLES],
+        help="Table to export",
+    )
+    export_parser.add_argument(
+        "--out_path",
+        type=str,
+        default="-",
+        help="Output file of the arrow stream, stdout by default",
+    )
+    export_parser.add_argument(
+        "--start_date", type=str, help="Only games from (YYYY-MM-DD)"
+    )
+    export_parser.add_argument(
+        "--end_date", type=str, help="Only games until (YYYY-MM-DD)"
+    )
+    export_parser.add_argument(
+        "--seasons",
+        type=int,
+        nargs="+",
+        help="First year of each season to export (e.g. 2023 for 2023-2024)",
+    )
+    export_parser.add_argument(
+        "--team", type=str, help="Only games of this team abbreviation (e.g. TOR)"
+    )
+    export_parser.add_argument(
+        "--batch_size", type=int, default=65536, help="Rows per record batch"
+    )
+
+    # Subparser for profiling the pipeline
+    profile_parser = subparsers.add_parser(
+        "profile", help="Profile fetching, parsing and writing of games"
+    )
+    profile_parser.add_argument(
+        "--game_ids", type=int, nargs="+", help="Games to profile"
+    )
+    profile_parser.add_argument(
+        "--start_date", type=str, help="Profile the games from (YYYY-MM-DD)"
+    )
+    profile_parser.add_argument(
+        "--end_date", type=str, help="Profile the games until (YYYY-MM-DD)"
+    )
+    profile_parser.add_argument(
+        "--only_reg_season", action="store_true", help="Only regular season games"
+    )
+    profile_parser.add_argument(
+        "--out_path",
+        type=str,
+        default="./profile",
+        help="Output directory for profiles and collapsed stacks",
+    )
+    profile_parser.add_argument(
+        "--payload_dir",
+        type=str,
+        help="Directory of fixture payloads, used instead of fetching when present "
+        "and filled with fetched payloads otherwise",
+    )
+    profile_parser.add_argument(
+        "--write",
+        action="store_true",
+        help="Also profile writing the games to the database",
+    )
+    profile_parser.add_argument(
+        "--sample_interval_ms",
+        type=float,
+        default=1,
+        help="Interval of the stack sampler",
+    )
+    profile_parser.add_argument(
+        "--top", type=int, default=30, help="Functions listed per stage"
+    )
+
+    # Subparser for filling the game store from the database
+    game_store_parser = subparsers.add_parser(
+        "build_game_store",
+        help="Copy games in the database to the game store (needs --game_store_path)",
+    )
+    game_store_parser.add_argument(
+        "--seasons",
+        type=int,
+        nargs="+",
+        help="First year of each season to copy, all seasons if omitted",
+    )
+
+    # Subparser for rebuilding the player index of the game store
+    subparsers.add_parser(
+        "build_player_index",
+        help="Index the players of every game in the game store "
+        "(needs --game_store_path)",
+    )
+
+    # Subparser for polling games in progress
+    live_parser = subparsers.add_parser(
+        "live", help="Poll today's games and append plays as they happen"
+    )
+    live_parser.add_argument(
+        "--only_reg_season", action="store_true", help="Only regular season games"
+    )
+    live_parser.add_argument(
+        "--poll_interval",
+        type=float,
+        default=30,
+        help="Seconds to wait between polls",
+    )
+
+    # Subparser for queueing games for distributed workers
+    enqueue_parser = subparsers.add_parser(
+        "enqueue_jobs", help="Queue games in a date range for worker processes"
+    )
+    enqueue_parser.add_argument(
+        "--start_date", type=str, required=True, help="Start date (YYYY-MM-DD)"
+    )
+    enqueue_parser.add_argument(
+        "--end_date", type=str, required=True, help="End date (YYYY-MM-DD)"
+    )
+    enqueue_parser.add_argument(
+        "--only_reg_season", action="store_true", help="Only regular season games"
+    )
+
+    # Subparser for running a queue worker
+    worker_parser = subparsers.add_parser(
+        "worker", help="Claim and process queued games"
+    )
+    worker_parser.add_argument(
+        "--worker_id",
+        type=str,
+        default=f"{socket.gethostname()}-{os.getpid()}",
+        help="Unique id of this worker",
+    )
+    worker_parser.add_argument(
+        "--lease_seconds",
+        type=int,
+        default=300,
+        help="Seconds a claimed job is held without a heartbeat",
+    )
+    worker_parser.add_argument(
+        "--max_attempts", type=int, default=3, help="Attempts per job before failing"
+    )
+    worker_parser.add_argument(
+        "--poll_interval",
+        type=float,
+        default=10,
+        help="Seconds to wait when the queue is empty",
+    )
+    worker_parser.add_argument(
+        "--exit_when_empty",
+        action="store_true",
+        help="Exit instead of waiting when no jobs are left",
+    )
+
+    # Subparser for running updates as a daemon
+    daemon_parser = subparsers.add_parser(
+        "daemon", help="Run update_database on a schedule in a long-lived process"
+    )
+    daemon_parser.add_argument(
+        "--only_reg_season", action="store_true", help="Only regular season games"
+    )
+    daemon_parser.add_argument(
+        "--recheck_days",
+        type=int,
+        default=0,
+        help="Re-check already loaded games from the last n days for changes",
+    )
+    daemon_parser.add_argument(
+        "--interval_minutes",
+        type=float,
+        default=15,
+        help="Minutes between the starts of two updates",
+    )
+    daemon_parser.add_argument(
+        "--health_port",
+        type=int,
+        default=8080,
+        help="Local port of the /health status endpoint",
+    )
+    daemon_parser.add_argument(
+        "--no_pipeline",
+        action="store_true",
+        help="Write each game before fetching the next instead of in the background",
+    )
+
+    # Subparser for retrying jobs that ran out of attempts
+    subparsers.add_parser(
+        "requeue_failed_jobs", help="Give failed queue jobs a fresh set of attempts"
+    )
 
     args = parser.parse_args()
-    nhl_parser = NHLDataParser(args.logfile, args.db_cred_path)
+    nhl_parser = NHLDataParser(
+        args.logfile,
+        args.db_cred_path,
+        args.validator_path,
+        args.normalized,
+        args.game_store_path,
+        args.wide_events_table,
+        args.wide_events_path,
+    )
 
     if args.command == "create_csv_backup":
         nhl_parser.parse_data_to_csvs(
@@ -366,6 +1755,80 @@ if __name__ == "__main__":
             args.sql_file_path,
         )
     elif args.command == "build_from_csv_backup":
-        nhl_parser.build_db_from_csvs(args.sql_file_path)
+        nhl_parser.build_db_from_csvs(args.sql_file_path, args.csv_path)
+    elif args.command == "create_tables":
+        partition_seasons = None
+        if args.partition_from_season is not None:
+            partition_seasons = range(
+                args.partition_from_season,
+                (args.partition_to_season or args.partition_from_season) + 1,
+            )
+        nhl_parser.create_tables(partition_seasons, args.print_only)
     elif args.command == "update_database":
-        nhl_parser.update_database(args.only_reg_season)
+        nhl_parser.update_database(
+            args.only_reg_season, args.recheck_days, not args.no_pipeline
+        )
+    elif args.command == "retry_failed":
+        nhl_parser.retry_failed(args.max_attempts)
+    elif args.command == "reconcile_plays":
+        nhl_parser.reconcile_plays(args.seasons, args.tolerance_seconds)
+    elif args.command == "update_aggregates":
+        nhl_parser.update_aggregates()
+    elif args.command == "update_wide_events":
+        if not args.wide_events_table and args.wide_events_path is None:
+            parser.error(
+                "update_wide_events needs --wide_events_table or --wide_events_path"
+            )
+        nhl_parser.update_wide_events(seasons=args.seasons)
+    elif args.command == "build_shot_grids":
+        nhl_parser.build_shot_grids(args.seasons, args.out_path)
+    elif args.command == "export":
+        nhl_parser.export(
+            args.table,
+            args.out_path,
+            args.start_date,
+            args.end_date,
+            args.seasons,
+            args.team,
+            args.batch_size,
+        )
+    elif args.command == "profile":
+        if args.game_ids is None and args.start_date is None:
+            parser.error("profile needs --game_ids or --start_date")
+        nhl_parser.profile(
+            args.game_ids,
+            args.start_date,
+            args.end_date,
+            args.only_reg_season,
+            args.out_path,
+            args.payload_dir,
+            args.write,
+            args.sample_interval_ms,
+            args.top,
+        )
+    elif args.command == "build_game_store":
+        nhl_parser.build_game_store(args.seasons)
+    elif args.command == "build_player_index":
+        nhl_parser.build_player_index()
+    elif args.command == "live":
+        nhl_parser.live(args.only_reg_season, args.poll_interval)
+    elif args.command == "enqueue_jobs":
+        nhl_parser.enqueue_jobs(args.start_date, args.end_date, args.only_reg_season)
+    elif args.command == "requeue_failed_jobs":
+        nhl_parser.requeue_failed_jobs()
+    elif args.command == "daemon":
+        nhl_parser.run_daemon(
+            args.only_reg_season,
+            args.recheck_days,
+            args.interval_minutes,
+            args.health_port,
+            not args.no_pipeline,
+        )
+    elif args.command == "worker":
+        nhl_parser.run_worker(
+            args.worker_id,
+            args.lease_seconds,
+            args.max_attempts,
+            args.poll_interval,
+            args.exit_when_empty,
+        )
@@ -0,0 +1,224 @@
+import logging
+import os
+
+import polars as pl
+
+logger = logging.getLogger(__name__)
+
+GAMES_FILE = "games.arrow"
+# segments merged into one by save() once there are more than this
+MAX_SEGMENTS = 16
+
+# columns naming a player in each indexed game store table
+PLAYER_COLUMNS = {
+    "json_pbp_plays": ["p1", "p2", "p3", "goalie"],
+    "json_shift_info": ["player_id"],
+    "json_pbp_player_info": ["id"],
+    "html_pbp_on_ice": ["player_id"],
+}
+TABLE_ENUM = pl.Enum(list(PLAYER_COLUMNS))
+ENTRY_SCHEMA = {
+    "player_id": pl.Int32,
+    "game_id": pl.Int32,
+    "table": TABLE_ENUM,
+    "row": pl.UInt32,
+}
+GAMES_SCHEMA = {"game_id": pl.Int32, "table": TABLE_ENUM, "segment": pl.Int32}
+# segment of entries that are not saved yet
+PENDING = -1
+
+
+# (player_id, game_id, table, row) of every row of frames naming a player, rows
+# being offsets into the game's table as stored in the game store
+def player_entries(game_id: int, frames: dict[str, pl.DataFrame]) -> pl.DataFrame:
+    parts = []
+    for table_name, df in frames.items():
+        table = table_name.split(".")[-1]
+        for col in PLAYER_COLUMNS.get(table, []):
+            if col not in df.columns:
+                continue
+            parts.append(
+                df.lazy()
+                .with_row_index("row")
+                .select(
+                    pl.col(col).cast(pl.Int32).alias("player_id"),
+                    pl.lit(game_id, pl.Int32).alias("game_id"),
+                    pl.lit(table, TABLE_ENUM).alias("table"),
+                    pl.col("row").cast(pl.UInt32),
+                )
+                .filter(pl.col("player_id").is_not_null())
+            )
+    if not parts:
+        return pl.DataFrame(schema=ENTRY_SCHEMA)
+    # a player can appear in several columns of one row
+    return pl.concat(parts).unique().collect()
+
+
+# inverted index player_id -> (game_id, table, row) over the game store. entries
+# live in segments, uncompressed arrow files sorted by player_id that are memory
+# mapped and binary searched, so a lookup never scans other players' entries.
+# every save() writes the games indexed since the last one as a new segment and
+# games.arrow records which segment holds the current entries of each (game_id,
+# table), older entries of rewritten games are skipped until segments get merged
+class PlayerIndex:
+    root: str
+    segments: dict[int, pl.DataFrame] | None
+    # (game_id, table) -> segment holding its entries, PENDING for unsaved ones
+    games: dict[tuple[int, str], int] | None
+    pending: dict[int, pl.DataFrame]
+    dirty: bool
+
+    def __init__(self, root: str):
+        self.root = root
+        self.segments = None
+        self.games = None
+        self.pending = {}
+        self.dirty = False
+        self._games_df = None
+
+    def segment_path(self, segment: int) -> str:
+        return os.path.join(self.root, f"segment_{segment:06d}.arrow")
+
+    def _load(self) -> dict[tuple[int, str], int]:
+        if self.games is None:
+            self.games = {}
+            self.segments = {}
+            path = os.path.join(self.root, GAMES_FILE)
+            if os.path.exists(path):
+                for game_id, table, segment in pl.read_ipc(path).iter_rows():
+                    self.games[(game_id, table)] = segment
+            for segment in set(self.games.values()):
+                self.segments[segment] = pl.read_ipc(self.segment_path(segment))
+        return self.games
+
+    # current (game_id, table, segment) rows, entries of other segments are stale
+    def _games_frame(self) -> pl.DataFrame:
+        if self._games_df is None:
+            self._games_df = pl.DataFrame(
+                [(g, t, s) for (g, t), s in self._load().items()],
+                schema=GAMES_SCHEMA,
+                orient="row",
+            )
+        return self._games_df
+
+    # replaces the entries of the tables in frames of a game
+    def update_game(self, game_id: int, frames: dict[str, pl.DataFrame]):
+        games = self._load()
+        entries = player_entries(game_id, frames)
+        tables = [
+            t for t in (name.split(".")[-1] for name in frames) if t in PLAYER_COLUMNS
+        ]
+        if not tables:
+            return
+
+        pending = self.pending.get(game_id)
+        if pending is not None:
+            entries = pl.concat(
+                [pending.filter(~pl.col("table").is_in(tables)), entries]
+            )
+        self.pending[game_id] = entries
+        for table in tables:
+            games[(game_id, table)] = PENDING
+        self._games_df = None
+        self.dirty = True
+
+    def delete_game(self, game_id: int):
+        games = self._load()
+        for key in [k for k in games if k[0] == game_id]:
+            del games[key]
+        self.pending.pop(game_id, None)
+        self._games_df = None
+        self.dirty = True
+
+    # (game_id, table, row) entries of a player ordered by game, table and row
+    def lookup(self, player_id: int) -> pl.DataFrame:
+        self._load()
+        parts = []
+        for segment, df in self.segments.items():
+            ids = df["player_id"]
+            start = ids.search_sorted(player_id, "left")
+            end = ids.search_sorted(player_id, "right")
+            if end > start:
+                parts.append(
+                    df.slice(start, end - start).with_columns(
+                        pl.lit(segment, pl.Int32).alias("segment")
+                    )
+                )
+        for entries in self.pending.values():
+            parts.append(
+                entries.filter(pl.col("player_id") == player_id).with_columns(
+                    pl.lit(PENDING, pl.Int32).alias("segment")
+                )
+            )
+        if not parts:
+            return pl.DataFrame(schema=ENTRY_SCHEMA).drop("player_id")
+
+        return (
+            pl.concat(parts)
+            .join(self._games_frame(), on=["game_id", "table", "segment"])
+            .select("game_id", "table", "row")
+            .sort("game_id", "table", "row")
+        )
+
+    # writes the pending entries as a new segment, merging all segments into one
+    # once there are more than MAX_SEGMENTS
+    def save(self):
+        if not self.dirty:
+            return
+
+        games = self._load()
+        os.makedirs(self.root, exist_ok=True)
+        segment = max(self.segments, default=-1) + 1
+        if self.pending:
+            self._write_segment(segment, pl.concat(list(self.pending.values())))
+            for key, s in games.items():
+                if s == PENDING:
+                    games[key] = segment
+            self.pending = {}
+
+        self._write_games()
+
+        # segments without current entries are dropped
+        live = set(games.values())
+        for s in [s for s in self.segments if s not in live]:
+            self._remove_segment(s)
+        if len(self.segments) > MAX_SEGMENTS:
+            self._merge(segment + 1)
+        self.dirty = False
+        logger.info(
+            f"Saved player index of {len(games)} game tables in "
+            f"{len(self.segments)} segments"
+        )
+
+    def _merge(self, segment: int):
+        current = pl.concat(
+            [
+                df.with_columns(pl.lit(s, pl.Int32).alias("segment"))
+                for s, df in self.segments.items()
+            ]
+        ).join(self._games_frame(), on=["game_id", "table", "segment"])
+        old = list(self.segments)
+        self._write_segment(segment, current.drop("segment"))
+        self.games = {key: segment for key in self.games}
+        # games.arrow must not point at the removed segments
+        self._write_games()
+        for s in old:
+            self._remove_segment(s)
+
+    def _write_segment(self, segment: int, entries: pl.DataFrame):
+        path = self.segment_path(segment)
+        entries.sort("player_id", "game_id", "table", "row").write_ipc(
+            path + ".tmp", compression="uncompressed"
+        )
+        os.replace(path + ".tmp", path)
+        self.segments[segment] = pl.read_ipc(path)
+
+    def _remove_segment(self, segment: int):
+        self.segments.pop(segment)
+        os.remove(self.segment_path(segment))
+
+    def _write_games(self):
+        path = os.path.join(self.root, GAMES_FILE)
+        self._games_df = None
+        self._games_frame().write_ipc(path + ".tmp", compression="uncompressed")
+        os.replace(path + ".tmp", path)
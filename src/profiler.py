@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import cProfile
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from nhl_data_parser import NHLDataParser
+
+logger = logging.getLogger(__name__)
+
+# fixture file name suffix of each source's payload
+PAYLOAD_FILES = {
+    "json_pbp": "json_pbp.json",
+    "json_shift": "json_shift.json",
+    "html_pbp": "html_pbp.HTM",
+}
+
+
+# samples the call stack of one thread every interval seconds. stacks are kept in
+# collapsed form ("stage;file:function;file:function count" per line), the input
+# of flamegraph.pl, speedscope and similar tools
+class StackSampler:
+    interval: float
+    # prefixed to every sampled stack, set while a stage runs
+    stage: str | None
+    stacks: Counter
+
+    def __init__(self, interval: float, thread_id: int | None = None):
+        self.interval = interval
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.stage = None
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            stage = self.stage
+            frame = sys._current_frames().get(self.thread_id)
+            if stage is None or frame is None:
+                continue
+
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            stack.append(stage)
+            self.stacks[";".join(reversed(stack))] += 1
+
+    def write(self, path: str):
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+# runs pipeline stages under a cProfile profile per stage, recording wall time and
+# the tracemalloc allocation peak of every call
+class StageProfiler:
+    profiles: dict[str, cProfile.Profile]
+    seconds: defaultdict[str, float]
+    calls: Counter
+    peak_bytes: defaultdict[str, int]
+    sampler: StackSampler | None
+
+    def __init__(self, sampler: StackSampler | None = None):
+        self.profiles = {}
+        self.seconds = defaultdict(float)
+        self.calls = Counter()
+        self.peak_bytes = defaultdict(int)
+        self.sampler = sampler
+
+    def run(self, stage: str, fn, *args):
+        profile = self.profiles.setdefault(stage, cProfile.Profile())
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        if self.sampler is not None:
+            self.sampler.stage = stage
+
+        start = time.perf_counter()
+        profile.enable()
+        try:
+            return fn(*args)
+        finally:
+            profile.disable()
+            self.seconds[stage] += time.perf_counter() - start
+            self.calls[stage] += 1
+            if self.sampler is not None:
+                self.sampler.stage = None
+            if tracing:
+                self.peak_bytes[stage] = max(
+                    self.peak_bytes[stage], tracemalloc.get_traced_memory()[1] - base
+                )
+
+    def summary(self) -> str:
+        lines = [
+            f"{'stage':<22} {'calls':>6} {'total s':>9} {'mean ms':>9} {'peak MB':>9}"
+        ]
+        for stage in self.profiles:
+            lines.append(
+                f"{stage:<22} {self.calls[stage]:6d} {self.seconds[stage]:9.3f}"
+                f" {self.seconds[stage] / self.calls[stage] * 1000:9.1f}"
+                f" {self.peak_bytes[stage] / 2**20:9.2f}"
+            )
+        return "\n".join(lines)
+
+    # <stage>.prof (pstats/snakeviz input) and <stage>.txt with the top functions
+    # by cumulative time, per stage
+    def write(self, out_path: str, top: int):
+        for stage, profile in self.profiles.items():
+            profile.dump_stats(os.path.join(out_path, stage + ".prof"))
+            with open(os.path.join(out_path, stage + ".txt"), "w") as f:
+                pstats.Stats(profile, stream=f).sort_stats("cumulative").print_stats(
+                    top
+                )
+        with open(os.path.join(out_path, "summary.txt"), "w") as f:
+            f.write(self.summary() + "\n")
+
+
+def payload_path(payload_dir: str, game_id: int, source: str) -> str:
+    return os.path.join(payload_dir, f"{game_id}_{PAYLOAD_FILES[source]}")
+
+
+# payload of a game's source, read from payload_dir when it holds a fixture for
+# it and fetched otherwise. fetched payloads are saved to payload_dir so later
+# runs can profile the same input offline
+def load_payload(
+    nhl_parser: NHLDataParser, game_id: int, source: str, payload_dir: str | None
+) -> bytes:
+    path = payload_path(payload_dir, game_id, source) if payload_dir else None
+    if path is not None and os.path.exists(path):
+        with open(path, "rb") as f:
+            return f.read()
+
+    # profiled payloads are never stored, so they keep no validators
+    content = nhl_parser.fetcher.get(
+        nhl_parser.source_url(game_id, source), record=False
+    ).content
+    if path is not None:
+        with open(path, "wb") as f:
+            f.write(content)
+    return content
+
+
+# profiles games stage by stage: "<source>.fetch", "<source>.parse" and
+# "<source>.frames" for every source, "on_ice.resolve" and, with write,
+# "all.write". per stage profiles, collapsed stacks (stacks.folded) and a summary
+# of stage times and tracemalloc allocation peaks (summary.txt) go to out_path
+def profile_games(
+    nhl_parser: NHLDataParser,
+    game_ids: list[int],
+    out_path: str,
+    payload_dir: str | None = None,
+    write: bool = False,
+    sample_interval: float = 0.001,
+    top: int = 30,
+):
+    from nhl_data_parser import SOURCES
+
+    os.makedirs(out_path, exist_ok=True)
+    if payload_dir is not None:
+        os.makedirs(payload_dir, exist_ok=True)
+
+    sampler = StackSampler(sample_interval)
+    profiler = StageProfiler(sampler)
+    tracemalloc.start()
+    sampler.start()
+    try:
+        for game_id in game_ids:
+            frames = {}
+            try:
+                for source in SOURCES:
+                    content = profiler.run(
+                        source + ".fetch",
+                        load_payload,
+                        nhl_parser,
+                        game_id,
+                        source,
+                        payload_dir,
+                    )
+                    out = profiler.run(
+                        source + ".parse",
+                        nhl_parser.parse_payload,
+                        game_id,
+                        source,
+                        content,
+                    )
+                    frames.update(
+                        profiler.run(
+                            source + ".frames", nhl_parser.source_frames, source, out
+                        )
+                    )
+                frames = profiler.run(
+                    "on_ice.resolve", nhl_parser.resolve_on_ice, game_id, frames
+                )
+                if write:
+                    profiler.run(
+                        "all.write", nhl_parser.replace_game_rows, game_id, frames
+                    )
+            except Exception as err:
+                logging.error(f"Profiling game {game_id} failed: {err!r}")
+                continue
+            logger.info(f"Profiled game {game_id}")
+    finally:
+        sampler.stop()
+        tracemalloc.stop()
+
+    profiler.write(out_path, top)
+    sampler.write(os.path.join(out_path, "stacks.folded"))
+
+    logger.info("Stage summary\n" + profiler.summary())
+    logger.info(f"Stage profiles, stacks.folded and summary.txt written to {out_path}")
@@ -0,0 +1,118 @@
+import logging
+
+import polars as pl
+
+from db_connector import DBConnector
+from table_schemas import season_game_ids
+
+logger = logging.getLogger(__name__)
+
+ALIGNMENT_TABLE = "nhl_api_data.pbp_play_alignment"
+
+
+# "MM:SS" (or "M:SS") clock string to seconds
+def clock_to_seconds(col: str) -> pl.Expr:
+    parts = pl.col(col).str.split_exact(":", 1)
+    return parts.struct.field("field_0").cast(pl.Int32) * 60 + parts.struct.field(
+        "field_1"
+    ).cast(pl.Int32)
+
+
+def _prepare(
+    plays: pl.LazyFrame, n_col: str, time_col: str, event_col: str
+) -> pl.LazyFrame:
+    return (
+        plays.select(
+            pl.col("game_id").cast(pl.Int32),
+            pl.col("period").cast(pl.Int8),
+            pl.col(n_col).cast(pl.Int16).alias("n"),
+            clock_to_seconds(time_col).alias("seconds"),
+            pl.col(event_col).cast(pl.String).alias("event_type"),
+        )
+        .filter(pl.col("event_type").is_not_null() & (pl.col("event_type") != ""))
+        # events of the same type logged in the same second are told apart by
+        # their order of appearance
+        .sort("game_id", "n")
+        .with_columns(
+            pl.int_range(pl.len())
+            .over("game_id", "period", "event_type", "seconds")
+            .alias("k")
+        )
+        .sort("seconds")
+    )
+
+
+# maps html_pbp_plays rows onto json_pbp_plays rows of the same games. events are
+# matched on game, period and event type (the html event column already holds
+# html_string_to_event_type mapped into the json vocabulary) with an as-of join
+# on elapsed seconds in the period, tolerating tolerance_seconds of clock drift
+# between the two reports. html rows without a json counterpart are dropped
+def align_plays(
+    html_plays: pl.DataFrame | pl.LazyFrame,
+    json_plays: pl.DataFrame | pl.LazyFrame,
+    tolerance_seconds: int = 2,
+) -> pl.DataFrame:
+    html = _prepare(html_plays.lazy(), "n", "time_elapsed", "event")
+    json = _prepare(json_plays.lazy(), "n", "time_in_period", "event_type")
+
+    matched = html.join_asof(
+        json.with_columns(pl.col("seconds").alias("json_seconds")),
+        on="seconds",
+        by=["game_id", "period", "event_type", "k"],
+        strategy="nearest",
+        tolerance=tolerance_seconds,
+        suffix="_json",
+        # both sides are sorted on seconds above
+        check_sortedness=False,
+    ).filter(pl.col("n_json").is_not_null())
+
+    # with drift two html events can land on the same json event, the closer wins
+    return (
+        matched.with_columns(
+            (pl.col("json_seconds") - pl.col("seconds"))
+            .cast(pl.Int16)
+            .alias("time_diff")
+        )
+        .sort(pl.col("time_diff").abs())
+        .unique(["game_id", "n_json"], keep="first")
+        .select(
+            "game_id",
+            pl.col("n").alias("html_n"),
+            pl.col("n_json").alias("json_n"),
+            "time_diff",
+        )
+        .sort("game_id", "html_n")
+        .collect()
+    )
+
+
+# aligns every game of a season and replaces that season's mapping rows
+def reconcile_season(db: DBConnector, season: int, tolerance_seconds: int = 2) -> int:
+    first_game_id, last_game_id = season_game_ids(season)
+
+    html_plays = db.get_query_result(
+        "SELECT game_id, n, period, time_elapsed, event "
+        "FROM nhl_api_data.html_pbp_plays WHERE game_id BETWEEN %s AND %s",
+        (first_game_id, last_game_id),
+    )
+    json_plays = db.get_query_result(
+        "SELECT game_id, n, period, time_in_period, event_type "
+        "FROM nhl_api_data.json_pbp_plays WHERE game_id BETWEEN %s AND %s",
+        (first_game_id, last_game_id),
+    )
+    if html_plays.is_empty() or json_plays.is_empty():
+        logger.warning(f"No plays to align for season {season}")
+        return 0
+
+    mapping = align_plays(html_plays, json_plays, tolerance_seconds)
+    logger.info(
+        f"Aligned {mapping.height} of {html_plays.height} html plays for season {season}"
+    )
+
+    with db.transaction():
+        db.execute(
+            f"DELETE FROM {ALIGNMENT_TABLE} WHERE game_id BETWEEN %s AND %s",
+            (first_game_id, last_game_id),
+        )
+        db.push_dataframe_to_db(mapping, ALIGNMENT_TABLE)
+    return mapping.height
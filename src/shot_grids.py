@@ -0,0 +1,164 @@
+import logging
+import os
+
+import polars as pl
+
+from db_connector import DBConnector
+from table_schemas import season_game_ids, season_of
+
+logger = logging.getLogger(__name__)
+
+# the rink spans x in [-100, 100] and y in [-42.5, 42.5] feet, binned in 5 foot
+# cells. grids are (GRID_HEIGHT, GRID_WIDTH) arrays indexed [y bin][x bin]
+CELL_FEET = 5
+RINK_HALF_LENGTH = 100
+RINK_HALF_WIDTH = 42.5
+GRID_WIDTH = 40
+GRID_HEIGHT = 17
+
+SHOT_EVENTS = ["shot-on-goal", "missed-shot", "goal"]
+# shot_type of the grids over all shot types, untyped shots keep a null shot_type
+ALL_SHOT_TYPES = "all"
+
+# grid level -> (play column, key column)
+LEVELS = {
+    "player": ("p1", "player_id"),
+    "team": ("event_owner_team_id", "team_id"),
+}
+
+
+# flips shots so every team attacks towards positive x. a team switches ends
+# every period, so its side is taken per game and period from the median x of
+# its shots
+def normalize_direction(shots: pl.LazyFrame) -> pl.LazyFrame:
+    flip = (
+        pl.when(
+            pl.col("x").median().over("game_id", "period", "event_owner_team_id") < 0
+        )
+        .then(-1)
+        .otherwise(1)
+    )
+    return shots.with_columns(
+        (pl.col("x") * flip).alias("x"), (pl.col("y") * flip).alias("y")
+    )
+
+
+def _cell() -> pl.Expr:
+    x_bin = (
+        ((pl.col("x") + RINK_HALF_LENGTH) // CELL_FEET)
+        .clip(0, GRID_WIDTH - 1)
+        .cast(pl.Int32)
+    )
+    y_bin = (
+        ((pl.col("y") + RINK_HALF_WIDTH) // CELL_FEET)
+        .clip(0, GRID_HEIGHT - 1)
+        .cast(pl.Int32)
+    )
+    return (y_bin * GRID_WIDTH + x_bin).alias("cell")
+
+
+# shot attempt and goal grids per season, key (player or team) and shot type.
+# rows with shot_type ALL_SHOT_TYPES hold the grids of all shot types together.
+# shootout attempts are left out
+def shot_grids(plays: pl.LazyFrame, level: str) -> pl.DataFrame:
+    play_col, key_col = LEVELS[level]
+
+    shots = normalize_direction(
+        plays.filter(
+            pl.col("event_type").cast(pl.String).is_in(SHOT_EVENTS)
+            & (pl.col("period_type").cast(pl.String) != "SO")
+            & pl.col("x").is_not_null()
+            & pl.col("y").is_not_null()
+            & pl.col(play_col).is_not_null()
+        )
+    ).select(
+        season_of(pl.col("game_id")).cast(pl.Int16).alias("season"),
+        pl.col(play_col).cast(pl.Int32).alias(key_col),
+        pl.col("shot_type").cast(pl.String),
+        _cell(),
+        (pl.col("event_type").cast(pl.String) == "goal").alias("is_goal"),
+    )
+    shots = pl.concat(
+        [shots, shots.with_columns(pl.lit(ALL_SHOT_TYPES).alias("shot_type"))]
+    )
+
+    keys = ["season", key_col, "shot_type"]
+    counts = shots.group_by(*keys, "cell").agg(
+        pl.len().alias("attempts"), pl.col("is_goal").sum().alias("goals")
+    )
+
+    # densify to every cell of every key before packing the cells into arrays
+    return (
+        counts.select(keys)
+        .unique()
+        .join(
+            pl.LazyFrame(
+                {"cell": range(GRID_WIDTH * GRID_HEIGHT)}, schema={"cell": pl.Int32}
+            ),
+            how="cross",
+        )
+        .join(counts, on=[*keys, "cell"], how="left", nulls_equal=True)
+        .sort(*keys, "cell", nulls_last=True)
+        .group_by(keys, maintain_order=True)
+        .agg(pl.col(c).fill_null(0).cast(pl.UInt16) for c in ["attempts", "goals"])
+        .with_columns(
+            pl.col(c)
+            .list.to_array(GRID_WIDTH * GRID_HEIGHT)
+            .reshape((-1, GRID_HEIGHT, GRID_WIDTH))
+            for c in ["attempts", "goals"]
+        )
+        .collect()
+    )
+
+
+def grid_path(out_path: str, level: str, season: int) -> str:
+    return os.path.join(out_path, f"shot_grids_{level}_{season}.parquet")
+
+
+# rebuilds the player and team grid files of each season
+def build_shot_grids(db: DBConnector, seasons: list[int], out_path: str):
+    os.makedirs(out_path, exist_ok=True)
+    for season in seasons:
+        plays = db.get_query_result(
+            "SELECT game_id, period, period_type, event_type, event_owner_team_id, "
+            "p1, shot_type, x, y FROM nhl_api_data.json_pbp_plays "
+            "WHERE game_id BETWEEN %s AND %s AND event_type IN (%s, %s, %s)",
+            (*season_game_ids(season), *SHOT_EVENTS),
+        )
+        if plays.is_empty():
+            logger.warning(f"No shots to grid for season {season}")
+            continue
+
+        for level in LEVELS:
+            grids = shot_grids(plays.lazy(), level)
+            path = grid_path(out_path, level, season)
+            grids.write_parquet(path + ".tmp")
+            os.replace(path + ".tmp", path)
+            logger.info(f"Wrote {grids.height} {level} shot grids for season {season}")
+
+
+# attempts and goals grids (lists of GRID_HEIGHT rows of GRID_WIDTH counts) of
+# one player or team, over all shot types by default and of the shots without a
+# type when shot_type is None
+def load_shot_grid(
+    out_path: str,
+    level: str,
+    season: int,
+    key: int,
+    shot_type: str | None = ALL_SHOT_TYPES,
+) -> tuple[list[list[int]], list[list[int]]] | None:
+    _, key_col = LEVELS[level]
+    shot_type_filter = (
+        pl.col("shot_type").is_null()
+        if shot_type is None
+        else pl.col("shot_type") == shot_type
+    )
+    row = (
+        pl.scan_parquet(grid_path(out_path, level, season))
+        .filter((pl.col(key_col) == key) & shot_type_filter)
+        .select("attempts", "goals")
+        .collect()
+    )
+    if row.is_empty():
+        return None
+    return row["attempts"][0].to_list(), row["goals"][0].to_list()
@@ -0,0 +1,164 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass, field
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+# base urls of the scraped endpoints, overridable to point the scraper at a stand
+# in such as benchmarks/nhl_api_stub.py
+API_WEB_URL = os.environ.get("NHL_API_WEB_URL", "https://api-web.nhle.com")
+STATS_API_URL = os.environ.get("NHL_STATS_API_URL", "https://api.nhle.com")
+HTML_REPORTS_URL = os.environ.get("NHL_HTML_REPORTS_URL", "https://www.nhl.com")
+
+# throttled (429) and failed (5xx) requests are retried with backoff, honouring
+# Retry-After
+RETRY = Retry(
+    total=3,
+    backoff_factor=0.5,
+    status_forcelist=[429, 500, 502, 503, 504],
+    allowed_methods=["GET"],
+    respect_retry_after_header=True,
+    raise_on_status=False,
+)
+
+
+# fetched_at (epoch seconds) is when the payload was last found changed, entries
+# saved before it existed count as fetched when they are loaded
+@dataclass
+class Validator:
+    etag: str | None
+    last_modified: str | None
+    content_hash: str
+    fetched_at: float = field(default_factory=time.time)
+
+
+class Fetcher:
+    session: requests.Session
+    validator_path: str | None
+    validators: dict[str, Validator]
+    pending: dict[str, Validator]
+    # whether validators changed since they were loaded or last saved
+    unsaved: bool
+
+    def __init__(self, validator_path: str | None = None) -> None:
+        self.session = requests.Session()
+        adapter = HTTPAdapter(max_retries=RETRY)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.validator_path = validator_path
+        self.validators = {}
+        self.pending = {}
+        self.unsaved = False
+
+        if validator_path is not None and os.path.exists(validator_path):
+            with open(validator_path, "r") as f:
+                self.validators = {
+                    url: Validator(**v) for url, v in json.load(f).items()
+                }
+
+    # fetches url, when conditional is set a request is only considered new if the
+    # server doesn't answer 304 and the body differs from the last committed fetch.
+    # returns None for unchanged payloads. without record the validators are
+    # still sent but the body isn't compared and no validator is kept, for urls
+    # that are never fetched conditionally or whose caller records a hash of
+    # the parsed payload itself (see record)
+    def get(
+        self, url: str, conditional: bool = False, record: bool = True
+    ) -> requests.Response | None:
+        cached = self.validators.get(url) if conditional else None
+
+        headers = {}
+        if cached is not None:
+            if cached.etag is not None:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified is not None:
+                headers["If-Modified-Since"] = cached.last_modified
+
+        res = self.session.get(url, headers=headers)
+        if res.status_code == 304:
+            logger.info(f"{url} not modified (304)")
+            return None
+        res.raise_for_status()
+
+        if not record:
+            return res
+
+        if not self.record(
+            url,
+            hashlib.sha256(res.content).hexdigest(),
+            conditional,
+            res.headers.get("ETag"),
+            res.headers.get("Last-Modified"),
+        ):
+            return None
+        return res
+
+    # records the content hash of url's payload, for payloads fetched with get
+    # without record or as part of another request (e.g. split out of a batch).
+    # returns False when conditional is set and the hash matches the last
+    # committed fetch. validators only become active once the caller has stored
+    # the payload and commits them
+    def record(
+        self,
+        url: str,
+        content_hash: str,
+        conditional: bool = False,
+        etag: str | None = None,
+        last_modified: str | None = None,
+    ) -> bool:
+        cached = self.validators.get(url) if conditional else None
+        if cached is not None and cached.content_hash == content_hash:
+            logger.info(f"{url} content unchanged")
+            return False
+
+        self.pending[url] = Validator(
+            etag=etag, last_modified=last_modified, content_hash=content_hash
+        )
+        return True
+
+    # commits the pending validators, or validators taken earlier with
+    # take_pending
+    def commit(self, validators: dict[str, Validator] | None = None) -> None:
+        if validators is None:
+            validators, self.pending = self.pending, {}
+        if validators:
+            self.validators.update(validators)
+            self.unsaved = True
+
+    # hands the pending validators to the caller, for payloads that are stored
+    # later (see db_writer.py)
+    def take_pending(self) -> dict[str, Validator]:
+        pending, self.pending = self.pending, {}
+        return pending
+
+    def discard(self) -> None:
+        self.pending.clear()
+
+    # drops the validators of payloads last found changed more than max_age ago,
+    # which are no longer fetched conditionally. returns how many were dropped
+    def prune(self, max_age_seconds: float) -> int:
+        cutoff = time.time() - max_age_seconds
+        stale = [url for url, v in self.validators.items() if v.fetched_at < cutoff]
+        for url in stale:
+            del self.validators[url]
+        if stale:
+            self.unsaved = True
+        return len(stale)
+
+    # writes the validators to validator_path if they changed since the last save
+    def save(self) -> None:
+        if self.validator_path is None or not self.unsaved:
+            return
+
+        tmp_path = self.validator_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({url: asdict(v) for url, v in self.validators.items()}, f)
+        os.replace(tmp_path, self.validator_path)
+        self.unsaved = False
@@ -1,15 +1,18 @@
 import polars as pl
 from sub_parsers.json_pbp_parser import EventType, event_type_to_string
 from dataclasses import dataclass
+from sub_parsers.fetcher import HTML_REPORTS_URL, Fetcher
 from bs4 import BeautifulSoup
-import requests
+from table_schemas import table_frame
 import re
 
+ON_ICE_SIDES = ["away", "home"]
+
 @dataclass
 class PbpHtmlPlay:
     game_id: str
-    n: str
-    period: str
+    n: int
+    period: int
     strength: str
     time_elapsed: str
     event: EventType | None
@@ -51,7 +54,7 @@ class PbpHtml:
         }
 
         for play in self.list_of_plays:
-            df["game_id"].append(play.game_id)
+            df["game_id"].append(int(play.game_id))
             df["n"].append(play.n)
             df["period"].append(play.period)
             df["strength"].append(play.strength)
@@ -59,32 +62,69 @@ class PbpHtml:
             df["event"].append(event_type_to_string(play.event))
             df["description"].append(play.description)
             for i in range(1, 10):
-                if i < len(play.away_on_ice_player_sweater_num):
-                    df["away_on_ice_p" + str(i)].append(play.away_on_ice_player_sweater_num[i])
+                if i <= len(play.away_on_ice_player_sweater_num):
+                    df["away_on_ice_p" + str(i)].append(play.away_on_ice_player_sweater_num[i-1])
                 else:
                     df["away_on_ice_p" + str(i)].append(None)
 
             for i in range(1, 10):
-                if i < len(play.home_on_ice_player_sweater_num):
-                    df["home_on_ice_p" + str(i)].append(play.home_on_ice_player_sweater_num[i])
+                if i <= len(play.home_on_ice_player_sweater_num):
+                    df["home_on_ice_p" + str(i)].append(play.home_on_ice_player_sweater_num[i-1])
                 else:
                     df["home_on_ice_p" + str(i)].append(None)
         
         return ((
-            pl.from_dict(df).fill_null("")
+            table_frame("html_pbp_plays", df).with_columns(pl.col(pl.String).fill_null(""))
         )) 
 
+    # one row per player on the ice for each play, sweater numbers still need
+    # resolve_on_ice_player_ids to become player ids
+    def on_ice_to_df(self) -> pl.DataFrame:
+        df = {
+            "game_id": [],
+            "n": [],
+            "side": [],
+            "sweater_number": []
+        }
+
+        for play in self.list_of_plays:
+            for side, sweater_nums in [
+                ("away", play.away_on_ice_player_sweater_num),
+                ("home", play.home_on_ice_player_sweater_num)
+            ]:
+                for num in sweater_nums:
+                    if num != "":
+                        df["game_id"].append(int(play.game_id))
+                        df["n"].append(play.n)
+                        df["side"].append(side)
+                        df["sweater_number"].append(int(num))
+
+        return table_frame("html_pbp_on_ice", df, extra_columns = {
+            "sweater_number": pl.Int16
+        })
+
 
 class NHLHtmlPbpParser:
+    fetcher: Fetcher
 
-    def __init__(self) -> None:
-        pass
+    def __init__(self, fetcher: Fetcher | None = None) -> None:
+        self.fetcher = fetcher if fetcher is not None else Fetcher()
 
-    def parse(self, game_id: str) -> PbpHtml:
+    def url(self, game_id: str) -> str:
         season = game_id[0:4] + str(int(game_id[0:4]) + 1)
-        url = "https://www.nhl.com/scores/htmlreports/"+ season + "/PL" + game_id[4:] + ".HTM"
+        return HTML_REPORTS_URL + "/scores/htmlreports/"+ season + "/PL" + game_id[4:] + ".HTM"
+
+    # returns None if conditional is set and the report hasn't changed
+    def parse(self, game_id: str, conditional: bool = False) -> PbpHtml | None:
+        url = self.url(game_id)
+
+        res = self.fetcher.get(url, conditional)
+        if res is None:
+            return None
 
-        data = requests.get(url).text
+        return self.parse_payload(game_id, res.text)
+
+    def parse_payload(self, game_id: str, data: str | bytes) -> PbpHtml:
         soup = BeautifulSoup(data, 'html.parser')
 
         out = PbpHtml([])
@@ -99,7 +139,7 @@ class NHLHtmlPbpParser:
                     if i == 0:
                         n = int(td[i].get_text())
                     elif i == 1:
-                        period = td[i].get_text()
+                        period = int(td[i].get_text())
                     elif i == 2:
                         strength = td[i].get_text(strip=True)
                     elif i == 3:
@@ -129,7 +169,7 @@ class NHLHtmlPbpParser:
                                 home_on_ice_player_sweater_num.append("")
                 out.list_of_plays.append(PbpHtmlPlay(
                     game_id = game_id,
-                    n = str(n),
+                    n = n,
                     period = period,
                     strength = strength,
                     time_elapsed = time_elapsed,
@@ -143,58 +183,37 @@ class NHLHtmlPbpParser:
 
 
 def pbp_html_list_to_df(dat: PbpHtml) -> pl.DataFrame:
-    df = {
-        "game_id": [],
-        "n": [],
-        "period": [],
-        "strength": [],
-        "time_elapsed": [],
-        "event": [],
-        "description": [],
-        "away_on_ice_p1": [],
-        "away_on_ice_p2": [],
-        "away_on_ice_p3": [],
-        "away_on_ice_p4": [],
-        "away_on_ice_p5": [],
-        "away_on_ice_p6": [],
-        "away_on_ice_p7": [],
-        "away_on_ice_p8": [],
-        "away_on_ice_p9": [],
-        "home_on_ice_p1": [],
-        "home_on_ice_p2": [],
-        "home_on_ice_p3": [],
-        "home_on_ice_p4": [],
-        "home_on_ice_p5": [],
-        "home_on_ice_p6": [],
-        "home_on_ice_p7": [],
-        "home_on_ice_p8": [],
-        "home_on_ice_p9": []
-    }
-
-    for play in dat.list_of_plays:
-        df["game_id"].append(play.game_id)
-        df["n"].append(play.n)
-        df["period"].append(play.period)
-        df["strength"].append(play.strength)
-        df["time_elapsed"].append(play.time_elapsed)
-        df["event"].append(event_type_to_string(play.event))
-        df["description"].append(play.description)
-        for i in range(1, 10):
-            if i < len(play.away_on_ice_player_sweater_num):
-                df["away_on_ice_p" + str(i)].append(play.away_on_ice_player_sweater_num[i])
-            else:
-                df["away_on_ice_p" + str(i)].append(None)
-
-        for i in range(1, 10):
-            if i < len(play.home_on_ice_player_sweater_num):
-                df["home_on_ice_p" + str(i)].append(play.home_on_ice_player_sweater_num[i])
-            else:
-                df["home_on_ice_p" + str(i)].append(None)
-    
-    return ((
-        pl.from_dict(df).fill_null("")
-    ))
-
+    return dat.to_df()
+
+
+
+# swaps sweater numbers of on_ice_to_df rows for player ids using each game's
+# roster (json_pbp_player_info) and the side's team id (json_pbp_game_info).
+# sweater numbers missing from the roster are dropped
+def resolve_on_ice_player_ids(
+    on_ice: pl.DataFrame, players: pl.DataFrame, game_info: pl.DataFrame
+) -> pl.DataFrame:
+    sides = (
+        game_info.select(
+            pl.col("game_id").cast(pl.Int32),
+            pl.col("away_team_id").cast(pl.Int16).alias("away"),
+            pl.col("home_team_id").cast(pl.Int16).alias("home")
+        )
+        .unpivot(index = "game_id", variable_name = "side", value_name = "team_id")
+        .with_columns(pl.col("side").cast(pl.Enum(ON_ICE_SIDES)))
+    )
+    roster = players.select(
+        pl.col("game_id").cast(pl.Int32),
+        pl.col("team_id").cast(pl.Int16),
+        pl.col("sweater_number").cast(pl.Int16),
+        pl.col("id").cast(pl.Int32).alias("player_id")
+    )
+
+    return (
+        on_ice.join(sides, on = ["game_id", "side"], how = "inner")
+        .join(roster, on = ["game_id", "team_id", "sweater_number"], how = "inner")
+        .select("game_id", "n", "side", "player_id")
+    )
 
 
 def html_string_to_event_type(s: str) -> EventType | None:
@@ -1,8 +1,10 @@
 import polars as pl
 from enum import Enum
 from dataclasses import dataclass
-import requests
+import datetime
 from collections.abc import Iterable
+from sub_parsers.fetcher import API_WEB_URL, Fetcher
+from sub_parsers import json_schema
 
 EventType = Enum('EventType', [
     "PeriodStart", "Faceoff", "ShotOnGoal", "Stoppage",
@@ -44,6 +46,8 @@ class Player:
 @dataclass
 class Play:
     n: int
+    # stable id of the play in the feed, n shifts when plays are removed
+    event_id: int | None
     event_type: EventType | None
     period: int
     period_type: str
@@ -82,10 +86,12 @@ class Game:
     plays: list[Play]
 
     def game_info_to_df(self) -> pl.DataFrame:
-        return pl.DataFrame({
+        from table_schemas import table_frame
+
+        return table_frame("json_pbp_game_info", {
             "game_id": self.game_id,
             "season": self.season,
-            "date": self.date,
+            "date": datetime.date.fromisoformat(self.date),
             "away_team_name": self.away_team.name,
             "away_team_abrv": self.away_team.abrv,
             "away_team_id": self.away_team.id,
@@ -111,7 +117,8 @@ class Game:
             "last_name": [],
             "id": [],
             "position": [],
-            "sweater_number": []
+            "sweater_number": [],
+            "game_id": []
         }
 
         for player in self.players:
@@ -121,8 +128,11 @@ class Game:
             df["id"].append(player.id)
             df["position"].append(player_position_to_string(player.position))
             df["sweater_number"].append(player.sweater_number)
+            df["game_id"].append(self.game_id)
+
+        from table_schemas import table_frame
 
-        return pl.DataFrame(df).with_columns(pl.lit(self.game_id).alias("game_id"))
+        return table_frame("json_pbp_player_info", df)
 
     def plays_to_df(self) -> pl.DataFrame:
         df = {
@@ -142,6 +152,8 @@ class Game:
             "y": [],
             "reason": [],
             "penalty_duration": [],
+            "game_id": [],
+            "event_id": []
         }
 
         for play in self.plays:
@@ -161,23 +173,118 @@ class Game:
             df["y"].append(play.y)
             df["reason"].append(play.reason)
             df["penalty_duration"].append(play.penalty_duration)
-        return pl.DataFrame(df).with_columns(pl.lit(self.game_id).alias("game_id"))
+            df["game_id"].append(self.game_id)
+            df["event_id"].append(play.event_id)
+
+        from table_schemas import table_frame
+
+        return table_frame("json_pbp_plays", df)
     
 
 class NHLJsonPbpParser():
+    fetcher: Fetcher
 
-    def __init__(self) -> None:
-        pass
+    def __init__(self, fetcher: Fetcher | None = None) -> None:
+        self.fetcher = fetcher if fetcher is not None else Fetcher()
     
-    def parse(self, game_id: str) -> Game:
-        url = "https://api-web.nhle.com/v1/gamecenter/" + str(game_id) + "/play-by-play" 
+    def url(self, game_id: str) -> str:
+        return API_WEB_URL + "/v1/gamecenter/" + str(game_id) + "/play-by-play"
+
+    # returns None if conditional is set and the payload hasn't changed
+    def parse(self, game_id: str, conditional: bool = False) -> Game | None:
+        url = self.url(game_id)
         
         try:
-            json_res = requests.get(url).json()
+            res = self.fetcher.get(url, conditional)
         except:
             raise(RuntimeError(f"json pbb for game_id: {game_id} not found (url: {url})"))
-        
+        if res is None:
+            return None
+
+        return self.parse_payload(res.content)
 
+    def parse_payload(self, content: bytes) -> Game:
+        if json_schema.HAS_MSGSPEC:
+            return self._game_from_struct(json_schema.decode_pbp(content))
+        return self._game_from_dict(json_schema.loads(content))
+
+    def _game_from_struct(self, res) -> Game:
+        game_info = res.summary.game_info if res.summary is not None else None
+        if game_info is None:
+            game_info = json_schema.GameInfo()
+
+        game = Game(
+            game_id = res.id,
+            season = res.season,
+            date = res.game_date,
+            away_team = Team(
+                name = res.away_team.common_name.default,
+                abrv = res.away_team.abbrev,
+                id = res.away_team.id
+            ),
+            home_team = Team(
+                name = res.home_team.common_name.default,
+                abrv = res.home_team.abbrev,
+                id = res.home_team.id
+            ),
+            away_team_goals = res.away_team.score,
+            home_team_goals = res.home_team.score,
+            venue = res.venue.default,
+            venue_location = res.venue_location.default,
+            home_coach = _coach_name(game_info.home_team),
+            away_coach = _coach_name(game_info.away_team),
+            referee_1 = _official_name(game_info.referees, 0),
+            referee_2 = _official_name(game_info.referees, 1),
+            linesmen_1 = _official_name(game_info.linesmen, 0),
+            linesmen_2 = _official_name(game_info.linesmen, 1),
+            players = [
+                Player(
+                    first_name = plr.first_name.default,
+                    last_name = plr.last_name.default,
+                    id = plr.player_id,
+                    position = string_to_player_position(plr.position_code),
+                    team_id = plr.team_id,
+                    sweater_number = plr.sweater_number
+                )
+                for plr in res.roster_spots
+            ],
+            plays = []
+        )
+
+        for i, play in enumerate(res.plays):
+            d = play.details
+            if d is None:
+                d = json_schema.PlayDetails()
+
+            game.plays.append(Play(
+                n = i,
+                event_id = play.event_id,
+                event_type = string_to_event_type(play.type_desc_key),
+                period = play.period_descriptor.number,
+                period_type = play.period_descriptor.period_type,
+                time_in_period = play.time_in_period,
+                time_remaining = play.time_remaining,
+                event_owner_team_id = d.event_owner_team_id,
+                p1 = _first_not_none(
+                    d.winning_player_id, d.shooting_player_id, d.hitting_player_id,
+                    d.player_id, d.scoring_player_id, d.committed_by_player_id
+                ),
+                p2 = _first_not_none(
+                    d.losing_player_id, d.hittee_player_id, d.blocking_player_id,
+                    d.assist1_player_id, d.drawn_by_player_id
+                ),
+                p3 = d.assist2_player_id,
+                goalie = d.goalie_in_net_id,
+                shot_type = string_to_shot_type(d.shot_type) if d.shot_type is not None else None,
+                x = d.x_coord,
+                y = d.y_coord,
+                penalty_duration = d.duration,
+                reason = d.reason
+            ))
+
+        return game
+
+    def _game_from_dict(self, json_res: dict) -> Game:
         try:
             home_coach = json_res["summary"]["gameInfo"]["homeTeam"]["headCoach"]["default"]
         except:
@@ -255,55 +362,58 @@ class NHLJsonPbpParser():
             time_in_period = play["timeInPeriod"]
             time_remaining = play["timeRemaining"]
             event_type = string_to_event_type(play['typeDescKey'])
-
-            if "details" in play.keys():
-                if "winningPlayerId" in play["details"].keys(): p1 = int(play["details"]["winningPlayerId"])
-                elif "shootingPlayerId" in play["details"].keys(): p1 = int(play["details"]["shootingPlayerId"])
-                elif "hittingPlayerId" in play["details"].keys(): p1 = int(play["details"]["hittingPlayerId"])
-                elif "playerId" in play["details"].keys(): p1 = int(play["details"]["playerId"])
-                elif "scoringPlayerId" in play["details"].keys(): p1 = int(play["details"]["scoringPlayerId"])
-                elif "committedByPlayerId" in play["details"].keys(): p1 = int(play["details"]["committedByPlayerId"])
-                elif "shootingPlayerId" in play["details"].keys(): p1 = int(play["details"]["shootingPlayerId"])
+            event_id = int(play["eventId"]) if play.get("eventId") is not None else None
+            # explicit nulls count as missing keys, as in _game_from_struct
+            details = {k: v for k, v in (play.get("details") or {}).items() if v is not None}
+
+            if details:
+                if "winningPlayerId" in details.keys(): p1 = int(details["winningPlayerId"])
+                elif "shootingPlayerId" in details.keys(): p1 = int(details["shootingPlayerId"])
+                elif "hittingPlayerId" in details.keys(): p1 = int(details["hittingPlayerId"])
+                elif "playerId" in details.keys(): p1 = int(details["playerId"])
+                elif "scoringPlayerId" in details.keys(): p1 = int(details["scoringPlayerId"])
+                elif "committedByPlayerId" in details.keys(): p1 = int(details["committedByPlayerId"])
+                elif "shootingPlayerId" in details.keys(): p1 = int(details["shootingPlayerId"])
                 else: p1 = None
 
-                if "losingPlayerId" in play["details"].keys(): p2 = int(play["details"]["losingPlayerId"])
-                elif "hitteePlayerId" in play["details"].keys(): p2 = int(play["details"]["hitteePlayerId"])
-                elif "blockingPlayerId" in play["details"].keys(): p2 = int(play["details"]["blockingPlayerId"])
-                elif "assist1PlayerId" in play["details"].keys(): p2 = int(play["details"]["assist1PlayerId"])
-                elif "drawnByPlayerId" in play["details"].keys(): p2 = int(play["details"]["drawnByPlayerId"])
+                if "losingPlayerId" in details.keys(): p2 = int(details["losingPlayerId"])
+                elif "hitteePlayerId" in details.keys(): p2 = int(details["hitteePlayerId"])
+                elif "blockingPlayerId" in details.keys(): p2 = int(details["blockingPlayerId"])
+                elif "assist1PlayerId" in details.keys(): p2 = int(details["assist1PlayerId"])
+                elif "drawnByPlayerId" in details.keys(): p2 = int(details["drawnByPlayerId"])
                 else: p2 = None
 
-                if "assist2PlayerId" in play["details"].keys(): 
-                    p3 = int(play["details"]["assist2PlayerId"])
+                if "assist2PlayerId" in details.keys(): 
+                    p3 = int(details["assist2PlayerId"])
                 else: p3 = None
             
-                if 'goalieInNetId' in play["details"].keys(): 
-                    goalie = int(play["details"]["goalieInNetId"])
+                if 'goalieInNetId' in details.keys(): 
+                    goalie = int(details["goalieInNetId"])
                 else: goalie = None
                 
-                if 'xCoord' in play["details"].keys(): 
-                    x = int(play["details"]["xCoord"])
+                if 'xCoord' in details.keys(): 
+                    x = int(details["xCoord"])
                 else: x = None
                 
-                if 'yCoord' in play["details"].keys(): 
-                    y = int(play["details"]["yCoord"])
+                if 'yCoord' in details.keys(): 
+                    y = int(details["yCoord"])
                 else: y = None
                 
 
-                if 'reason' in play["details"].keys(): 
-                    reason = play["details"]["reason"]
+                if 'reason' in details.keys(): 
+                    reason = details["reason"]
                 else: reason = None
                 
-                if 'duration' in play["details"].keys(): 
-                    penalty_duration = int(play["details"]["duration"])
+                if 'duration' in details.keys(): 
+                    penalty_duration = int(details["duration"])
                 else: penalty_duration = None
 
-                if 'eventOwnerTeamId' in play["details"].keys():
-                    event_owner_team_id = int(play["details"]["eventOwnerTeamId"])
+                if 'eventOwnerTeamId' in details.keys():
+                    event_owner_team_id = int(details["eventOwnerTeamId"])
                 else: event_owner_team_id = None
 
-                if 'shotType' in play["details"].keys(): 
-                    shot_type = string_to_shot_type(play["details"]['shotType'])
+                if 'shotType' in details.keys(): 
+                    shot_type = string_to_shot_type(details['shotType'])
                 else: shot_type = None 
             else:
                 p1 = None
@@ -319,6 +429,7 @@ class NHLJsonPbpParser():
             
             game.plays.append(Play(
                 n = i,
+                event_id = event_id,
                 event_type = event_type,
                 period = period,
                 period_type = period_type,
@@ -344,17 +455,32 @@ class NHLJsonPbpParser():
     def to_df(self, games: list[Game]) -> dict[str, pl.DataFrame]:
         return {
             "json_pbp_game_info": (
-                pl.concat(map(lambda x: x.game_info_to_df(), games), how = "diagonal_relaxed")
+                pl.concat(map(lambda x: x.game_info_to_df(), games), how = "vertical")
             ),
             "json_pbp_player_info": (
-                pl.concat(map(lambda x: x.players_to_df(), games), how = "diagonal_relaxed")
+                pl.concat(map(lambda x: x.players_to_df(), games), how = "vertical")
             ),
             "json_pbp_plays": (
-                pl.concat(map(lambda x: x.plays_to_df(), games), how = "diagonal_relaxed")
+                pl.concat(map(lambda x: x.plays_to_df(), games), how = "vertical")
             )
         }
 
 
+def _first_not_none(*values: int | None) -> int | None:
+    for v in values:
+        if v is not None:
+            return v
+    return None
+
+def _coach_name(team_game_info) -> str | None:
+    if team_game_info is None or team_game_info.head_coach is None:
+        return None
+    return team_game_info.head_coach.default
+
+def _official_name(officials: list, i: int) -> str | None:
+    return officials[i].default if i < len(officials) else None
+
+
 def string_to_shot_type(s: str) -> ShotType:
     match s:
         case 'wrist': return(ShotType.Wrist)
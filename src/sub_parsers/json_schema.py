@@ -0,0 +1,155 @@
+import json
+from typing import Any
+
+# msgspec and orjson are optional. with msgspec installed payloads are decoded
+# straight into the structs below, which only carry the fields the parsers use.
+# otherwise payloads are decoded into plain dicts (with orjson when available)
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+HAS_MSGSPEC = msgspec is not None
+
+
+def loads(content: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+if msgspec is not None:
+
+    class LocalizedString(msgspec.Struct):
+        default: str
+
+    # play-by-play
+    class PbpTeam(msgspec.Struct, rename="camel"):
+        id: int
+        abbrev: str
+        common_name: LocalizedString
+        score: int
+
+    class TeamGameInfo(msgspec.Struct, rename="camel"):
+        head_coach: LocalizedString | None = None
+
+    class GameInfo(msgspec.Struct, rename="camel"):
+        referees: list[LocalizedString] = []
+        linesmen: list[LocalizedString] = []
+        home_team: TeamGameInfo | None = None
+        away_team: TeamGameInfo | None = None
+
+    class Summary(msgspec.Struct, rename="camel"):
+        game_info: GameInfo | None = None
+
+    class RosterSpot(msgspec.Struct, rename="camel"):
+        team_id: int
+        player_id: int
+        first_name: LocalizedString
+        last_name: LocalizedString
+        sweater_number: int
+        position_code: str
+
+    class PeriodDescriptor(msgspec.Struct, rename="camel"):
+        number: int
+        period_type: str
+
+    class PlayDetails(msgspec.Struct, rename="camel"):
+        winning_player_id: int | None = None
+        losing_player_id: int | None = None
+        shooting_player_id: int | None = None
+        hitting_player_id: int | None = None
+        hittee_player_id: int | None = None
+        blocking_player_id: int | None = None
+        player_id: int | None = None
+        scoring_player_id: int | None = None
+        assist1_player_id: int | None = None
+        assist2_player_id: int | None = None
+        committed_by_player_id: int | None = None
+        drawn_by_player_id: int | None = None
+        goalie_in_net_id: int | None = None
+        event_owner_team_id: int | None = None
+        x_coord: int | None = None
+        y_coord: int | None = None
+        reason: str | None = None
+        duration: int | None = None
+        shot_type: str | None = None
+
+    class PbpPlay(msgspec.Struct, rename="camel"):
+        period_descriptor: PeriodDescriptor
+        time_in_period: str
+        time_remaining: str
+        type_desc_key: str
+        event_id: int | None = None
+        details: PlayDetails | None = None
+
+    class PbpResponse(msgspec.Struct, rename="camel"):
+        id: int
+        season: int
+        game_date: str
+        away_team: PbpTeam
+        home_team: PbpTeam
+        venue: LocalizedString
+        venue_location: LocalizedString
+        roster_spots: list[RosterSpot] = []
+        plays: list[PbpPlay] = []
+        summary: Summary | None = None
+
+    # schedule
+    class ScheduleTeam(msgspec.Struct):
+        abbrev: str
+
+    class ScheduleGame(msgspec.Struct, rename="camel"):
+        id: int
+        game_type: int
+        game_state: str
+        away_team: ScheduleTeam
+        home_team: ScheduleTeam
+        # "OK", or e.g. "PPD" for postponed games
+        game_schedule_state: str = "OK"
+
+    class GameDay(msgspec.Struct):
+        date: str
+        games: list[ScheduleGame]
+
+    class ScheduleResponse(msgspec.Struct, rename="camel"):
+        game_week: list[GameDay]
+
+    # shift charts
+    class ShiftRow(msgspec.Struct, rename="camel"):
+        id: int
+        game_id: int
+        start_time: str
+        end_time: str
+        period: int
+        duration: str | None
+        first_name: str
+        last_name: str
+        player_id: int
+        team_id: int
+        team_abbrev: str
+
+    class ShiftChartResponse(msgspec.Struct):
+        data: list[ShiftRow]
+        # rows matching the query over all pages
+        total: int = 0
+
+    # strict=False lets numbers sent as strings through, matching the int() casts
+    # of the dict based parsing
+    _pbp_decoder = msgspec.json.Decoder(PbpResponse, strict=False)
+    _schedule_decoder = msgspec.json.Decoder(ScheduleResponse, strict=False)
+    _shift_chart_decoder = msgspec.json.Decoder(ShiftChartResponse, strict=False)
+
+    def decode_pbp(content: bytes) -> "PbpResponse":
+        return _pbp_decoder.decode(content)
+
+    def decode_schedule(content: bytes) -> "ScheduleResponse":
+        return _schedule_decoder.decode(content)
+
+    def decode_shift_chart(content: bytes) -> "ShiftChartResponse":
+        return _shift_chart_decoder.decode(content)
@@ -1,6 +1,15 @@
+import hashlib
 from dataclasses import dataclass
-import requests
+from urllib.parse import quote
 import polars as pl
+from sub_parsers.fetcher import STATS_API_URL, Fetcher
+from sub_parsers import json_schema
+from table_schemas import table_frame
+
+# games per batched shift chart request, keeps the cayenne expression short
+SHIFT_BATCH_SIZE = 20
+# shift rows per page of a batched request, a game has ~800
+SHIFT_PAGE_SIZE = 10000
 
 
 @dataclass
@@ -31,10 +40,19 @@ class Shift:
         }
 
 
+# hash of a game's shifts independent of the request they came from (and their
+# order in it), so a game split out of a batch and its own request compare equal
+def shifts_hash(shifts: list[Shift]) -> str:
+    rows = sorted(tuple(shift.to_dict().values()) for shift in shifts)
+    return hashlib.sha256(repr(rows).encode()).hexdigest()
+
+
 @dataclass
 class ShiftInfo:
     game_id: str
     shift_list: list[Shift]
+    # shifts_hash of shift_list
+    content_hash: str | None = None
 
     def to_df(self) -> pl.DataFrame:
         out = {
@@ -52,7 +70,7 @@ class ShiftInfo:
         }
 
         for shift in self.shift_list:
-            out["game_id"].append(self.game_id)
+            out["game_id"].append(int(self.game_id))
             out["id"].append(shift.id)
             out["start_time"].append(shift.start_time)
             out["end_time"].append(shift.end_time)
@@ -64,26 +82,110 @@ class ShiftInfo:
             out["team_id"].append(shift.team_id)
             out["team_abbrev"].append(shift.team_abbrev)
         
-        return pl.DataFrame(out)
+        return table_frame("json_shift_info", out)
 
 
 
 class NHLJsonShiftParser():
+    fetcher: Fetcher
 
-    def __init__(self) -> None:
-        pass
+    def __init__(self, fetcher: Fetcher | None = None) -> None:
+        self.fetcher = fetcher if fetcher is not None else Fetcher()
 
-    def parse(self, game_id: str) -> ShiftInfo:
-        url = "https://api.nhle.com/stats/rest/en/shiftcharts?cayenneExp=gameId=" + str(game_id)
+    def url(self, game_id: str) -> str:
+        return STATS_API_URL + "/stats/rest/en/shiftcharts?cayenneExp=gameId=" + str(game_id)
+
+    # returns None if conditional is set and the payload hasn't changed. the
+    # payload is recorded by the hash of its shifts rather than its bytes, the
+    # only hash a game split out of a batch (see parse_batch) can compare with
+    def parse(self, game_id: str, conditional: bool = False) -> ShiftInfo | None:
+        url = self.url(game_id)
 
         try:
-            json_res = requests.get(url).json()
+            res = self.fetcher.get(url, conditional, record = False)
         except:
             raise(RuntimeError(f"shift chart for game_id: {game_id} not found"))
-
-        shift_info = ShiftInfo(game_id, [])
-        for shift in json_res["data"]:
-            shift_info.shift_list.append(
+        if res is None:
+            return None
+
+        out = self.parse_payload(game_id, res.content)
+        if not self.fetcher.record(
+            url, out.content_hash, conditional,
+            res.headers.get("ETag"), res.headers.get("Last-Modified")
+        ):
+            return None
+        return out
+
+    # url of one page of the shifts of several games
+    def batch_url(self, game_ids: list[str], start: int, limit: int) -> str:
+        exp = " or ".join("gameId=" + str(g) for g in game_ids)
+        return (
+            STATS_API_URL + "/stats/rest/en/shiftcharts?cayenneExp=" + quote(exp)
+            + "&start=" + str(start) + "&limit=" + str(limit)
+        )
+
+    # fetches the shifts of several games (e.g. a day's games) with paginated
+    # compound requests and splits them back per game. games without any shift
+    # get an empty ShiftInfo
+    def parse_batch(self, game_ids: list[str]) -> dict[str, ShiftInfo]:
+        out = {str(g): ShiftInfo(str(g), []) for g in game_ids}
+
+        for i in range(0, len(game_ids), SHIFT_BATCH_SIZE):
+            batch = game_ids[i:i + SHIFT_BATCH_SIZE]
+            start = 0
+            while True:
+                url = self.batch_url(batch, start, SHIFT_PAGE_SIZE)
+                try:
+                    res = self.fetcher.get(url, record = False)
+                except:
+                    raise(RuntimeError(f"shift charts for game_ids: {batch} not found"))
+
+                rows, total = self._decode(res.content)
+                for game_id, shift in rows:
+                    if str(game_id) in out:
+                        out[str(game_id)].shift_list.append(shift)
+
+                start += len(rows)
+                if len(rows) == 0 or start >= total:
+                    break
+
+        for shift_info in out.values():
+            shift_info.content_hash = shifts_hash(shift_info.shift_list)
+        return out
+
+    def parse_payload(self, game_id: str, content: bytes) -> ShiftInfo:
+        rows, _ = self._decode(content)
+        shift_list = [shift for _, shift in rows]
+        return ShiftInfo(game_id, shift_list, shifts_hash(shift_list))
+
+    # (game id, shift) rows of a shift chart payload and its total row count
+    def _decode(self, content: bytes) -> tuple[list[tuple[int, Shift]], int]:
+        rows = []
+
+        if json_schema.HAS_MSGSPEC:
+            chart = json_schema.decode_shift_chart(content)
+            for shift in chart.data:
+                rows.append((
+                    shift.game_id,
+                    Shift(
+                        shift.id,
+                        shift.start_time,
+                        shift.end_time,
+                        shift.period,
+                        shift.duration,
+                        shift.first_name,
+                        shift.last_name,
+                        shift.player_id,
+                        shift.team_id,
+                        shift.team_abbrev
+                    )
+                ))
+            return rows, chart.total
+
+        chart = json_schema.loads(content)
+        for shift in chart["data"]:
+            rows.append((
+                shift["gameId"],
                 Shift(
                     shift["id"],
                     shift["startTime"],
@@ -96,11 +198,11 @@ class NHLJsonShiftParser():
                     shift["teamId"],
                     shift["teamAbbrev"]
                 )
-            )
+            ))
 
-        return shift_info
+        return rows, chart.get("total", 0)
 
     def to_df(self, shifts: list[ShiftInfo]) -> dict[str, pl.DataFrame]:
         return {
-            "shift_info": pl.concat(map(lambda x: x.to_df(), shifts), how = "diagonal_relaxed")
+            "shift_info": pl.concat(map(lambda x: x.to_df(), shifts), how = "vertical")
         }
\ No newline at end of file
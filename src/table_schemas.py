@@ -0,0 +1,689 @@
+import logging
+import re
+from dataclasses import dataclass, field, replace
+
+import polars as pl
+
+from sub_parsers.json_pbp_parser import (
+    EventType,
+    PlayerPosition,
+    ShotType,
+    event_type_to_string,
+    player_position_to_string,
+    shot_type_to_string,
+)
+
+logger = logging.getLogger(__name__)
+
+DATABASE = "nhl_api_data"
+GAME_INFO_TABLE = DATABASE + ".json_pbp_game_info"
+
+# game ids start with the season's first year (2023020001 is a 2023-2024 game),
+# the season column of json_pbp_game_info holds both years (20232024)
+GAME_IDS_PER_SEASON = 1000000
+
+EVENT_TYPES = [event_type_to_string(e) for e in EventType]
+SHOT_TYPES = [shot_type_to_string(s) for s in ShotType]
+PLAYER_POSITIONS = [player_position_to_string(p) for p in PlayerPosition]
+PERIOD_TYPES = ["REG", "OT", "SO"]
+JOB_STATES = ["pending", "running", "done", "failed"]
+
+
+@dataclass
+class Column:
+    name: str
+    dtype: pl.DataType
+    # max length of String columns, None maps to TEXT
+    length: int | None = None
+    nullable: bool = True
+
+
+@dataclass
+class TableSchema:
+    name: str
+    columns: list[Column]
+    primary_key: list[str]
+    # index name -> indexed columns
+    indexes: dict[str, list[str]] = field(default_factory=dict)
+
+    @property
+    def qualified_name(self) -> str:
+        return DATABASE + "." + self.name
+
+    # only tables keyed by game can be partitioned by season
+    @property
+    def partitionable(self) -> bool:
+        return "game_id" in self.primary_key
+
+    @property
+    def polars_schema(self) -> dict[str, pl.DataType]:
+        return {c.name: c.dtype for c in self.columns}
+
+
+# sweater numbers of the players on the ice, one column per slot. html_pbp_on_ice
+# holds the same players as ids and is what the aggregates and wide events use;
+# these columns stay for queries and exports written against the original
+# html_pbp_plays layout
+def _on_ice_columns() -> list[Column]:
+    return [
+        Column(f"{side}_on_ice_p{i}", pl.String, 2)
+        for side in ["away", "home"]
+        for i in range(1, 10)
+    ]
+
+
+# id, "first last" name, position and team of each player of a wide event
+def _event_player_columns() -> list[Column]:
+    return [
+        column
+        for role in ["p1", "p2", "p3", "goalie"]
+        for column in [
+            Column(f"{role}_id", pl.Int32),
+            Column(f"{role}_name", pl.String, 101),
+            Column(f"{role}_position", pl.Enum(PLAYER_POSITIONS)),
+            Column(f"{role}_team_id", pl.Int16),
+        ]
+    ]
+
+
+TABLE_SCHEMAS: dict[str, TableSchema] = {
+    "html_pbp_plays": TableSchema(
+        name="html_pbp_plays",
+        columns=[
+            Column("game_id", pl.Int32, nullable=False),
+            Column("n", pl.Int16, nullable=False),
+            Column("period", pl.Int8),
+            Column("strength", pl.String, 2),
+            Column("time_elapsed", pl.String, 5),
+            Column("event", pl.String, 20),
+            Column("description", pl.String),
+            *_on_ice_columns(),
+        ],
+        primary_key=["game_id", "n"],
+        indexes={"idx_event": ["event"]},
+    ),
+    # players on the ice for each html play, see resolve_on_ice_player_ids
+    "html_pbp_on_ice": TableSchema(
+        name="html_pbp_on_ice",
+        columns=[
+            Column("game_id", pl.Int32, nullable=False),
+            Column("n", pl.Int16, nullable=False),
+            Column("side", pl.Enum(["away", "home"]), nullable=False),
+            Column("player_id", pl.Int32, nullable=False),
+        ],
+        primary_key=["game_id", "n", "side", "player_id"],
+        indexes={"idx_player_id": ["player_id"]},
+    ),
+    "json_pbp_game_info": TableSchema(
+        name="json_pbp_game_info",
+        columns=[
+            Column("game_id", pl.Int32, nullable=False),
+            Column("season", pl.Int32, nullable=False),
+            Column("date", pl.Date, nullable=False),
+            Column("away_team_name", pl.String, 30),
+            Column("away_team_abrv", pl.String, 3),
+            Column("away_team_id", pl.Int16),
+            Column("away_team_goals", pl.Int16),
+            Column("home_team_name", pl.String, 30),
+            Column("home_team_abrv", pl.String, 3),
+            Column("home_team_id", pl.Int16),
+            Column("home_team_goals", pl.Int16),
+            Column("venue", pl.String, 50),
+            Column("venue_location", pl.String, 50),
+            Column("referee_1", pl.String, 50),
+            Column("referee_2", pl.String, 50),
+            Column("linesmen_1", pl.String, 50),
+            Column("linesmen_2", pl.String, 50),
+            Column("home_coach", pl.String, 50),
+            Column("away_coach", pl.String, 50),
+        ],
+        primary_key=["game_id"],
+        indexes={
+            "idx_date": ["date"],
+            "idx_season": ["season"],
+            "idx_home_team_id": ["home_team_id"],
+            "idx_away_team_id": ["away_team_id"],
+        },
+    ),
+    "json_pbp_player_info": TableSchema(
+        name="json_pbp_player_info",
+        columns=[
+            Column("team_id", pl.Int16, nullable=False),
+            Column("first_name", pl.String, 50),
+            Column("last_name", pl.String, 50),
+            Column("id", pl.Int32, nullable=False),
+            Column("position", pl.Enum(PLAYER_POSITIONS)),
+            Column("sweater_number", pl.Int16),
+            Column("game_id", pl.Int32, nullable=False),
+        ],
+        primary_key=["game_id", "team_id", "id"],
+        indexes={"idx_player_id": ["id"]},
+    ),
+    "json_pbp_plays": TableSchema(
+        name="json_pbp_plays",
+        columns=[
+            Column("n", pl.Int16, nullable=False),
+            Column("event_type", pl.Enum(EVENT_TYPES)),
+            Column("period", pl.Int8),
+            Column("period_type", pl.Enum(PERIOD_TYPES)),
+            Column("time_in_period", pl.String, 5),
+            Column("time_remaining", pl.String, 5),
+            Column("event_owner_team_id", pl.Int16),
+            Column("p1", pl.Int32),
+            Column("p2", pl.Int32),
+            Column("p3", pl.Int32),
+            Column("goalie", pl.Int32),
+            Column("shot_type", pl.Enum(SHOT_TYPES)),
+            Column("x", pl.Int16),
+            Column("y", pl.Int16),
+            Column("reason", pl.String),
+            Column("penalty_duration", pl.Int16),
+            Column("game_id", pl.Int32, nullable=False),
+            Column("event_id", pl.Int32),
+        ],
+        primary_key=["game_id", "n"],
+        indexes={
+            "idx_event_type": ["event_type"],
+            "idx_p1": ["p1"],
+            "idx_p2": ["p2"],
+            "idx_p3": ["p3"],
+            "idx_goalie": ["goalie"],
+        },
+    ),
+    "json_shift_info": TableSchema(
+        name="json_shift_info",
+        columns=[
+            Column("game_id", pl.Int32, nullable=False),
+            Column("id", pl.Int32, nullable=False),
+            Column("start_time", pl.String, 5, nullable=False),
+            Column("end_time", pl.String, 5, nullable=False),
+            Column("period", pl.Int8, nullable=False),
+            Column("duration", pl.String, 5),
+            Column("first_name", pl.String, 50),
+            Column("last_name", pl.String, 50),
+            Column("player_id", pl.Int32, nullable=False),
+            Column("team_id", pl.Int16, nullable=False),
+            Column("team_abbrev", pl.String, 3),
+        ],
+        primary_key=[
+            "game_id",
+            "id",
+            "player_id",
+            "team_id",
+            "period",
+            "start_time",
+            "end_time",
+        ],
+        indexes={"idx_player_id": ["player_id"]},
+    ),
+    # dimension tables maintained in normalized mode, see dimensions.py
+    "players": TableSchema(
+        name="players",
+        columns=[
+            Column("player_id", pl.Int32, nullable=False),
+            Column("first_name", pl.String, 50),
+            Column("last_name", pl.String, 50),
+            Column("position", pl.Enum(PLAYER_POSITIONS)),
+            Column("sweater_number", pl.Int16),
+            Column("team_id", pl.Int16),
+            Column("updated_game_id", pl.Int32),
+        ],
+        primary_key=["player_id"],
+        indexes={"idx_team_id": ["team_id"]},
+    ),
+    "teams": TableSchema(
+        name="teams",
+        columns=[
+            Column("team_id", pl.Int16, nullable=False),
+            Column("name", pl.String, 30),
+            Column("abrv", pl.String, 3),
+        ],
+        primary_key=["team_id"],
+    ),
+    "player_history": TableSchema(
+        name="player_history",
+        columns=[
+            Column("player_id", pl.Int32, nullable=False),
+            Column("game_id", pl.Int32, nullable=False),
+            Column("team_id", pl.Int16),
+            Column("position", pl.Enum(PLAYER_POSITIONS)),
+            Column("sweater_number", pl.Int16),
+        ],
+        primary_key=["player_id", "game_id"],
+        indexes={"idx_game_id": ["game_id"]},
+    ),
+    # html_pbp_plays.n -> json_pbp_plays.n per game, see reconcile.py
+    "pbp_play_alignment": TableSchema(
+        name="pbp_play_alignment",
+        columns=[
+            Column("game_id", pl.Int32, nullable=False),
+            Column("html_n", pl.Int16, nullable=False),
+            Column("json_n", pl.Int16, nullable=False),
+            Column("time_diff", pl.Int16),
+        ],
+        primary_key=["game_id", "html_n"],
+        indexes={"idx_json_n": ["game_id", "json_n"]},
+    ),
+    # dead letter queue of games that failed to ingest, see dead_letters.py
+    "ingest_failures": TableSchema(
+        name="ingest_failures",
+        columns=[
+            Column("game_id", pl.Int32, nullable=False),
+            Column("source", pl.String, 20, nullable=False),
+            Column("stage", pl.Enum(["parse", "write"])),
+            Column("exception", pl.String),
+            Column("payload_url", pl.String, 255),
+            Column("attempts", pl.Int16),
+            Column("failed_at", pl.Datetime),
+        ],
+        primary_key=["game_id", "source"],
+    ),
+    # per game aggregates of the play and shift tables, see aggregates.py
+    "player_game_stats": TableSchema(
+        name="player_game_stats",
+        columns=[
+            Column("game_id", pl.Int32, nullable=False),
+            Column("player_id", pl.Int32, nullable=False),
+            Column("team_id", pl.Int16),
+            *[
+                Column(c, pl.Int16)
+                for c in [
+                    "goals",
+                    "assists",
+                    "shots",
+                    "hits",
+                    "blocks",
+                    "pim",
+                    "toi_seconds",
+                    "pp_goals",
+                    "pp_assists",
+                    "sh_goals",
+                    "sh_assists",
+                ]
+            ],
+        ],
+        primary_key=["game_id", "player_id"],
+        indexes={"idx_player_id": ["player_id"]},
+    ),
+    "team_game_stats": TableSchema(
+        name="team_game_stats",
+        columns=[
+            Column("game_id", pl.Int32, nullable=False),
+            Column("team_id", pl.Int16, nullable=False),
+            *[
+                Column(c, pl.Int16)
+                for c in [
+                    "goals",
+                    "shots",
+                    "hits",
+                    "blocks",
+                    "pim",
+                    "pp_goals",
+                    "sh_goals",
+                    "goals_against",
+                    "shots_against",
+                ]
+            ],
+        ],
+        primary_key=["game_id", "team_id"],
+        indexes={"idx_team_id": ["team_id"]},
+    ),
+    # json plays joined with their game info and players, see wide_events.py
+    "wide_events": TableSchema(
+        name="wide_events",
+        columns=[
+            Column("game_id", pl.Int32, nullable=False),
+            Column("n", pl.Int16, nullable=False),
+            Column("season", pl.Int32),
+            Column("date", pl.Date),
+            Column("period", pl.Int8),
+            Column("period_type", pl.Enum(PERIOD_TYPES)),
+            Column("time_in_period", pl.String, 5),
+            Column("time_remaining", pl.String, 5),
+            Column("event_type", pl.Enum(EVENT_TYPES)),
+            Column("event_owner_team_id", pl.Int16),
+            Column("event_owner_team_abrv", pl.String, 3),
+            Column("event_owner_is_home", pl.Boolean),
+            Column("away_team_id", pl.Int16),
+            Column("away_team_abrv", pl.String, 3),
+            Column("home_team_id", pl.Int16),
+            Column("home_team_abrv", pl.String, 3),
+            *_event_player_columns(),
+            Column("shot_type", pl.Enum(SHOT_TYPES)),
+            Column("x", pl.Int16),
+            Column("y", pl.Int16),
+            Column("reason", pl.String),
+            Column("penalty_duration", pl.Int16),
+        ],
+        primary_key=["game_id", "n"],
+        indexes={
+            "idx_date": ["date"],
+            "idx_event_type": ["event_type"],
+            "idx_p1_id": ["p1_id"],
+            "idx_goalie_id": ["goalie_id"],
+        },
+    ),
+    # games that were not final when their date was scraped, see deferred_games.py
+    "deferred_games": TableSchema(
+        name="deferred_games",
+        columns=[
+            Column("game_id", pl.Int32, nullable=False),
+            Column("date", pl.Date, nullable=False),
+            Column("game_state", pl.String, 10),
+            Column("deferred_at", pl.Datetime),
+        ],
+        primary_key=["game_id"],
+        indexes={"idx_date": ["date"]},
+    ),
+    # games queued for the job queue workers, see job_queue.py
+    "ingest_game_jobs": TableSchema(
+        name="ingest_game_jobs",
+        columns=[
+            Column("game_id", pl.Int32, nullable=False),
+            Column("state", pl.Enum(JOB_STATES), nullable=False),
+            Column("attempts", pl.Int16, nullable=False),
+            Column("worker_id", pl.String, 100),
+            Column("lease_expires_at", pl.Datetime),
+            Column("heartbeat_at", pl.Datetime),
+            Column("last_error", pl.String),
+        ],
+        primary_key=["game_id"],
+        indexes={
+            "idx_claim": ["state", "lease_expires_at"],
+            "idx_pending": ["state", "game_id"],
+        },
+    ),
+}
+
+
+# builds a table's frame from column lists (or scalars) with the registry dtypes
+# instead of inferring them from the values
+# descriptive columns that live in the dimension tables in normalized mode (see
+# dimensions.py), the fact tables keep only the ids
+NORMALIZED_DROP_COLUMNS = {
+    "json_pbp_game_info": [
+        "away_team_name",
+        "away_team_abrv",
+        "home_team_name",
+        "home_team_abrv",
+    ],
+    "json_pbp_player_info": ["first_name", "last_name", "position"],
+    "json_shift_info": ["first_name", "last_name", "team_abbrev"],
+}
+
+
+# a registry table as it is stored, without its NORMALIZED_DROP_COLUMNS in
+# normalized mode
+def stored_schema(table: str, normalized: bool = False) -> TableSchema:
+    schema = TABLE_SCHEMAS[table]
+    if not normalized or table not in NORMALIZED_DROP_COLUMNS:
+        return schema
+    return replace(
+        schema,
+        columns=[
+            c for c in schema.columns if c.name not in NORMALIZED_DROP_COLUMNS[table]
+        ],
+    )
+
+
+def stored_schemas(normalized: bool = False) -> list[TableSchema]:
+    return [stored_schema(table, normalized) for table in TABLE_SCHEMAS]
+
+
+# builds a frame of a table from column lists with the registry dtypes. frames
+# that are reshaped before they are written, like the sweater numbers of
+# html_pbp_on_ice, hold only the registry columns in data plus extra_columns
+def table_frame(
+    table: str, data: dict, extra_columns: dict[str, pl.DataType] | None = None
+) -> pl.DataFrame:
+    schema = TABLE_SCHEMAS[table].polars_schema
+    if extra_columns is not None:
+        schema = {
+            name: dtype for name, dtype in schema.items() if name in data
+        } | extra_columns
+    return pl.DataFrame(data, schema=schema)
+
+
+# reads a csv backup of a table with the registry dtypes. columns added to the
+# registry after the backup was written come back as nulls
+def read_table_csv(path: str, table: str) -> pl.DataFrame:
+    schema = TABLE_SCHEMAS[table].polars_schema
+    df = pl.read_csv(path, schema_overrides=schema)
+    return df.select(
+        pl.col(name) if name in df.columns else pl.lit(None, dtype).alias(name)
+        for name, dtype in schema.items()
+    )
+
+
+# first year of the season of a game id, or of a game_id column expression
+def season_of(game_id: int | pl.Expr) -> int | pl.Expr:
+    return game_id // GAME_IDS_PER_SEASON
+
+
+# first and last game id a season can have
+def season_game_ids(season: int) -> tuple[int, int]:
+    return season * GAME_IDS_PER_SEASON, (season + 1) * GAME_IDS_PER_SEASON - 1
+
+
+# condition and params restricting game_id to the games of seasons
+def seasons_condition(seasons: list[int]) -> tuple[str, tuple]:
+    condition = "(" + " OR ".join(["game_id BETWEEN %s AND %s"] * len(seasons)) + ")"
+    return condition, tuple(g for season in seasons for g in season_game_ids(season))
+
+
+# rows of the games in game_ids from a table keyed by game
+def load_games(db, columns: str, table: str, game_ids: list[int]) -> pl.DataFrame:
+    ids = ",".join(str(int(g)) for g in game_ids)
+    return db.get_query_result(
+        f"SELECT {columns} FROM {table} WHERE game_id IN ({ids})"
+    )
+
+
+_SQL_INT_TYPES = {
+    pl.Int8: "TINYINT",
+    pl.Int16: "SMALLINT",
+    pl.Int32: "INT",
+    pl.Int64: "BIGINT",
+    pl.UInt8: "TINYINT UNSIGNED",
+    pl.UInt16: "SMALLINT UNSIGNED",
+    pl.UInt32: "INT UNSIGNED",
+    pl.UInt64: "BIGINT UNSIGNED",
+}
+
+
+def sql_type(column: Column, dialect: str) -> str:
+    dtype = column.dtype
+    if isinstance(dtype, pl.Enum):
+        return "ENUM(" + ",".join(f"'{c}'" for c in dtype.categories) + ")"
+    if dtype == pl.String:
+        if column.length is None:
+            return "TEXT"
+        return f"VARCHAR({column.length})"
+    if dtype in _SQL_INT_TYPES:
+        # duckdb spells unsigned types as UTINYINT, USMALLINT, ...
+        if dialect == "duckdb" and dtype.is_unsigned_integer():
+            return "U" + _SQL_INT_TYPES[dtype].removesuffix(" UNSIGNED")
+        return _SQL_INT_TYPES[dtype]
+    if dtype == pl.Float32:
+        return "FLOAT"
+    if dtype == pl.Float64:
+        return "DOUBLE"
+    if dtype == pl.Date:
+        return "DATE"
+    if dtype == pl.Datetime:
+        return "DATETIME"
+    if dtype == pl.Boolean:
+        return "BOOLEAN"
+    raise ValueError(f"no sql type for {column.name} ({dtype})")
+
+
+# mysql reports BOOLEAN columns as tinyint(1) and, before 8.0.19, integer
+# columns with a display width (int(11)), neither of which is a type change
+def _mysql_type(type_sql: str) -> str:
+    type_sql = type_sql.lower()
+    if type_sql in ("boolean", "bool"):
+        return "tinyint(1)"
+    if type_sql == "tinyint(1)":
+        return type_sql
+    type_sql = re.sub(r"^integer\b", "int", type_sql)
+    return re.sub(r"^(tinyint|smallint|mediumint|int|bigint)\(\d+\)", r"\1", type_sql)
+
+
+# game ids start with the season's first year, so range partitions on game_id
+# split tables by season while keeping game_id in every primary key as mysql
+# requires
+def _partition_clause(seasons: range) -> str:
+    partitions = [
+        f"    PARTITION p{s} VALUES LESS THAN ({season_game_ids(s + 1)[0]})"
+        for s in seasons
+    ]
+    partitions.append("    PARTITION pmax VALUES LESS THAN MAXVALUE")
+    return "PARTITION BY RANGE (game_id) (\n" + ",\n".join(partitions) + "\n)"
+
+
+def create_table_sql(
+    table: TableSchema, dialect: str, partition_seasons: range | None = None
+) -> str:
+    lines = [
+        f"    {c.name} {sql_type(c, dialect)}{'' if c.nullable else ' NOT NULL'}"
+        for c in table.columns
+    ]
+    lines.append(f"    PRIMARY KEY ({', '.join(table.primary_key)})")
+    # duckdb filters through per row group min/max statistics, secondary ART
+    # indexes would only slow down inserts there
+    if dialect == "mysql":
+        for name, columns in table.indexes.items():
+            lines.append(f"    INDEX {name} ({', '.join(columns)})")
+
+    sql = (
+        f"CREATE TABLE IF NOT EXISTS {table.qualified_name} (\n"
+        + ",\n".join(lines)
+        + "\n)"
+    )
+    if dialect == "mysql" and partition_seasons is not None and table.partitionable:
+        sql += "\n" + _partition_clause(partition_seasons)
+    return sql
+
+
+def generate_ddl(
+    dialect: str, partition_seasons: range | None = None, normalized: bool = False
+) -> list[str]:
+    create_database = (
+        f"CREATE DATABASE IF NOT EXISTS {DATABASE}"
+        if dialect == "mysql"
+        else f"CREATE SCHEMA IF NOT EXISTS {DATABASE}"
+    )
+    return [create_database] + [
+        create_table_sql(t, dialect, partition_seasons)
+        for t in stored_schemas(normalized)
+    ]
+
+
+# column name -> type of a table as the database reports it, mysql's
+# column_type carries lengths and unsigned (varchar(50), int unsigned)
+def existing_columns(db, table: TableSchema) -> dict[str, str]:
+    columns = db.get_query_result(
+        "SELECT column_name, "
+        + ("column_type" if db.dialect == "mysql" else "data_type")
+        + " FROM information_schema.columns "
+        "WHERE table_schema = %s AND table_name = %s",
+        (DATABASE, table.name),
+    ).iter_rows()
+    return {name.lower(): type_sql for name, type_sql in columns}
+
+
+# statements bringing a table with existing columns in line with the registry.
+# missing columns are added, on mysql with modify_types columns whose type
+# differs are modified in place
+def column_changes(
+    table: TableSchema,
+    existing: dict[str, str],
+    dialect: str,
+    modify_types: bool = True,
+) -> list[str]:
+    statements = []
+    for column in table.columns:
+        column_sql = sql_type(column, dialect)
+        existing_type = existing.get(column.name)
+        if existing_type is None:
+            logger.info(f"Adding column {column.name} to {table.name}")
+            statements.append(
+                f"ALTER TABLE {table.qualified_name} "
+                f"ADD COLUMN {column.name} {column_sql}"
+            )
+        elif (
+            modify_types
+            and dialect == "mysql"
+            and _mysql_type(existing_type) != _mysql_type(column_sql)
+        ):
+            logger.info(
+                f"Changing {table.name}.{column.name} from {existing_type} to {column_sql}"
+            )
+            statements.append(
+                f"ALTER TABLE {table.qualified_name} MODIFY COLUMN "
+                f"{column.name} {column_sql}{'' if column.nullable else ' NOT NULL'}"
+            )
+    return statements
+
+
+# creates the registry tables and columns that don't exist yet, without
+# touching existing ones, so ingesting works on databases built before a table
+# or column was added
+def ensure_tables(db, normalized: bool = False):
+    for table in stored_schemas(normalized):
+        db.execute(create_table_sql(table, db.dialect))
+        for statement in column_changes(
+            table, existing_columns(db, table), db.dialect, modify_types=False
+        ):
+            db.execute(statement)
+    db.commit()
+
+
+# creates missing tables and brings existing ones in line with the registry by
+# adding missing columns and indexes. on mysql columns whose type differs are
+# modified in place. name columns that tables created before normalized mode
+# still hold are left in place, they may hold the only copy of older names
+def migrate_tables(
+    db, partition_seasons: range | None = None, normalized: bool = False
+):
+    dialect = db.dialect
+    for statement in generate_ddl(dialect, partition_seasons, normalized):
+        db.execute(statement)
+    db.commit()
+
+    for table in stored_schemas(normalized):
+        for statement in column_changes(table, existing_columns(db, table), dialect):
+            db.execute(statement)
+
+        if dialect == "mysql" and partition_seasons is not None and table.partitionable:
+            partitioned = db.get_query_result(
+                "SELECT COUNT(*) FROM information_schema.partitions "
+                "WHERE table_schema = %s AND table_name = %s "
+                "AND partition_name IS NOT NULL",
+                (DATABASE, table.name),
+            )[0, 0]
+            if not partitioned:
+                logger.info(f"Partitioning {table.name} by season")
+                db.execute(
+                    f"ALTER TABLE {table.qualified_name} "
+                    + _partition_clause(partition_seasons)
+                )
+
+        if dialect == "mysql":
+            existing_indexes = set(
+                db.get_query_result(
+                    "SELECT DISTINCT index_name FROM information_schema.statistics "
+                    "WHERE table_schema = %s AND table_name = %s",
+                    (DATABASE, table.name),
+                )
+                .to_series()
+                .to_list()
+            )
+            for name, columns in table.indexes.items():
+                if name not in existing_indexes:
+                    logger.info(f"Adding index {name} to {table.name}")
+                    db.execute(
+                        f"CREATE INDEX {name} ON {table.qualified_name} "
+                        f"({', '.join(columns)})"
+                    )
+        db.commit()
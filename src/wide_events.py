@@ -0,0 +1,201 @@
+import glob
+import logging
+import os
+
+import polars as pl
+
+from db_connector import DBConnector
+from table_schemas import GAME_INFO_TABLE, TABLE_SCHEMAS, load_games, season_of
+
+logger = logging.getLogger(__name__)
+
+WIDE_EVENTS_TABLE = "nhl_api_data.wide_events"
+
+# game ids per query when loading the source tables
+CHUNK_SIZE = 500
+
+# player columns of json_pbp_plays, each gets an id, name, position and team
+PLAYER_ROLES = ["p1", "p2", "p3", "goalie"]
+
+
+# one row per json play with the game's date, season and teams and the name,
+# position and team of every player involved, so dashboards need no joins.
+# game_info and players need team abbreviations and player names filled in
+def wide_events(
+    plays: pl.LazyFrame, game_info: pl.LazyFrame, players: pl.LazyFrame
+) -> pl.LazyFrame:
+    names = players.select(
+        pl.col("game_id").cast(pl.Int32),
+        pl.col("id").cast(pl.Int32).alias("player_id"),
+        pl.when(pl.col("first_name").is_not_null() | pl.col("last_name").is_not_null())
+        .then(
+            pl.concat_str("first_name", "last_name", separator=" ", ignore_nulls=True)
+        )
+        .alias("name"),
+        pl.col("position").cast(pl.String),
+        pl.col("team_id").cast(pl.Int16),
+    ).unique(["game_id", "player_id"])
+
+    events = plays.with_columns(
+        pl.col("game_id").cast(pl.Int32),
+        pl.col(PLAYER_ROLES).cast(pl.Int32),
+        pl.col("event_owner_team_id").cast(pl.Int16),
+    ).join(
+        game_info.with_columns(
+            pl.col("game_id").cast(pl.Int32),
+            pl.col("away_team_id", "home_team_id").cast(pl.Int16),
+        ),
+        on="game_id",
+        how="left",
+    )
+    for role in PLAYER_ROLES:
+        events = events.join(
+            names.rename(
+                {
+                    "player_id": role,
+                    "name": role + "_name",
+                    "position": role + "_position",
+                    "team_id": role + "_team_id",
+                }
+            ),
+            on=["game_id", role],
+            how="left",
+        )
+
+    owner = pl.col("event_owner_team_id")
+    schema = TABLE_SCHEMAS["wide_events"].polars_schema
+    return (
+        events.with_columns(
+            pl.when(owner == pl.col("home_team_id"))
+            .then(pl.col("home_team_abrv"))
+            .when(owner == pl.col("away_team_id"))
+            .then(pl.col("away_team_abrv"))
+            .alias("event_owner_team_abrv"),
+            (owner == pl.col("home_team_id")).alias("event_owner_is_home"),
+        )
+        .rename({role: role + "_id" for role in PLAYER_ROLES})
+        .select(pl.col(c).cast(dtype) for c, dtype in schema.items())
+        .sort("game_id", "n")
+    )
+
+
+# in normalized mode the fact tables have no names, they come from the current
+# rows of the players and teams dimension tables instead
+def _with_dimension_names(
+    db: DBConnector, game_info: pl.DataFrame, players: pl.DataFrame
+) -> tuple[pl.DataFrame, pl.DataFrame]:
+    teams = db.get_query_result("SELECT team_id, abrv FROM nhl_api_data.teams")
+    for side in ["away", "home"]:
+        game_info = game_info.join(
+            teams.select(
+                pl.col("team_id").cast(pl.Int16).alias(side + "_team_id"),
+                pl.col("abrv").alias(side + "_team_abrv"),
+            ),
+            on=side + "_team_id",
+            how="left",
+        )
+
+    dimension = db.get_query_result(
+        "SELECT player_id, first_name, last_name, position FROM nhl_api_data.players"
+    )
+    players = players.join(
+        dimension.select(
+            pl.col("player_id").cast(pl.Int32).alias("id"),
+            "first_name",
+            "last_name",
+            pl.col("position").cast(pl.String),
+        ),
+        on="id",
+        how="left",
+    )
+    return game_info, players
+
+
+def season_path(out_path: str, season: int) -> str:
+    return os.path.join(out_path, f"wide_events_{season}.parquet")
+
+
+# ids of the games already materialized in the table or, without it, the files
+def materialized_game_ids(db: DBConnector, to_table: bool, out_path: str | None):
+    if to_table:
+        return set(
+            db.get_query_result(f"SELECT DISTINCT game_id FROM {WIDE_EVENTS_TABLE}")
+            .to_series()
+            .to_list()
+        )
+    paths = glob.glob(os.path.join(out_path, "wide_events_*.parquet"))
+    if not paths:
+        return set()
+    return set(pl.scan_parquet(paths).select("game_id").unique().collect().to_series())
+
+
+# replaces the rows of the games in events in the file of each of their seasons
+def _write_parquet(out_path: str, events: pl.DataFrame, game_ids: list[int]):
+    os.makedirs(out_path, exist_ok=True)
+    for season in {season_of(g) for g in game_ids}:
+        path = season_path(out_path, season)
+        season_events = events.filter(season_of(pl.col("game_id")) == season)
+        if os.path.exists(path):
+            season_events = pl.concat(
+                [
+                    pl.read_parquet(path).filter(~pl.col("game_id").is_in(game_ids)),
+                    season_events,
+                ]
+            ).sort("game_id", "n")
+        season_events.write_parquet(path + ".tmp")
+        os.replace(path + ".tmp", path)
+
+
+# rematerializes the wide events of game_ids, or of every stored game that is not
+# materialized yet when game_ids is None, into the wide_events table (to_table)
+# and/or per season parquet files in out_path. returns the number of games
+# updated
+def update_wide_events(
+    db: DBConnector,
+    game_ids: list[int] | None = None,
+    normalized: bool = False,
+    to_table: bool = True,
+    out_path: str | None = None,
+) -> int:
+    if game_ids is None:
+        game_ids = set(
+            db.get_query_result(f"SELECT game_id FROM {GAME_INFO_TABLE}")
+            .to_series()
+            .to_list()
+        ) - materialized_game_ids(db, to_table, out_path)
+    game_ids = sorted(game_ids)
+
+    for i in range(0, len(game_ids), CHUNK_SIZE):
+        chunk = game_ids[i : i + CHUNK_SIZE]
+        game_info = load_games(
+            db,
+            "game_id, season, date, away_team_id, home_team_id"
+            + ("" if normalized else ", away_team_abrv, home_team_abrv"),
+            GAME_INFO_TABLE,
+            chunk,
+        )
+        players = load_games(
+            db,
+            "game_id, id, team_id"
+            + ("" if normalized else ", first_name, last_name, position"),
+            "nhl_api_data.json_pbp_player_info",
+            chunk,
+        )
+        if normalized:
+            game_info, players = _with_dimension_names(db, game_info, players)
+        events = wide_events(
+            load_games(db, "*", "nhl_api_data.json_pbp_plays", chunk).lazy(),
+            game_info.lazy(),
+            players.lazy(),
+        ).collect()
+
+        if to_table:
+            ids = ",".join(str(g) for g in chunk)
+            with db.transaction():
+                db.execute(f"DELETE FROM {WIDE_EVENTS_TABLE} WHERE game_id IN ({ids})")
+                db.push_dataframe_to_db(events, WIDE_EVENTS_TABLE)
+        if out_path is not None:
+            _write_parquet(out_path, events, chunk)
+        logger.info(f"Materialized wide events of {len(chunk)} games")
+
+    return len(game_ids)
@@ -1,5 +1,5 @@
-# loading tables in db
-python ./src/nhl_data_parser.py build_from_csv_backup --csv_path ./csvs --sql_file_path ./src/create_and_load_tables.sql
+# creating the tables and loading the csv backup into them
+python ./src/nhl_data_parser.py build_from_csv_backup --csv_path ./csvs --sql_file_path ./src/create_databases.sql
 
 # initial update
 python ./src/nhl_data_parser.py update_database --only_reg_season
@@ -0,0 +1,84 @@
+import json
+import os
+import sys
+
+import pytest
+
+# modules in src import each other as top level modules, as when running the cli
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from nhl_api_stub import StubConfig, StubServer  # noqa: E402
+
+# a small league, two games a day with short periods
+STUB_CONFIG = StubConfig(games_per_season=64, games_per_day=2, plays_per_period=20)
+
+
+@pytest.fixture(scope="session")
+def stub_server():
+    server = StubServer(0, STUB_CONFIG)
+    server.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+# points the parsers at the stub server
+@pytest.fixture
+def api(stub_server, monkeypatch):
+    from sub_parsers import fetcher, html_pbp_parser, json_pbp_parser
+    from sub_parsers import json_shift_parser
+
+    monkeypatch.setattr(fetcher, "API_WEB_URL", stub_server.url)
+    monkeypatch.setattr(json_pbp_parser, "API_WEB_URL", stub_server.url)
+    monkeypatch.setattr(json_shift_parser, "STATS_API_URL", stub_server.url)
+    monkeypatch.setattr(html_pbp_parser, "HTML_REPORTS_URL", stub_server.url)
+    return stub_server
+
+
+@pytest.fixture
+def db_cred_path(tmp_path):
+    path = tmp_path / "database_creds.json"
+    path.write_text(
+        json.dumps({"backend": "duckdb", "path": str(tmp_path / "nhl.duckdb")})
+    )
+    return str(path)
+
+
+# builds parsers on an empty duckdb database with every registry table, keyword
+# arguments go to NHLDataParser (normalized, game_store_path, ...)
+@pytest.fixture
+def make_parser(tmp_path, db_cred_path):
+    from nhl_data_parser import NHLDataParser
+    from table_schemas import migrate_tables
+
+    def make(**kwargs):
+        parser = NHLDataParser(
+            str(tmp_path / "nhl_data_parser.log"),
+            db_cred_path,
+            str(tmp_path / "http_validators.json"),
+            **kwargs,
+        )
+        migrate_tables(parser.db, normalized=parser.normalized)
+        return parser
+
+    return make
+
+
+@pytest.fixture
+def nhl_parser(make_parser):
+    return make_parser()
+
+
+@pytest.fixture
+def db(nhl_parser):
+    return nhl_parser.db
+
+
+# play-by-play payload of a stub game as parsed from the api
+@pytest.fixture
+def pbp_payload():
+    from nhl_api_stub import pbp_payload
+
+    return lambda game_id: pbp_payload(game_id, STUB_CONFIG)
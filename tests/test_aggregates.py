@@ -0,0 +1,49 @@
+from aggregates import PLAYER_GAME_TABLE, TEAM_GAME_TABLE
+from job_queue import JobQueue
+
+GAME_IDS = [2026020001, 2026020002]
+
+
+# goals of each team from the aggregates and from the stored game info
+def team_goals(db) -> tuple[list[tuple], list[tuple]]:
+    aggregated = db.get_query_result(
+        f"SELECT game_id, team_id, goals FROM {TEAM_GAME_TABLE} "
+        "ORDER BY game_id, team_id"
+    ).rows()
+    scores = db.get_query_result(
+        "SELECT game_id, away_team_id, away_team_goals, home_team_id, "
+        "home_team_goals FROM nhl_api_data.json_pbp_game_info ORDER BY game_id"
+    ).rows()
+    stored = sorted(
+        (g, team, goals)
+        for g, away, away_goals, home, home_goals in scores
+        for team, goals in [(away, away_goals), (home, home_goals)]
+    )
+    return aggregated, stored
+
+
+def test_worker_computes_aggregates_of_its_games(api, nhl_parser, db):
+    JobQueue(db).enqueue(GAME_IDS)
+    nhl_parser.run_worker("worker", 60, 3, 0, True)
+
+    aggregated, stored = team_goals(db)
+    assert len(aggregated) == 2 * len(GAME_IDS)
+    assert aggregated == stored
+    assert (
+        db.get_query_result(
+            f"SELECT DISTINCT game_id FROM {PLAYER_GAME_TABLE} ORDER BY game_id"
+        )["game_id"].to_list()
+        == GAME_IDS
+    )
+
+
+def test_retried_games_get_aggregates(api, nhl_parser, db):
+    for g in GAME_IDS:
+        nhl_parser.dead_letters.record(g, "all", "write", Exception("down"), None)
+
+    nhl_parser.retry_failed()
+
+    aggregated, stored = team_goals(db)
+    assert [g for g, _, _ in aggregated] == sorted(GAME_IDS * 2)
+    assert aggregated == stored
+    assert nhl_parser.dead_letters.pending() == []
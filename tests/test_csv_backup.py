@@ -0,0 +1,30 @@
+from table_schemas import TABLE_SCHEMAS, read_table_csv, table_frame
+
+
+def test_bulk_load_keeps_empty_strings_and_nulls_apart(db, tmp_path):
+    path = str(tmp_path / "teams.csv")
+    teams = table_frame(
+        "teams",
+        {"team_id": [1, 2, 3], "name": ["", None, "Name"], "abrv": [None, "", "NUL"]},
+    )
+    teams.write_csv(path)
+
+    assert db.load_csv(path, TABLE_SCHEMAS["teams"]) == 3
+    loaded = db.get_query_result(
+        "SELECT team_id, name, abrv FROM nhl_api_data.teams ORDER BY team_id"
+    )
+    assert loaded.rows() == teams.rows()
+    # and the same as polars reads the backup back
+    assert read_table_csv(path, "teams").rows() == teams.rows()
+
+
+def test_bulk_load_skips_columns_the_table_lacks(db, tmp_path):
+    path = str(tmp_path / "teams.csv")
+    table_frame("teams", {"team_id": [1], "name": ["Name"], "abrv": ["ABC"]}).drop(
+        "abrv"
+    ).with_columns(dropped=1).write_csv(path)
+
+    assert db.load_csv(path, TABLE_SCHEMAS["teams"]) == 1
+    assert db.get_query_result(
+        "SELECT team_id, name, abrv FROM nhl_api_data.teams"
+    ).rows() == [(1, "Name", None)]
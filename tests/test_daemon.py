@@ -0,0 +1,80 @@
+import json
+import signal
+import socket
+import urllib.error
+import urllib.request
+
+import pytest
+
+from daemon import DaemonStatus, HealthServer, now
+
+
+# status code and body of a health endpoint request
+def get_health(port: int, path: str = "/health") -> tuple[int, dict | None]:
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}") as res:
+            return res.status, json.loads(res.read())
+    except urllib.error.HTTPError as err:
+        body = err.read()
+        return err.code, json.loads(body) if err.code != 404 else None
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_health_endpoint_reports_the_last_run():
+    status = DaemonStatus(started_at=now())
+    server = HealthServer(0, status)
+    server.start()
+    port = server.server_address[1]
+    try:
+        code, body = get_health(port)
+        assert code == 200
+        assert body["healthy"] and body["runs"] == 0
+
+        status.runs, status.failed_runs = 2, 1
+        status.last_error = "RuntimeError('down')"
+        code, body = get_health(port, "/status")
+        assert code == 503
+        assert not body["healthy"]
+        assert body["last_error"] == "RuntimeError('down')"
+
+        assert get_health(port, "/metrics") == (404, None)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def restore_signals():
+    handlers = {sig: signal.getsignal(sig) for sig in [signal.SIGTERM, signal.SIGINT]}
+    yield
+    for sig, handler in handlers.items():
+        signal.signal(sig, handler)
+
+
+def test_daemon_keeps_running_after_a_failed_update(
+    nhl_parser, monkeypatch, restore_signals
+):
+    port = free_port()
+    health = []
+
+    def update_database(only_reg_season, recheck_days, pipelined):
+        if not health:
+            health.append(None)
+            raise RuntimeError("schedule down")
+        # the failed run is reported while the next one runs
+        health.append(get_health(port))
+        signal.raise_signal(signal.SIGTERM)
+
+    monkeypatch.setattr(nhl_parser, "update_database", update_database)
+    nhl_parser.run_daemon(True, 0, 0, port)
+
+    code, body = health[1]
+    assert code == 503
+    assert body["runs"] == 1 and body["failed_runs"] == 1
+    assert body["running"]
+    assert body["last_error"] == "RuntimeError('schedule down')"
@@ -0,0 +1,79 @@
+import json
+import threading
+
+import polars as pl
+
+from db_writer import DBWriter
+
+GAME_IDS = [2026020001, 2026020002, 2026020003]
+PLAYS_TABLE = "nhl_api_data.json_pbp_plays"
+
+
+def plays(nhl_parser, pbp_payload, game_id: int) -> pl.DataFrame:
+    payload = json.dumps(pbp_payload(game_id)).encode()
+    return nhl_parser.json_pbp_parser.parse_payload(payload).plays_to_df()
+
+
+def stored_counts(db) -> dict[int, int]:
+    # a snapshot taken after the writer's commits
+    db.commit()
+    return dict(
+        db.get_query_result(
+            f"SELECT game_id, COUNT(*) FROM {PLAYS_TABLE} GROUP BY game_id"
+        ).rows()
+    )
+
+
+def test_queued_games_are_written_in_one_group(
+    nhl_parser, db, pbp_payload, monkeypatch
+):
+    frames = {g: plays(nhl_parser, pbp_payload, g) for g in GAME_IDS}
+    # rows already stored for a game are replaced
+    db.push_dataframe_to_db(frames[GAME_IDS[0]].head(5), PLAYS_TABLE)
+    db.commit()
+
+    writer = DBWriter(nhl_parser.writer_db)
+    # the first group is held open until the other games are queued
+    groups = []
+    started, release = threading.Event(), threading.Event()
+    write_group = writer._write_group
+
+    def held_write_group(batch):
+        groups.append([g for g, _, _ in batch])
+        started.set()
+        release.wait(10)
+        write_group(batch)
+
+    monkeypatch.setattr(writer, "_write_group", held_write_group)
+    writer.submit(GAME_IDS[0], {PLAYS_TABLE: frames[GAME_IDS[0]]}, {"a": 1})
+    started.wait(10)
+    for g in GAME_IDS[1:]:
+        writer.submit(g, {PLAYS_TABLE: frames[g]}, {})
+    release.set()
+    results = writer.close()
+
+    # games queued while a group is written go in the next one
+    assert groups == [GAME_IDS[:1], GAME_IDS[1:]]
+    assert [r.game_id for r in results] == GAME_IDS
+    assert [r.error for r in results] == [None] * len(GAME_IDS)
+    assert results[0].validators == {"a": 1}
+    assert stored_counts(db) == {g: df.height for g, df in frames.items()}
+
+
+def test_a_failing_game_does_not_fail_its_group(nhl_parser, db, pbp_payload):
+    frames = {g: plays(nhl_parser, pbp_payload, g) for g in GAME_IDS}
+    # a game whose rows don't fit the table
+    frames[GAME_IDS[1]] = frames[GAME_IDS[1]].with_columns(
+        pl.lit("not a number").alias("x")
+    )
+
+    writer = DBWriter(nhl_parser.writer_db)
+    for g in GAME_IDS:
+        writer.submit(g, {PLAYS_TABLE: frames[g]}, {})
+    results = writer.close()
+
+    assert [r.game_id for r in results] == GAME_IDS
+    assert [r.error is not None for r in results] == [False, True, False]
+    assert stored_counts(db) == {
+        g: frames[g].height for g in [GAME_IDS[0], GAME_IDS[2]]
+    }
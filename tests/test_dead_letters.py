@@ -0,0 +1,74 @@
+from dead_letters import FAILURES_TABLE
+
+GAME_ID = 2026020001
+TABLES = [
+    "json_pbp_game_info",
+    "json_pbp_player_info",
+    "json_pbp_plays",
+    "json_shift_info",
+    "html_pbp_plays",
+    "html_pbp_on_ice",
+]
+
+
+# rows stored for the game per table
+def stored_rows(db) -> dict[str, int]:
+    return {
+        table: db.get_query_result(
+            f"SELECT COUNT(*) FROM nhl_api_data.{table} WHERE game_id = %s",
+            (GAME_ID,),
+        ).item()
+        for table in TABLES
+    }
+
+
+def failures(db) -> list[tuple]:
+    return db.get_query_result(
+        f"SELECT game_id, source, stage, payload_url, attempts FROM {FAILURES_TABLE}"
+    ).rows()
+
+
+def test_parse_failures_are_dead_lettered_until_the_game_loads(
+    api, nhl_parser, db, monkeypatch
+):
+    def broken_report(game_id, conditional=False):
+        raise ValueError("truncated report")
+
+    url = nhl_parser.source_url(GAME_ID, "html_pbp")
+    with monkeypatch.context() as m:
+        m.setattr(nhl_parser.html_pbp_parser, "parse", broken_report)
+
+        assert not nhl_parser.ingest_game(GAME_ID)
+        # the sources parsed before the failure aren't written either
+        assert set(stored_rows(db).values()) == {0}
+        assert failures(db) == [(GAME_ID, "html_pbp", "parse", url, 1)]
+        assert (
+            "truncated report"
+            in db.get_query_result(f"SELECT exception FROM {FAILURES_TABLE}").item()
+        )
+
+        assert not nhl_parser.ingest_game(GAME_ID)
+        assert failures(db) == [(GAME_ID, "html_pbp", "parse", url, 2)]
+        assert nhl_parser.dead_letters.pending() == [GAME_ID]
+        assert nhl_parser.dead_letters.pending(max_attempts=2) == []
+
+    nhl_parser.retry_failed()
+    assert failures(db) == []
+    assert 0 not in stored_rows(db).values()
+
+
+def test_failed_writes_leave_no_partial_games(api, nhl_parser, db, monkeypatch):
+    push = db.push_dataframe_to_db
+
+    def push_until_plays(df, table_name):
+        if table_name == "nhl_api_data.json_pbp_plays":
+            raise RuntimeError("connection lost")
+        push(df, table_name)
+
+    monkeypatch.setattr(db, "push_dataframe_to_db", push_until_plays)
+
+    assert not nhl_parser.ingest_game(GAME_ID)
+    assert set(stored_rows(db).values()) == {0}
+    assert failures(db) == [(GAME_ID, "all", "write", None, 1)]
+    # validators of a game that wasn't stored are dropped
+    assert nhl_parser.fetcher.validators == {}
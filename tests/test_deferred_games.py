@@ -0,0 +1,90 @@
+import datetime
+
+from deferred_games import DeferredGames
+
+YESTERDAY = datetime.date.today() - datetime.timedelta(days=1)
+FINAL, LIVE, POSTPONED = 2026020001, 2026020002, 2026020003
+
+
+# schedule of yesterday as returned by get_game_ids, (game id, game state,
+# schedule state) per game
+def schedule(*games: tuple[int, str, str]) -> dict:
+    return {
+        "game_id": [g for g, _, _ in games],
+        "date": [YESTERDAY.isoformat()] * len(games),
+        "home_team": ["T01"] * len(games),
+        "away_team": ["T02"] * len(games),
+        "game_state": [state for _, state, _ in games],
+        "schedule_state": [schedule_state for _, _, schedule_state in games],
+    }
+
+
+def stored_game_ids(db) -> list[int]:
+    return db.get_query_result(
+        "SELECT game_id FROM nhl_api_data.json_pbp_game_info "
+        "WHERE game_id BETWEEN %s AND %s ORDER BY game_id",
+        (FINAL, POSTPONED),
+    )["game_id"].to_list()
+
+
+# runs update_database over yesterday with games as its schedule
+def update(nhl_parser, monkeypatch, *games: tuple[int, str, str]):
+    monkeypatch.setattr(
+        nhl_parser,
+        "get_game_ids",
+        lambda date, only_reg_season: (
+            schedule(*games) if date == YESTERDAY.isoformat() else None
+        ),
+    )
+    nhl_parser.update_database(True)
+    # the next run starts with fresh state
+    del nhl_parser.deferred_games, nhl_parser.ingested_game_ids
+
+
+def test_unfinished_games_are_deferred_until_final(api, nhl_parser, db, monkeypatch):
+    # a game of the day before yesterday, update_database continues from there
+    db.execute(
+        "INSERT INTO nhl_api_data.json_pbp_game_info (game_id, season, date) "
+        "VALUES (%s, %s, %s)",
+        (2025020001, 2025, YESTERDAY - datetime.timedelta(days=1)),
+    )
+    db.commit()
+
+    update(
+        nhl_parser,
+        monkeypatch,
+        (FINAL, "OFF", "OK"),
+        (LIVE, "LIVE", "OK"),
+        (POSTPONED, "FUT", "PPD"),
+    )
+    assert stored_game_ids(db) == [FINAL]
+    assert DeferredGames(db)._load() == {LIVE: YESTERDAY}
+
+    # the rescan of yesterday picks the game up once it is over
+    update(
+        nhl_parser,
+        monkeypatch,
+        (FINAL, "OFF", "OK"),
+        (LIVE, "FINAL", "OK"),
+        (POSTPONED, "FUT", "PPD"),
+    )
+    assert stored_game_ids(db) == [FINAL, LIVE]
+    assert DeferredGames(db).earliest_date() is None
+
+
+def test_deferred_games_moved_to_another_date_are_resolved(
+    api, nhl_parser, db, monkeypatch
+):
+    nhl_parser.deferred_games.defer(LIVE, YESTERDAY, "LIVE")
+    db.execute(
+        "INSERT INTO nhl_api_data.json_pbp_game_info (game_id, season, date) "
+        "VALUES (%s, %s, %s)",
+        (2025020001, 2025, YESTERDAY),
+    )
+    db.commit()
+    del nhl_parser.deferred_games
+
+    # the deferred date is rescanned although yesterday's games are stored
+    update(nhl_parser, monkeypatch, (FINAL, "OFF", "OK"))
+    assert stored_game_ids(db) == [FINAL]
+    assert DeferredGames(db).on_date(YESTERDAY) == set()
@@ -0,0 +1,89 @@
+import os
+
+from table_schemas import NORMALIZED_DROP_COLUMNS, existing_columns, stored_schema
+
+GAME_IDS = [2026020001, 2026020002]
+SQL_FILE = os.path.join(
+    os.path.dirname(__file__), "..", "src", "create_databases_duckdb.sql"
+)
+
+
+def stored_columns(db, table: str) -> set[str]:
+    return set(existing_columns(db, stored_schema(table)))
+
+
+def test_normalized_fact_tables_only_keep_ids(api, make_parser):
+    nhl_parser = make_parser(normalized=True, wide_events_table=True)
+    db = nhl_parser.db
+    for table, columns in NORMALIZED_DROP_COLUMNS.items():
+        assert not stored_columns(db, table) & set(columns)
+
+    for g in GAME_IDS:
+        assert nhl_parser.ingest_game(g)
+    nhl_parser.update_derived(GAME_IDS)
+
+    # every player and team of the games is in the dimension tables
+    assert (
+        db.get_query_result(
+            "SELECT COUNT(*) FROM nhl_api_data.json_pbp_player_info "
+            "WHERE id NOT IN (SELECT player_id FROM nhl_api_data.players)"
+        ).item()
+        == 0
+    )
+    assert (
+        db.get_query_result(
+            "SELECT COUNT(*) FROM nhl_api_data.players WHERE last_name IS NULL"
+        ).item()
+        == 0
+    )
+    assert set(
+        db.get_query_result("SELECT team_id FROM nhl_api_data.teams")
+        .to_series()
+        .to_list()
+    ) == set(
+        db.get_query_result(
+            "SELECT away_team_id FROM nhl_api_data.json_pbp_game_info UNION "
+            "SELECT home_team_id FROM nhl_api_data.json_pbp_game_info"
+        )
+        .to_series()
+        .to_list()
+    )
+    # the first history row of each player is the game they were first seen in
+    assert (
+        db.get_query_result("SELECT COUNT(*) FROM nhl_api_data.player_history").item()
+        == db.get_query_result("SELECT COUNT(*) FROM nhl_api_data.players").item()
+    )
+
+    # wide events get their names from the dimension tables
+    assert (
+        db.get_query_result(
+            "SELECT COUNT(*) FROM nhl_api_data.wide_events "
+            "WHERE home_team_abrv IS NULL OR (p1_id IS NOT NULL AND p1_name IS NULL)"
+        ).item()
+        == 0
+    )
+
+
+def test_normalized_rebuild_from_csv_backup(api, make_parser, tmp_path, monkeypatch):
+    from nhl_api_stub import game_date
+
+    monkeypatch.chdir(tmp_path)
+    date = game_date(GAME_IDS[0], api.config).isoformat()
+    backup = str(tmp_path / "backup")
+    make_parser().parse_data_to_csvs(date, date, False, backup)
+
+    nhl_parser = make_parser(normalized=True)
+    nhl_parser.build_db_from_csvs(SQL_FILE, backup)
+    db = nhl_parser.db
+
+    assert not stored_columns(db, "json_pbp_player_info") & {"first_name"}
+    players = db.get_query_result(
+        "SELECT COUNT(DISTINCT id) FROM nhl_api_data.json_pbp_player_info"
+    ).item()
+    assert players > 0
+    assert (
+        db.get_query_result(
+            "SELECT COUNT(*) FROM nhl_api_data.players WHERE first_name IS NOT NULL"
+        ).item()
+        == players
+    )
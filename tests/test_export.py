@@ -0,0 +1,65 @@
+import polars as pl
+import pyarrow as pa
+
+from nhl_api_stub import game_date
+from table_schemas import stored_schema
+
+# two games on each of the first two days
+GAME_IDS = [2026020001, 2026020002, 2026020003, 2026020004]
+
+
+# game ids and rows of an exported stream, checking its dtypes
+def read_export(path, table: str, normalized: bool = False) -> pl.DataFrame:
+    with pa.ipc.open_stream(str(path)) as reader:
+        df = pl.from_arrow(reader.read_all())
+    assert df.schema == stored_schema(table, normalized).polars_schema
+    return df
+
+
+def ingest(nhl_parser):
+    for g in GAME_IDS:
+        assert nhl_parser.ingest_game(g)
+
+
+def test_export_streams_the_filtered_games(api, nhl_parser, db, tmp_path):
+    ingest(nhl_parser)
+    out = tmp_path / "plays.arrow"
+
+    # batches smaller than a game
+    nhl_parser.export("json_pbp_plays", str(out), None, None, None, None, 50)
+    plays = read_export(out, "json_pbp_plays")
+    assert (
+        plays.height
+        == db.get_query_result(
+            "SELECT COUNT(*) FROM nhl_api_data.json_pbp_plays"
+        ).item()
+    )
+    assert plays["game_id"].unique().sort().to_list() == GAME_IDS
+
+    day = game_date(GAME_IDS[2], api.config).isoformat()
+    nhl_parser.export("json_pbp_plays", str(out), day, day, None, None, 50)
+    assert (
+        read_export(out, "json_pbp_plays")["game_id"].unique().sort().to_list()
+        == GAME_IDS[2:]
+    )
+
+    # T02 plays away in the second game and at home in the first
+    nhl_parser.export("json_pbp_game_info", str(out), None, None, [2026], "T02", 50)
+    assert read_export(out, "json_pbp_game_info")["game_id"].to_list() == GAME_IDS[:2]
+
+    # an empty export is still a readable stream
+    nhl_parser.export("json_pbp_plays", str(out), None, None, [2025], None, 50)
+    assert read_export(out, "json_pbp_plays").is_empty()
+    nhl_parser.export("json_pbp_plays", str(out), None, None, None, "XXX", 50)
+    assert read_export(out, "json_pbp_plays").is_empty()
+
+
+def test_normalized_export_reads_teams_from_the_dimension(api, make_parser, tmp_path):
+    nhl_parser = make_parser(normalized=True)
+    ingest(nhl_parser)
+    out = tmp_path / "players.arrow"
+
+    nhl_parser.export("json_pbp_player_info", str(out), None, None, None, "T02", 1000)
+    players = read_export(out, "json_pbp_player_info", normalized=True)
+    assert "first_name" not in players.columns
+    assert players["game_id"].unique().sort().to_list() == GAME_IDS[:2]
@@ -0,0 +1,89 @@
+import json
+import time
+
+from nhl_api_stub import game_date
+from sub_parsers.fetcher import Fetcher, Validator
+from sub_parsers.json_shift_parser import NHLJsonShiftParser
+
+GAME_ID = 2026020001
+
+
+def pbp_url(api) -> str:
+    return f"{api.url}/v1/gamecenter/{GAME_ID}/play-by-play"
+
+
+def test_conditional_fetch_skips_committed_payloads(api, tmp_path):
+    path = str(tmp_path / "http_validators.json")
+    fetcher = Fetcher(path)
+
+    assert fetcher.get(pbp_url(api), conditional=True) is not None
+    # a payload that was never stored is fetched again
+    fetcher.discard()
+    assert fetcher.get(pbp_url(api), conditional=True) is not None
+    fetcher.commit()
+    assert fetcher.get(pbp_url(api), conditional=True) is None
+    # unconditional fetches ignore the validators
+    assert fetcher.get(pbp_url(api)) is not None
+    fetcher.discard()
+
+    fetcher.save()
+    assert Fetcher(path).get(pbp_url(api), conditional=True) is None
+
+
+def test_shift_charts_compare_with_batched_fetches(api):
+    fetcher = Fetcher()
+    parser = NHLJsonShiftParser(fetcher)
+    url = parser.url(str(GAME_ID))
+
+    shifts = parser.parse(str(GAME_ID), conditional=True)
+    assert shifts.shift_list
+    fetcher.commit()
+    assert parser.parse(str(GAME_ID), conditional=True) is None
+
+    # the same game split out of a batch request hashes the same
+    batched = parser.parse_batch([str(GAME_ID)])[str(GAME_ID)]
+    assert batched.content_hash == shifts.content_hash
+    assert not fetcher.record(url, batched.content_hash, conditional=True)
+
+
+def test_prune_drops_validators_outside_the_window(tmp_path):
+    path = tmp_path / "http_validators.json"
+    # validators saved before fetched_at existed
+    path.write_text(
+        json.dumps({"old": {"etag": None, "last_modified": None, "content_hash": "a"}})
+    )
+    fetcher = Fetcher(str(path))
+    assert fetcher.prune(60) == 0
+
+    fetcher.commit({"stale": Validator(None, None, "b", time.time() - 120)})
+    assert fetcher.prune(60) == 1
+    assert list(fetcher.validators) == ["old"]
+
+    fetcher.save()
+    assert list(json.loads(path.read_text())) == ["old"]
+
+
+def test_save_only_writes_changed_validators(tmp_path):
+    path = tmp_path / "http_validators.json"
+    fetcher = Fetcher(str(path))
+    fetcher.save()
+    assert not path.exists()
+
+    fetcher.commit({"url": Validator(None, None, "a")})
+    fetcher.save()
+    assert path.exists()
+
+    path.unlink()
+    fetcher.save()
+    assert not path.exists()
+
+
+def test_csv_backup_keeps_no_validators(api, nhl_parser, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    date = game_date(GAME_ID, api.config).isoformat()
+
+    nhl_parser.parse_data_to_csvs(date, date, False, str(tmp_path / "backup"))
+
+    assert nhl_parser.fetcher.pending == {}
+    assert nhl_parser.fetcher.validators == {}
+    assert (tmp_path / "backup" / "html_pbp_on_ice.csv").exists()
@@ -0,0 +1,93 @@
+import polars as pl
+
+from game_store import GameStore
+
+GAME_IDS = [2026020001, 2026020002]
+
+
+def db_table(db, table: str, game_id: int) -> pl.DataFrame:
+    return db.get_query_result(
+        f"SELECT * FROM nhl_api_data.{table} WHERE game_id = %s ORDER BY n",
+        (game_id,),
+    )
+
+
+def test_ingested_games_are_read_back_from_the_store(api, make_parser, tmp_path):
+    root = str(tmp_path / "game_store")
+    nhl_parser = make_parser(game_store_path=root)
+    for g in GAME_IDS:
+        assert nhl_parser.ingest_game(g)
+    nhl_parser.game_store.save()
+
+    # a new store finds the games through the saved index
+    store = GameStore(root, cache_size=1)
+    assert store.game_ids() == GAME_IDS
+    assert 2026020003 not in store
+    assert store.get_game(2026020003) is None
+
+    game = store.get_game(GAME_IDS[0])
+    assert set(game) == {
+        "json_pbp_game_info",
+        "json_pbp_player_info",
+        "json_pbp_plays",
+        "json_shift_info",
+        "html_pbp_plays",
+        "html_pbp_on_ice",
+    }
+    # the store keeps the parsed dtypes, duckdb reads enums back as categoricals
+    assert (
+        game["json_pbp_plays"].rows()
+        == db_table(nhl_parser.db, "json_pbp_plays", GAME_IDS[0]).rows()
+    )
+    assert (
+        store.get_table(GAME_IDS[1], "html_pbp_plays").rows()
+        == db_table(nhl_parser.db, "html_pbp_plays", GAME_IDS[1]).rows()
+    )
+
+    # the least recently read game leaves the cache
+    store.get_game(GAME_IDS[1])
+    assert list(store.cache) == [GAME_IDS[1]]
+
+
+def test_rewritten_and_deleted_games(tmp_path):
+    root = str(tmp_path / "game_store")
+    store = GameStore(root)
+    plays = pl.DataFrame({"game_id": [1, 1], "n": [0, 1], "p1": [10, 11]})
+    store.write_game(1, {"nhl_api_data.json_pbp_plays": plays})
+    store.write_game(2, {"nhl_api_data.json_pbp_plays": plays.head(1)})
+    assert store.get_game(1)["json_pbp_plays"].height == 2
+
+    # tables missing from a rewrite are kept, the rewritten one replaces the cache
+    shifts = pl.DataFrame({"game_id": [1], "player_id": [10]})
+    store.write_game(
+        1,
+        {"nhl_api_data.json_pbp_plays": plays.head(1), "json_shift_info": shifts},
+    )
+    assert {t: df.height for t, df in store.get_game(1).items()} == {
+        "json_pbp_plays": 1,
+        "json_shift_info": 1,
+    }
+
+    store.delete_game(2)
+    store.save()
+    assert GameStore(root).game_ids() == [1]
+
+
+def test_build_game_store_copies_the_selected_seasons(api, make_parser, tmp_path):
+    nhl_parser = make_parser()
+    for g in GAME_IDS:
+        assert nhl_parser.ingest_game(g)
+
+    root = str(tmp_path / "game_store")
+    nhl_parser = make_parser(game_store_path=root)
+    nhl_parser.build_game_store([2025])
+    assert GameStore(root).game_ids() == []
+
+    nhl_parser.build_game_store([2026])
+    assert GameStore(root).game_ids() == GAME_IDS
+    assert nhl_parser.get_game(GAME_IDS[1])["json_shift_info"].equals(
+        nhl_parser.db.get_query_result(
+            "SELECT * FROM nhl_api_data.json_shift_info WHERE game_id = %s",
+            (GAME_IDS[1],),
+        )
+    )
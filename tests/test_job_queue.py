@@ -0,0 +1,74 @@
+from job_queue import JOBS_TABLE, JobQueue
+
+
+def job_states(db) -> list[tuple[int, str, int]]:
+    return db.get_query_result(
+        f"SELECT game_id, CAST(state AS VARCHAR), attempts FROM {JOBS_TABLE} "
+        "ORDER BY game_id"
+    ).rows()
+
+
+def test_claim_hands_out_each_game_once(db):
+    queue = JobQueue(db)
+    assert queue.enqueue([2026020002, 2026020001]) == 2
+    # games already queued are left alone
+    assert queue.enqueue([2026020001, 2026020003]) == 1
+
+    claimed = [queue.claim(f"worker-{i}", 60) for i in range(4)]
+    assert [job.game_id for job in claimed[:3]] == [
+        2026020001,
+        2026020002,
+        2026020003,
+    ]
+    assert claimed[3] is None
+    assert queue.remaining() == 3
+
+    for i, job in enumerate(claimed[:3]):
+        assert queue.complete(job, f"worker-{i}")
+    assert queue.remaining() == 0
+    assert {state for _, state, _ in job_states(db)} == {"done"}
+
+
+def test_expired_lease_goes_to_the_next_worker(db):
+    queue = JobQueue(db)
+    queue.enqueue([2026020001])
+
+    # the lease runs out as soon as it is taken
+    stale = queue.claim("worker-a", -1)
+    job = queue.claim("worker-b", 60)
+    assert job.game_id == stale.game_id
+    assert job.attempts == 2
+
+    # the first worker lost its lease and can no longer finish the job
+    assert not queue.heartbeat(stale, "worker-a", 60)
+    assert not queue.complete(stale, "worker-a")
+    assert queue.complete(job, "worker-b")
+    assert job_states(db) == [(2026020001, "done", 2)]
+
+
+def test_failed_jobs_are_retried_until_max_attempts(db):
+    queue = JobQueue(db, max_attempts=2)
+    queue.enqueue([2026020001])
+
+    job = queue.claim("worker", 60)
+    assert queue.fail(job, "worker", "boom")
+    assert job_states(db) == [(2026020001, "pending", 1)]
+
+    job = queue.claim("worker", 60)
+    assert queue.fail(job, "worker", "boom")
+    assert job_states(db) == [(2026020001, "failed", 2)]
+    assert queue.claim("worker", 60) is None
+    assert queue.remaining() == 0
+
+    assert queue.requeue_failed() == 1
+    job = queue.claim("worker", 60)
+    assert job.attempts == 1
+
+
+def test_lease_expiring_on_the_last_attempt_fails_the_job(db):
+    queue = JobQueue(db, max_attempts=1)
+    queue.enqueue([2026020001])
+
+    queue.claim("worker", -1)
+    assert queue.claim("worker", 60) is None
+    assert job_states(db) == [(2026020001, "failed", 1)]
@@ -0,0 +1,50 @@
+import json
+
+import pytest
+
+from sub_parsers import json_schema
+from sub_parsers.json_pbp_parser import NHLJsonPbpParser
+
+GAME_ID = 2026020001
+
+
+# stub payload with the explicit nulls the api sends for missing values
+def payload_with_nulls(pbp_payload) -> bytes:
+    payload = pbp_payload(GAME_ID)
+    plays = payload["plays"]
+    plays[0]["details"] = None
+    for play in plays[1:]:
+        details = play.setdefault("details", {})
+        details.update(assist2PlayerId=None, shotType=None, reason=None)
+        if "winningPlayerId" in details:
+            # a null higher up the chain falls through to the next id
+            details["winningPlayerId"] = None
+            details["playerId"] = 8470001
+    plays[1]["eventId"] = None
+    payload["summary"] = {"gameInfo": {"referees": [], "homeTeam": None}}
+    return json.dumps(payload).encode()
+
+
+def parse(content: bytes, monkeypatch, use_msgspec: bool) -> dict:
+    monkeypatch.setattr(json_schema, "HAS_MSGSPEC", use_msgspec)
+    game = NHLJsonPbpParser().parse_payload(content)
+    return {
+        "game_info": game.game_info_to_df(),
+        "players": game.players_to_df(),
+        "plays": game.plays_to_df(),
+    }
+
+
+@pytest.mark.skipif(not json_schema.HAS_MSGSPEC, reason="msgspec is not installed")
+def test_msgspec_and_dict_decoders_agree(pbp_payload, monkeypatch):
+    content = payload_with_nulls(pbp_payload)
+
+    structs = parse(content, monkeypatch, True)
+    dicts = parse(content, monkeypatch, False)
+
+    for name, df in structs.items():
+        assert df.equals(dicts[name]), name
+    plays = structs["plays"]
+    assert plays["event_id"][1] is None
+    assert plays["p3"].null_count() == plays.height
+    assert plays["shot_type"].null_count() == plays.height
@@ -0,0 +1,84 @@
+import json
+
+GAME_ID = 2026020001
+
+
+# (n, event id) of the plays of a feed, as they should be stored
+def feed_plays(plays: list[dict]) -> list[tuple[int, int]]:
+    return [(n, p["eventId"]) for n, p in enumerate(plays)]
+
+
+def stored_plays(db) -> list[tuple[int, int]]:
+    return db.get_query_result(
+        "SELECT n, event_id FROM nhl_api_data.json_pbp_plays "
+        "WHERE game_id = %s ORDER BY n",
+        (GAME_ID,),
+    ).rows()
+
+
+# polls the game once with payload as its feed
+def poll(nhl_parser, monkeypatch, payload, is_final, stored_events, finalized):
+    game = nhl_parser.json_pbp_parser.parse_payload(json.dumps(payload).encode())
+    monkeypatch.setattr(
+        nhl_parser.json_pbp_parser, "parse", lambda game_id, conditional=False: game
+    )
+    nhl_parser._poll_live_game(GAME_ID, is_final, stored_events, finalized)
+
+
+def test_live_plays_follow_feed_corrections(api, nhl_parser, monkeypatch, pbp_payload):
+    payload = pbp_payload(GAME_ID)
+    plays = payload["plays"]
+    stored_events, finalized = {}, set()
+
+    poll(
+        nhl_parser,
+        monkeypatch,
+        {**payload, "plays": plays[:10]},
+        False,
+        stored_events,
+        finalized,
+    )
+    assert stored_plays(nhl_parser.db) == feed_plays(plays[:10])
+
+    # new plays are appended
+    poll(
+        nhl_parser,
+        monkeypatch,
+        {**payload, "plays": plays[:15]},
+        False,
+        stored_events,
+        finalized,
+    )
+    assert stored_plays(nhl_parser.db) == feed_plays(plays[:15])
+
+    # the feed drops a play, every later play moves up by one
+    corrected = plays[:3] + plays[4:20]
+    poll(
+        nhl_parser,
+        monkeypatch,
+        {**payload, "plays": corrected},
+        False,
+        stored_events,
+        finalized,
+    )
+    assert stored_plays(nhl_parser.db) == feed_plays(corrected)
+
+    # the final feed replaces the plays with the full set
+    poll(nhl_parser, monkeypatch, payload, True, stored_events, finalized)
+    assert stored_plays(nhl_parser.db) == feed_plays(plays)
+    assert GAME_ID in finalized
+    assert (
+        nhl_parser.db.get_query_result(
+            "SELECT COUNT(*) FROM nhl_api_data.json_pbp_game_info WHERE game_id = %s",
+            (GAME_ID,),
+        ).item()
+        == 1
+    )
+    # the finalized game gets its aggregates
+    assert (
+        nhl_parser.db.get_query_result(
+            "SELECT COUNT(*) FROM nhl_api_data.team_game_stats WHERE game_id = %s",
+            (GAME_ID,),
+        ).item()
+        == 2
+    )
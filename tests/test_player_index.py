@@ -0,0 +1,92 @@
+import os
+import shutil
+
+import polars as pl
+
+import player_index
+from player_index import PlayerIndex
+
+GAME_IDS = [2026020001, 2026020002]
+# first skater of the away team of the first game
+PLAYER_ID = 8000100
+
+
+def plays(game_id: int, p1: list, p2: list) -> dict[str, pl.DataFrame]:
+    return {
+        "nhl_api_data.json_pbp_plays": pl.DataFrame(
+            {"game_id": [game_id] * len(p1), "p1": p1, "p2": p2},
+            schema={"game_id": pl.Int32, "p1": pl.Int32, "p2": pl.Int32},
+        )
+    }
+
+
+def entries(index: PlayerIndex, player_id: int) -> list[tuple]:
+    return index.lookup(player_id).with_columns(pl.col("table").cast(pl.String)).rows()
+
+
+def test_lookups_follow_rewrites_saves_and_merges(tmp_path, monkeypatch):
+    monkeypatch.setattr(player_index, "MAX_SEGMENTS", 2)
+    root = str(tmp_path / "player_index")
+    index = PlayerIndex(root)
+
+    # a player named twice in one row is listed once
+    index.update_game(1, plays(1, [10, 11, 10], [10, None, 12]))
+    index.update_game(2, plays(2, [12], [10]))
+    assert entries(index, 10) == [
+        (1, "json_pbp_plays", 0),
+        (1, "json_pbp_plays", 2),
+        (2, "json_pbp_plays", 0),
+    ]
+    index.save()
+
+    # a rewritten game hides its entries in older segments
+    index.update_game(1, plays(1, [11], [None]))
+    assert entries(index, 10) == [(2, "json_pbp_plays", 0)]
+    index.save()
+    assert entries(PlayerIndex(root), 11) == [(1, "json_pbp_plays", 0)]
+
+    index.delete_game(2)
+    index.update_game(3, plays(3, [10], [None]))
+    index.save()
+    index.update_game(4, plays(4, [10], [None]))
+    index.save()
+    # segments get merged into one and stale entries are dropped
+    assert sorted(os.listdir(root)) == ["games.arrow", "segment_000004.arrow"]
+    reloaded = PlayerIndex(root)
+    assert entries(reloaded, 10) == [(3, "json_pbp_plays", 0), (4, "json_pbp_plays", 0)]
+    assert entries(reloaded, 12) == []
+
+
+def test_player_rows_of_stored_games(api, make_parser, tmp_path):
+    root = str(tmp_path / "game_store")
+    nhl_parser = make_parser(game_store_path=root)
+    for g in GAME_IDS:
+        assert nhl_parser.ingest_game(g)
+    nhl_parser.game_store.save()
+
+    expected = nhl_parser.db.get_query_result(
+        "SELECT game_id, n FROM nhl_api_data.json_pbp_plays "
+        "WHERE %s IN (p1, p2, p3, goalie) ORDER BY game_id, n",
+        (PLAYER_ID,),
+    ).rows()
+    assert expected
+
+    rows = nhl_parser.get_player_rows(PLAYER_ID)
+    assert rows["json_pbp_plays"].select("game_id", "n").rows() == expected
+    assert rows["json_pbp_player_info"]["id"].to_list() == [PLAYER_ID]
+    assert set(rows["json_shift_info"]["player_id"]) == {PLAYER_ID}
+    assert set(rows["html_pbp_on_ice"]["player_id"]) == {PLAYER_ID}
+    assert set(nhl_parser.get_player_rows(PLAYER_ID, ["json_pbp_plays"])) == {
+        "json_pbp_plays"
+    }
+
+    # stores written before the index existed are indexed from scratch
+    shutil.rmtree(os.path.join(root, "player_index"))
+    nhl_parser = make_parser(game_store_path=root)
+    nhl_parser.build_player_index()
+    assert (
+        nhl_parser.get_player_rows(PLAYER_ID)["json_pbp_plays"]
+        .select("game_id", "n")
+        .rows()
+        == expected
+    )
@@ -0,0 +1,71 @@
+import polars as pl
+
+from reconcile import ALIGNMENT_TABLE, align_plays
+
+GAME_IDS = [2026020001, 2026020002]
+
+
+def test_align_plays_matches_events_within_the_tolerance():
+    html = pl.DataFrame(
+        {
+            "game_id": [1] * 6,
+            "n": [1, 2, 3, 4, 5, 6],
+            "period": [1] * 6,
+            "time_elapsed": ["0:00", "1:02", "1:02", "5:30", "9:00", "12:00"],
+            "event": [
+                "faceoff",
+                "shot-on-goal",
+                "shot-on-goal",
+                "hit",
+                "hit",
+                "giveaway",
+            ],
+        }
+    )
+    json = pl.DataFrame(
+        {
+            "game_id": [1] * 6,
+            "n": [0, 1, 2, 3, 4, 5],
+            "period": [1] * 6,
+            "time_in_period": ["00:00", "01:02", "01:02", "05:32", "09:00", "12:05"],
+            "event_type": [
+                "faceoff",
+                "shot-on-goal",
+                "shot-on-goal",
+                "hit",
+                "goal",
+                "giveaway",
+            ],
+        }
+    )
+
+    mapping = align_plays(html, json, tolerance_seconds=2)
+
+    # shots logged in the same second keep their order and the hit is matched
+    # despite the drift. the play the json feed calls a goal and the giveaway 5s
+    # off stay unmatched
+    assert mapping.select("html_n", "json_n", "time_diff").rows() == [
+        (1, 0, 0),
+        (2, 1, 0),
+        (3, 2, 0),
+        (4, 3, 2),
+    ]
+
+
+def test_reconcile_maps_every_stored_html_play(api, nhl_parser, db):
+    for g in GAME_IDS:
+        assert nhl_parser.ingest_game(g)
+
+    nhl_parser.reconcile_plays([2026], 2)
+    # reruns replace the season's rows
+    nhl_parser.reconcile_plays([2026], 2)
+
+    counts = db.get_query_result(
+        f"SELECT game_id, COUNT(*), COUNT(DISTINCT json_n) FROM {ALIGNMENT_TABLE} "
+        "GROUP BY game_id ORDER BY game_id"
+    ).rows()
+    html_counts = db.get_query_result(
+        "SELECT game_id, COUNT(*) FROM nhl_api_data.html_pbp_plays "
+        "GROUP BY game_id ORDER BY game_id"
+    ).rows()
+    assert [(g, n, n) for g, n in html_counts] == counts
@@ -0,0 +1,81 @@
+import polars as pl
+
+from shot_grids import ALL_SHOT_TYPES, grid_path, load_shot_grid, shot_grids
+
+GAME_ID = 2023020001
+
+
+# shots of player 8 of team 1 in the first period, x and y in feet
+def plays(shots: list[tuple[str, str | None, int, int]]) -> pl.LazyFrame:
+    return pl.LazyFrame(
+        {
+            "game_id": [GAME_ID] * len(shots),
+            "period": [1] * len(shots),
+            "period_type": ["REG"] * len(shots),
+            "event_type": [s[0] for s in shots],
+            "event_owner_team_id": [1] * len(shots),
+            "p1": [8] * len(shots),
+            "shot_type": [s[1] for s in shots],
+            "x": [s[2] for s in shots],
+            "y": [s[3] for s in shots],
+        },
+        schema_overrides={"shot_type": pl.String},
+    )
+
+
+# (attempts, goals) summed over the grid cells, per shot type
+def totals(grids: pl.DataFrame) -> dict[str | None, tuple[int, int]]:
+    return {
+        row["shot_type"]: (
+            sum(map(sum, row["attempts"])),
+            sum(map(sum, row["goals"])),
+        )
+        for row in grids.iter_rows(named=True)
+    }
+
+
+def test_untyped_shots_are_counted_once_in_all_types():
+    grids = shot_grids(
+        plays(
+            [
+                ("shot-on-goal", "wrist", 70, 5),
+                ("goal", "wrist", 80, 0),
+                ("missed-shot", None, 60, -10),
+            ]
+        ),
+        "player",
+    )
+
+    assert totals(grids) == {
+        ALL_SHOT_TYPES: (3, 1),
+        "wrist": (2, 1),
+        None: (1, 0),
+    }
+
+
+def test_shootout_attempts_are_left_out():
+    shots = plays([("goal", "snap", 80, 0), ("goal", "snap", 80, 0)])
+    shots = shots.with_columns(
+        pl.Series("period_type", ["REG", "SO"]), pl.Series("period", [1, 5])
+    )
+
+    assert totals(shot_grids(shots, "team")) == {
+        ALL_SHOT_TYPES: (1, 1),
+        "snap": (1, 1),
+    }
+
+
+def test_load_shot_grid_defaults_to_all_types(tmp_path):
+    grids = shot_grids(
+        plays([("shot-on-goal", "slap", 70, 5), ("missed-shot", None, 70, 5)]),
+        "player",
+    )
+    grids.write_parquet(grid_path(str(tmp_path), "player", 2023))
+
+    attempts, goals = load_shot_grid(str(tmp_path), "player", 2023, 8)
+    assert sum(map(sum, attempts)) == 2
+    assert sum(map(sum, goals)) == 0
+
+    attempts, _ = load_shot_grid(str(tmp_path), "player", 2023, 8, None)
+    assert sum(map(sum, attempts)) == 1
+    assert load_shot_grid(str(tmp_path), "player", 2023, 8, "wrist") is None
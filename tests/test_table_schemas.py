@@ -0,0 +1,99 @@
+import json
+import os
+
+import pytest
+
+from table_schemas import (
+    TABLE_SCHEMAS,
+    _mysql_type,
+    column_changes,
+    create_table_sql,
+    existing_columns,
+    sql_type,
+)
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+@pytest.mark.parametrize(
+    "reported, generated",
+    [
+        ("int(11)", "INT"),
+        ("INTEGER", "INT"),
+        ("smallint(6) unsigned", "SMALLINT UNSIGNED"),
+        ("tinyint(1)", "BOOLEAN"),
+        ("bool", "BOOLEAN"),
+        ("varchar(5)", "VARCHAR(5)"),
+        ("enum('REG','OT','SO')", "ENUM('REG','OT','SO')"),
+    ],
+)
+def test_mysql_type_ignores_display_widths_and_aliases(reported, generated):
+    assert _mysql_type(reported) == _mysql_type(generated)
+
+
+@pytest.mark.parametrize(
+    "reported, generated",
+    [
+        ("int(11)", "SMALLINT"),
+        ("tinyint(4)", "BOOLEAN"),
+        ("varchar(40)", "ENUM('REG','OT','SO')"),
+        ("varchar(2)", "VARCHAR(5)"),
+    ],
+)
+def test_mysql_type_keeps_real_changes(reported, generated):
+    assert _mysql_type(reported) != _mysql_type(generated)
+
+
+# json_pbp_plays as information_schema reported it on mysql 5.7 for a table
+# created by the hand-written ddl the registry replaced
+def test_column_changes_migrate_a_recorded_mysql_table():
+    with open(os.path.join(FIXTURES, "mysql57_json_pbp_plays_columns.json")) as f:
+        existing = json.load(f)
+    table = TABLE_SCHEMAS["json_pbp_plays"]
+
+    statements = column_changes(table, existing, "mysql")
+
+    prefix = "ALTER TABLE nhl_api_data.json_pbp_plays "
+    assert all(s.startswith(prefix) for s in statements)
+    changes = [s.removeprefix(prefix) for s in statements]
+    assert "ADD COLUMN event_id INT" in changes
+    assert "MODIFY COLUMN n SMALLINT NOT NULL" in changes
+    assert "MODIFY COLUMN period TINYINT" in changes
+    modified = {c.split()[2] for c in changes if c.startswith("MODIFY")}
+    assert modified == {
+        "n",
+        "event_type",
+        "period",
+        "period_type",
+        "event_owner_team_id",
+        "shot_type",
+        "x",
+        "y",
+        "penalty_duration",
+    }
+
+    # without modify_types only the missing column is added
+    assert column_changes(table, existing, "mysql", modify_types=False) == [
+        prefix + "ADD COLUMN event_id INT"
+    ]
+
+
+# a table in line with the registry, as mysql 8 reports it
+def test_column_changes_leave_matching_tables_alone():
+    for table in TABLE_SCHEMAS.values():
+        existing = {
+            c.name: sql_type(c, "mysql").lower().replace("boolean", "tinyint(1)")
+            for c in table.columns
+        }
+        assert column_changes(table, existing, "mysql") == []
+
+
+def test_generated_ddl_creates_the_registry_tables(db):
+    for table in TABLE_SCHEMAS.values():
+        assert set(existing_columns(db, table)) == {c.name for c in table.columns}
+        assert column_changes(table, existing_columns(db, table), "duckdb") == []
+
+    ddl = create_table_sql(TABLE_SCHEMAS["json_pbp_plays"], "mysql", range(2023, 2025))
+    assert "PRIMARY KEY (game_id, n)" in ddl
+    assert "INDEX idx_event_type (event_type)" in ddl
+    assert "PARTITION BY RANGE (game_id)" in ddl